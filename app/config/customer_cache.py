@@ -0,0 +1,29 @@
+import os
+from typing import Any, Dict
+from app.utils.ttl_cache import CacheBackend, TTLCache
+
+CUSTOMER_CACHE_SIZE = int(os.getenv("CUSTOMER_CACHE_SIZE", "10000"))
+CUSTOMER_CACHE_TTL = float(os.getenv("CUSTOMER_CACHE_TTL", "300"))
+
+CUSTOMER_FIELDS = ("id", "name", "age", "income", "activity_score", "created_at")
+
+_customer_cache: CacheBackend = TTLCache(maxsize=CUSTOMER_CACHE_SIZE, ttl=CUSTOMER_CACHE_TTL)
+
+
+def customer_to_dict(customer) -> Dict[str, Any]:
+    return {field: getattr(customer, field) for field in CUSTOMER_FIELDS}
+
+
+def set_customer_cache(backend: CacheBackend):
+    """Swap the cache backend, e.g. for a shared store across workers."""
+    global _customer_cache
+    _customer_cache = backend
+
+
+def current_customer_cache() -> CacheBackend:
+    return _customer_cache
+
+
+async def get_customer_cache() -> CacheBackend:
+    """FastAPI dependency; async so it is called inline instead of through the thread pool."""
+    return _customer_cache
@@ -1,31 +1,155 @@
+"""Database engines and session factories, created on first use.
+
+Importing this module does not load ``.env`` or build any engine; the sync and
+async engines are created the first time something asks for them (normally the
+FastAPI lifespan hook, or a CLI job). ``engine``, ``SessionLocal``,
+``async_engine`` and ``AsyncSessionLocal`` are still importable as module
+attributes and resolve lazily.
+"""
 import os
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import threading
+from typing import Any, Dict, Tuple
+
+_engines: Dict[str, Any] = {}
+_session_factories: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+def load_environment():
+    from app.config.env import load_environment as load
+
+    load()
+
+def _credentials() -> str:
+    load_environment()
+    return f"{os.getenv('DB_USER')}:{os.getenv('DB_PASSWORD')}@{os.getenv('DB_HOST')}/{os.getenv('DB_NAME')}"
+
+def database_url() -> str:
+    return f"mysql+mysqlconnector://{_credentials()}"
+
+def async_database_url() -> str:
+    load_environment()
+    return os.getenv("ASYNC_DATABASE_URL") or f"mysql+aiomysql://{_credentials()}"
+
+def pool_sizes() -> Tuple[int, int]:
+    """(pool_size, max_overflow) for one engine in this process.
+
+    With ``DB_MAX_CONNECTIONS`` set, that per-engine budget for the whole
+    container is split evenly across ``WEB_CONCURRENCY`` worker processes, half
+    persistent and half overflow. ``DB_POOL_SIZE``/``DB_MAX_OVERFLOW`` still win.
+    """
+    load_environment()
+    budget = os.getenv("DB_MAX_CONNECTIONS")
+    if not budget:
+        return int(os.getenv("DB_POOL_SIZE", "5")), int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    share = max(1, int(budget) // max(1, int(os.getenv("WEB_CONCURRENCY", "1"))))
+    size = max(1, share // 2)
+    return int(os.getenv("DB_POOL_SIZE", size)), int(os.getenv("DB_MAX_OVERFLOW", share - size))
+
+def pool_options(name: str) -> dict:
+    pool_size, max_overflow = pool_sizes()
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", "30")),
+        "pool_recycle": int(os.getenv("DB_POOL_RECYCLE", "-1")),
+        "pool_pre_ping": os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes"),
+        "pool_logging_name": name,
+    }
+
+def _build_sync():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from app.config.pool_metrics import InstrumentedQueuePool, instrument_pool_events
+
+    engine = create_engine(database_url(), poolclass=InstrumentedQueuePool, **pool_options("sync"))
+    instrument_pool_events(engine, "sync")
+    return engine, sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def _build_async():
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from app.config.pool_metrics import InstrumentedAsyncQueuePool, instrument_pool_events
+
+    engine = create_async_engine(async_database_url(), poolclass=InstrumentedAsyncQueuePool, **pool_options("async"))
+    instrument_pool_events(engine.sync_engine, "async")
+    return engine, async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
 
-load_dotenv()
+_BUILDERS = {"sync": _build_sync, "async": _build_async}
 
-DB_HOST = os.getenv("DB_HOST")
-DB_USER = os.getenv("DB_USER")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
-DB_NAME = os.getenv("DB_NAME")
+def _get(name: str):
+    if name not in _engines:
+        with _lock:
+            if name not in _engines:
+                engine, factory = _BUILDERS[name]()
+                _session_factories[name] = factory
+                _engines[name] = engine
+    return _engines[name], _session_factories[name]
 
-DATABASE_URL = f"mysql+mysqlconnector://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}"
+def get_engine():
+    return _get("sync")[0]
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def get_async_engine():
+    return _get("async")[0]
+
+def get_session_factory():
+    return _get("sync")[1]
+
+def get_async_session_factory():
+    return _get("async")[1]
+
+def _reset_after_fork():
+    # Pooled connections belong to the parent; drop them without closing its sockets.
+    for name, engine in _engines.items():
+        (engine.sync_engine if name == "async" else engine).dispose(close=False)
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+def init_database():
+    """Create the async engine used by the API up front (no connection is opened)."""
+    get_async_engine()
+
+async def dispose_engines():
+    for name, engine in list(_engines.items()):
+        if name == "async":
+            await engine.dispose()
+        else:
+            engine.dispose()
+
+_LAZY_ATTRIBUTES = {
+    "engine": get_engine,
+    "SessionLocal": get_session_factory,
+    "async_engine": get_async_engine,
+    "AsyncSessionLocal": get_async_session_factory,
+    "DATABASE_URL": database_url,
+    "ASYNC_DATABASE_URL": async_database_url,
+}
+
+def __getattr__(name: str):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 def get_db():
-    db = SessionLocal()
+    db = get_session_factory()()
     try:
         yield db
     finally:
         db.close()
 
+async def get_async_db():
+    async with get_async_session_factory()() as db:
+        yield db
+
+def pool_status() -> dict:
+    """Stats for the engines created so far in this process."""
+    from app.config.pool_metrics import get_pool_stats
+
+    status = {name: get_pool_stats(name).snapshot(engine.pool) for name, engine in _engines.items()}
+    status["config"] = {k: v for k, v in pool_options("").items() if k != "pool_logging_name"}
+    return status
+
 def create_tables():
     from .models_base import Base, Customer, RiskScore
-    Base.metadata.create_all(bind=engine)
+    Base.metadata.create_all(bind=get_engine())
 
 if __name__ == "__main__":
     create_tables()
-
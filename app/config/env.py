@@ -0,0 +1,28 @@
+"""Loads ``.env`` into the process environment, once, when first imported.
+
+``app.main`` imports this module before anything that reads settings, and the
+DB factories call ``load_environment()`` on first use so CLI jobs get it too.
+Compute modules never import it.
+"""
+import threading
+
+_loaded = False
+_lock = threading.Lock()
+
+
+def load_environment() -> bool:
+    """Load ``.env`` if it has not been loaded yet; returns True on the first call."""
+    global _loaded
+    if _loaded:
+        return False
+    with _lock:
+        if _loaded:
+            return False
+        from dotenv import load_dotenv
+
+        load_dotenv()
+        _loaded = True
+        return True
+
+
+load_environment()
@@ -0,0 +1,118 @@
+"""Deduplicated storage of score explanations.
+
+An explanation depends only on the bucket combination and the config, so the
+same few dozen paragraphs repeat across millions of ``risk_scores`` rows. Each
+distinct text is stored once in ``risk_explanations``, keyed by its SHA-256.
+Score rows reference it by ``explanation_id``, and reads get the text back
+through a join.
+
+Ids are cached per process once the transaction that created or read them
+commits, so steady-state writes add no queries.
+"""
+import hashlib
+import weakref
+from typing import Any, Dict, Iterable, List, Tuple
+from sqlalchemy import event, insert, select
+from sqlalchemy.orm import Session
+from app.config.models_base import RiskExplanation
+
+MAX_CACHED_IDS = 10000
+PENDING_KEY = "pending_explanation_ids"
+
+# Per database engine: digest -> id.
+_ids: "weakref.WeakKeyDictionary[Any, Dict[str, int]]" = weakref.WeakKeyDictionary()
+
+
+def digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _cache(session: Session) -> Dict[str, int]:
+    bind = session.get_bind()
+    cache = _ids.get(bind)
+    if cache is None:
+        cache = _ids.setdefault(bind, {})
+    return cache
+
+
+def _plan(session: Session, texts: Iterable[str]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    cache = _cache(session)
+    by_digest = {digest(text): text for text in set(texts)}
+    missing = {d: text for d, text in by_digest.items() if d not in cache}
+    return by_digest, missing
+
+
+def _insert_missing(missing: Dict[str, str]):
+    # Concurrent writers may race on the same text; the unique digest keeps one row.
+    statement = (
+        insert(RiskExplanation)
+        .prefix_with("IGNORE", dialect="mysql")
+        .prefix_with("OR IGNORE", dialect="sqlite")
+    )
+    return statement, [{"digest": d, "text": text} for d, text in missing.items()]
+
+
+def _lookup(missing: Dict[str, str]):
+    return select(RiskExplanation.digest, RiskExplanation.id).where(RiskExplanation.digest.in_(list(missing)))
+
+
+def _resolve(session: Session, by_digest: Dict[str, str], found) -> Dict[str, int]:
+    # Only cache ids after commit: a rollback would undo a freshly inserted row.
+    cache = _cache(session)
+    pending = session.info.setdefault(PENDING_KEY, {})
+    pending.update({d: explanation_id for d, explanation_id in found})
+    return {text: cache.get(d) or pending[d] for d, text in by_digest.items()}
+
+
+async def explanation_ids(db, texts: Iterable[str]) -> Dict[str, int]:
+    """Map each text to its ``risk_explanations`` id, inserting texts not stored yet."""
+    by_digest, missing = _plan(db.sync_session, texts)
+    found = []
+    if missing:
+        statement, params = _insert_missing(missing)
+        await db.execute(statement, params)
+        found = (await db.execute(_lookup(missing))).all()
+    return _resolve(db.sync_session, by_digest, found)
+
+
+def explanation_ids_sync(db: Session, texts: Iterable[str]) -> Dict[str, int]:
+    by_digest, missing = _plan(db, texts)
+    found = []
+    if missing:
+        statement, params = _insert_missing(missing)
+        db.execute(statement, params)
+        found = db.execute(_lookup(missing)).all()
+    return _resolve(db, by_digest, found)
+
+
+def _compact(rows: List[Dict[str, Any]], ids: Dict[str, int]) -> List[Dict[str, Any]]:
+    compacted = []
+    for row in rows:
+        row = dict(row)
+        row["explanation_id"] = ids[row.pop("explanation")]
+        compacted.append(row)
+    return compacted
+
+
+async def compact_rows(db, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Replace each row's ``explanation`` text with its ``explanation_id``."""
+    return _compact(rows, await explanation_ids(db, [row["explanation"] for row in rows]))
+
+
+def compact_rows_sync(db: Session, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return _compact(rows, explanation_ids_sync(db, [row["explanation"] for row in rows]))
+
+
+@event.listens_for(Session, "after_commit")
+def _cache_committed_ids(session):
+    pending = session.info.pop(PENDING_KEY, None)
+    if pending:
+        cache = _cache(session)
+        if len(cache) + len(pending) > MAX_CACHED_IDS:
+            cache.clear()
+        cache.update(pending)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_uncommitted_ids(session):
+    session.info.pop(PENDING_KEY, None)
@@ -1,9 +1,42 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey
+from datetime import datetime, timezone
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Index
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.orm import declarative_base, relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql.functions import FunctionElement
 
 Base = declarative_base()
 
+def utcnow() -> datetime:
+    """Client-side creation timestamp, truncated to the DATETIME column's second precision.
+
+    Setting it in Python means inserts don't need a refresh to read created_at
+    back, and the value returned equals what is stored.
+    """
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+class utc_now(FunctionElement):
+    """Server-side UTC timestamp, matching ``utcnow()`` for rows inserted outside the app.
+
+    ``now()`` would use the MySQL session time zone instead.
+    """
+
+    type = DateTime()
+    inherit_cache = True
+
+@compiles(utc_now)
+def _utc_now_default(element, compiler, **kw):
+    # SQLite's CURRENT_TIMESTAMP is already UTC.
+    return "CURRENT_TIMESTAMP"
+
+@compiles(utc_now, "mysql")
+def _utc_now_mysql(element, compiler, **kw):
+    # Parenthesized so it is also valid as a column DEFAULT expression (MySQL 8.0.13+).
+    return "(UTC_TIMESTAMP())"
+
+@compiles(utc_now, "postgresql")
+def _utc_now_postgresql(element, compiler, **kw):
+    return "(now() AT TIME ZONE 'utc')"
+
 class Customer(Base):
     __tablename__ = "customers"
 
@@ -12,16 +45,57 @@ class Customer(Base):
     age = Column(Integer, nullable=False)
     income = Column(Float, nullable=False)
     activity_score = Column(Integer, nullable=False)
-    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    created_at = Column(DateTime, default=utcnow, server_default=utc_now(), nullable=False)
 
     risk_scores = relationship("RiskScore", backref="customer", cascade="all, delete-orphan")
 
+class RiskExplanation(Base):
+    """One row per distinct explanation text, shared by every score that renders to it."""
+
+    __tablename__ = "risk_explanations"
+
+    id = Column(Integer, primary_key=True)
+    digest = Column(String(64), nullable=False, unique=True)
+    text = Column(Text, nullable=False)
+
 class RiskScore(Base):
     __tablename__ = "risk_scores"
+    __table_args__ = (
+        # Serves per-customer history pages and the latest-score lookup as index seeks.
+        Index("ix_risk_scores_customer_created", "customer_id", "created_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True)
     customer_id = Column(Integer, ForeignKey("customers.id"), nullable=False)
     final_score = Column(Integer, nullable=False)
-    explanation = Column(Text)
-    created_at = Column(DateTime, server_default=func.now(), nullable=False)
+    # Per-row text kept for rows written before explanations were deduplicated.
+    explanation_text = Column("explanation", Text)
+    explanation_id = Column(Integer, ForeignKey("risk_explanations.id"))
+    created_at = Column(DateTime, default=utcnow, server_default=utc_now(), nullable=False)
+
+    explanation_ref = relationship("RiskExplanation", lazy="joined")
+
+    @property
+    def explanation(self):
+        if self.explanation_ref is not None:
+            return self.explanation_ref.text
+        return self.explanation_text
+
+
+class CustomerLatestScore(Base):
+    """Each customer's most recent score, kept in step with risk_scores for portfolio aggregates."""
+
+    __tablename__ = "customer_latest_scores"
+
+    customer_id = Column(Integer, ForeignKey("customers.id"), primary_key=True)
+    final_score = Column(Integer, nullable=False)
+    created_at = Column(DateTime, nullable=False)
+
+class ScoreHistogram(Base):
+    """Number of customers whose latest score is ``final_score``, split over shards to spread write contention."""
+
+    __tablename__ = "risk_score_histogram"
 
+    final_score = Column(Integer, primary_key=True)
+    shard = Column(Integer, primary_key=True, default=0)
+    customers = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,138 @@
+"""Monthly RANGE partitioning of ``risk_scores`` on ``created_at`` (MySQL).
+
+A partitioned table keeps each month's rows and index entries together:
+- inserts only touch the newest partition;
+- date-bounded scans skip old months;
+- a month that retention has emptied can be dropped without a long DELETE.
+
+MySQL requirements:
+- Every unique key, including the primary key, must contain the partitioning
+  column. The primary key therefore becomes ``(id, created_at)``.
+- Partitioned InnoDB tables cannot have foreign keys. ``convert_statements``
+  drops them, and the ORM keeps joining through the declared relationships.
+
+Other dialects (SQLite in tests and local runs) have no partitioning. Every
+helper here is a no-op for them, and retention works the same on the plain
+table.
+"""
+from datetime import date
+from typing import List
+from sqlalchemy import text
+from app.utils.logger import get_logger
+
+TABLE = "risk_scores"
+MAXVALUE_PARTITION = "pmax"
+
+logger = get_logger("app.config.partitions")
+
+
+def _month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def _add_months(day: date, months: int) -> date:
+    month = day.month - 1 + months
+    return date(day.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"p{month:%Y%m}"
+
+
+def _partition_def(month: date) -> str:
+    upper = _add_months(month, 1)
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN (TO_DAYS('{upper:%Y-%m-%d}'))"
+
+
+def partition_clause(first: date, last: date) -> str:
+    """PARTITION BY clause with one partition per month from ``first`` to ``last``, plus a catch-all."""
+    months = []
+    month = _month_start(first)
+    while month <= last:
+        months.append(_partition_def(month))
+        month = _add_months(month, 1)
+    months.append(f"PARTITION {MAXVALUE_PARTITION} VALUES LESS THAN MAXVALUE")
+    return "PARTITION BY RANGE (TO_DAYS(created_at)) (\n  " + ",\n  ".join(months) + "\n)"
+
+
+def _is_mysql(conn) -> bool:
+    return conn.dialect.name == "mysql"
+
+
+def existing_partitions(conn) -> List[str]:
+    if not _is_mysql(conn):
+        return []
+    return list(conn.execute(text(
+        "SELECT PARTITION_NAME FROM information_schema.PARTITIONS "
+        "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table AND PARTITION_NAME IS NOT NULL "
+        "ORDER BY PARTITION_ORDINAL_POSITION"
+    ), {"table": TABLE}).scalars())
+
+
+def convert_statements(conn, today: date | None = None, months_ahead: int = 3) -> List[str]:
+    """DDL turning an unpartitioned ``risk_scores`` into a monthly partitioned table.
+
+    This rebuilds the table, so run it in a maintenance window or through an
+    online schema change tool. Returns [] when there is nothing to do.
+    """
+    if not _is_mysql(conn) or existing_partitions(conn):
+        return []
+    today = today or date.today()
+    oldest = conn.execute(text(f"SELECT MIN(created_at) FROM {TABLE}")).scalar()
+    first = oldest.date() if oldest is not None else today
+    foreign_keys = conn.execute(text(
+        "SELECT CONSTRAINT_NAME FROM information_schema.REFERENTIAL_CONSTRAINTS "
+        "WHERE CONSTRAINT_SCHEMA = DATABASE() AND TABLE_NAME = :table"
+    ), {"table": TABLE}).scalars()
+    statements = [f"ALTER TABLE {TABLE} DROP FOREIGN KEY {name}" for name in foreign_keys]
+    statements.append(f"ALTER TABLE {TABLE} DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at)")
+    statements.append(f"ALTER TABLE {TABLE} {partition_clause(first, _add_months(_month_start(today), months_ahead))}")
+    return statements
+
+
+def ensure_partitions(conn, today: date | None = None, months_ahead: int = 3) -> List[str]:
+    """Split future months out of the catch-all partition so inserts never land in ``pmax``.
+
+    Only acts on a table that is already partitioned. Returns the executed DDL.
+    """
+    names = existing_partitions(conn)
+    if not names:
+        return []
+    today = today or date.today()
+    month = _add_months(_month_start(today), -1)
+    last = _add_months(_month_start(today), months_ahead)
+    missing = []
+    while month <= last:
+        if partition_name(month) not in names:
+            missing.append(month)
+        month = _add_months(month, 1)
+    newest = max((n for n in names if n != MAXVALUE_PARTITION), default=None)
+    # REORGANIZE can only split the top partition, so skip months older than the newest one.
+    missing = [m for m in missing if newest is None or partition_name(m) > newest]
+    if not missing:
+        return []
+    statement = (
+        f"ALTER TABLE {TABLE} REORGANIZE PARTITION {MAXVALUE_PARTITION} INTO (\n  "
+        + ",\n  ".join(_partition_def(m) for m in missing)
+        + f",\n  PARTITION {MAXVALUE_PARTITION} VALUES LESS THAN MAXVALUE\n)"
+    )
+    conn.execute(text(statement))
+    logger.info("Added risk_scores partitions %s", [partition_name(m) for m in missing])
+    return [statement]
+
+
+def drop_empty_partitions(conn, before: date) -> List[str]:
+    """Drop monthly partitions that end on or before ``before`` and hold no rows."""
+    dropped = []
+    for name in existing_partitions(conn):
+        if name == MAXVALUE_PARTITION:
+            continue
+        month = date(int(name[1:5]), int(name[5:7]), 1)
+        if _add_months(month, 1) > before:
+            continue
+        if conn.execute(text(f"SELECT 1 FROM {TABLE} PARTITION ({name}) LIMIT 1")).first() is None:
+            conn.execute(text(f"ALTER TABLE {TABLE} DROP PARTITION {name}"))
+            dropped.append(name)
+    if dropped:
+        logger.info("Dropped empty risk_scores partitions %s", dropped)
+    return dropped
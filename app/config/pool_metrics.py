@@ -0,0 +1,93 @@
+import time
+from typing import Any, Dict
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+
+class PoolStats:
+    """Counters for one named pool; survives pool.recreate() on engine dispose."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.checkouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+        self.timeouts = 0
+        self.connects = 0
+        self.invalidated = 0
+        self.soft_invalidated = 0
+
+    def record_checkout(self, waited: float):
+        self.checkouts += 1
+        self.checkout_wait_total += waited
+        if waited > self.checkout_wait_max:
+            self.checkout_wait_max = waited
+
+    def snapshot(self, pool: Pool | None = None) -> Dict[str, Any]:
+        data: Dict[str, Any] = {
+            "checkouts": self.checkouts,
+            "checkout_wait_avg_ms": (self.checkout_wait_total / self.checkouts * 1000) if self.checkouts else 0.0,
+            "checkout_wait_max_ms": self.checkout_wait_max * 1000,
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "invalidated": self.invalidated,
+            "soft_invalidated": self.soft_invalidated,
+        }
+        if isinstance(pool, QueuePool):
+            data.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow_in_use": max(pool.overflow(), 0),
+                "timeout_s": pool.timeout(),
+            })
+        return data
+
+
+POOL_STATS: Dict[str, PoolStats] = {}
+
+
+def get_pool_stats(name: str) -> PoolStats:
+    stats = POOL_STATS.get(name)
+    if stats is None:
+        stats = POOL_STATS.setdefault(name, PoolStats(name))
+    return stats
+
+
+class _TimedCheckoutMixin:
+    def connect(self):
+        stats = get_pool_stats(self._orig_logging_name or "default")
+        start = time.perf_counter()
+        try:
+            conn = super().connect()
+        except PoolTimeoutError:
+            stats.timeouts += 1
+            raise
+        stats.record_checkout(time.perf_counter() - start)
+        return conn
+
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_pool_events(engine, name: str):
+    """Count new connections and invalidations for the engine's pool."""
+    stats = get_pool_stats(name)
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_conn, record):
+        stats.connects += 1
+
+    @event.listens_for(engine, "invalidate")
+    def _on_invalidate(dbapi_conn, record, exception):
+        stats.invalidated += 1
+
+    @event.listens_for(engine, "soft_invalidate")
+    def _on_soft_invalidate(dbapi_conn, record, exception):
+        stats.soft_invalidated += 1
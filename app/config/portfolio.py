@@ -0,0 +1,181 @@
+"""Incrementally maintained portfolio risk aggregates.
+
+Every transaction that inserts ``risk_scores`` rows also updates two rollups:
+
+- ``customer_latest_scores``: each customer's most recent score.
+- ``risk_score_histogram``: how many customers currently have each integer score.
+
+When a customer is re-scored, their old score's count goes down by one and
+the new score's count goes up by one. Portfolio reads therefore touch one
+histogram row per distinct score and shard, however many customers there
+are. Bands, shares, the mean and percentiles are all derived from those
+counts.
+
+Each score's count is split over ``PORTFOLIO_HISTOGRAM_SHARDS`` rows, and a
+customer always counts in shard ``customer_id % shards``. Concurrent writers
+for different customers therefore rarely update the same row, and every
+shard stays non-negative. Reads sum the shards.
+
+In write-behind mode this runs once per flushed batch. The batch's deltas
+are folded into one upsert per statement, so the extra round trips are paid
+per batch, not per score.
+
+Rows older than the stored latest score (for example, write-behind rows
+replayed after a crash) leave the rollups unchanged. The existing latest rows
+are read ``FOR UPDATE``, so concurrent re-scores of one customer are applied
+one at a time. If two first-ever scores for a customer race, the histogram
+can be off by one. ``python -m app.jobs.rebuild_portfolio`` recomputes both
+tables from ``risk_scores``.
+"""
+import math
+import os
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Sequence, Tuple
+from sqlalchemy import Integer, cast, func, select
+from app.config.models_base import CustomerLatestScore, ScoreHistogram
+
+DEFAULT_BAND_WIDTH = 10
+DEFAULT_PERCENTILES = (50, 90, 95, 99)
+HISTOGRAM_SHARDS = int(os.getenv("PORTFOLIO_HISTOGRAM_SHARDS", "16"))
+
+Latest = Dict[int, Tuple[int, datetime]]
+
+
+def _newest(rows: Iterable[Dict[str, Any]]) -> Latest:
+    latest: Latest = {}
+    for row in rows:
+        current = latest.get(row["customer_id"])
+        if current is None or row["created_at"] >= current[1]:
+            latest[row["customer_id"]] = (row["final_score"], row["created_at"])
+    return latest
+
+
+def _select_existing(customer_ids: List[int]):
+    return (
+        select(CustomerLatestScore.customer_id, CustomerLatestScore.final_score, CustomerLatestScore.created_at)
+        .where(CustomerLatestScore.customer_id.in_(customer_ids))
+        .with_for_update()
+    )
+
+
+def shard_of(customer_id: int) -> int:
+    return customer_id % HISTOGRAM_SHARDS
+
+
+def _plan(latest: Latest, existing) -> Tuple[List[Dict[str, Any]], Dict[Tuple[int, int], int]]:
+    current = {customer_id: (score, created_at) for customer_id, score, created_at in existing}
+    upserts = []
+    deltas: Counter = Counter()
+    for customer_id, (score, created_at) in latest.items():
+        previous = current.get(customer_id)
+        if previous is not None:
+            if created_at < previous[1]:
+                continue
+            deltas[previous[0], shard_of(customer_id)] -= 1
+        deltas[score, shard_of(customer_id)] += 1
+        upserts.append({"customer_id": customer_id, "final_score": score, "created_at": created_at})
+    return upserts, {key: delta for key, delta in deltas.items() if delta}
+
+
+def _upsert(dialect: str, model, keys: List[str], update):
+    """INSERT ... ON DUPLICATE KEY / ON CONFLICT; ``update(excluded)`` maps columns to new values."""
+    if dialect == "mysql":
+        from sqlalchemy.dialects.mysql import insert
+        statement = insert(model)
+        return statement.on_duplicate_key_update(**update(statement.inserted))
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    statement = insert(model)
+    return statement.on_conflict_do_update(index_elements=keys, set_=update(statement.excluded))
+
+
+def _statements(dialect: str, upserts: List[Dict[str, Any]], deltas: Dict[Tuple[int, int], int]):
+    statements = []
+    if upserts:
+        latest = _upsert(dialect, CustomerLatestScore, ["customer_id"], lambda new: {
+            "final_score": new.final_score,
+            "created_at": new.created_at,
+        })
+        statements.append((latest, upserts))
+    if deltas:
+        histogram = _upsert(dialect, ScoreHistogram, ["final_score", "shard"], lambda new: {
+            "customers": ScoreHistogram.customers + new.customers,
+        })
+        statements.append((histogram, [
+            {"final_score": score, "shard": shard, "customers": delta}
+            for (score, shard), delta in sorted(deltas.items())
+        ]))
+    return statements
+
+
+async def apply_scores(db, rows: Sequence[Dict[str, Any]]):
+    """Fold newly inserted score rows into the rollups, in the caller's transaction."""
+    latest = _newest(rows)
+    if not latest:
+        return
+    existing = (await db.execute(_select_existing(list(latest)))).all()
+    upserts, deltas = _plan(latest, existing)
+    for statement, params in _statements(db.sync_session.get_bind().dialect.name, upserts, deltas):
+        await db.execute(statement, params)
+
+
+def apply_scores_sync(db, rows: Sequence[Dict[str, Any]]):
+    latest = _newest(rows)
+    if not latest:
+        return
+    existing = db.execute(_select_existing(list(latest))).all()
+    upserts, deltas = _plan(latest, existing)
+    for statement, params in _statements(db.get_bind().dialect.name, upserts, deltas):
+        db.execute(statement, params)
+
+
+SELECT_HISTOGRAM = (
+    select(ScoreHistogram.final_score, cast(func.sum(ScoreHistogram.customers), Integer))
+    .group_by(ScoreHistogram.final_score)
+    .having(func.sum(ScoreHistogram.customers) > 0)
+    .order_by(ScoreHistogram.final_score)
+)
+
+
+def summarize(
+    histogram: Sequence[Tuple[int, int]],
+    band_width: int = DEFAULT_BAND_WIDTH,
+    percentiles: Sequence[float] = DEFAULT_PERCENTILES,
+) -> Dict[str, Any]:
+    """Portfolio statistics from (score, customers) pairs sorted by score."""
+    total = sum(count for _, count in histogram)
+    if not total:
+        return {
+            "customers": 0, "mean": None, "min": None, "max": None,
+            "percentiles": {f"p{p:g}": None for p in percentiles}, "bands": [],
+        }
+    mean = sum(score * count for score, count in histogram) / total
+    ranks = sorted((max(1, math.ceil(p / 100 * total)), p) for p in percentiles)
+    values: Dict[str, int] = {}
+    cumulative = 0
+    pending = iter(ranks)
+    rank = next(pending, None)
+    for score, count in histogram:
+        cumulative += count
+        while rank is not None and rank[0] <= cumulative:
+            values[f"p{rank[1]:g}"] = score
+            rank = next(pending, None)
+    counts: Counter = Counter()
+    for score, count in histogram:
+        counts[score // band_width * band_width] += count
+    first, last = histogram[0][0] // band_width * band_width, histogram[-1][0] // band_width * band_width
+    bands = [
+        {"lower": lower, "upper": lower + band_width, "customers": counts[lower], "share": counts[lower] / total}
+        for lower in range(first, last + 1, band_width)
+    ]
+    return {
+        "customers": total,
+        "mean": mean,
+        "min": histogram[0][0],
+        "max": histogram[-1][0],
+        "percentiles": {f"p{p:g}": values[f"p{p:g}"] for p in percentiles},
+        "bands": bands,
+    }
@@ -0,0 +1,404 @@
+"""Write-behind persistence for risk scores.
+
+With ``RISK_SCORE_WRITE_MODE=write_behind``, POST /risk/score responds as soon
+as the score is computed. The row goes into a bounded in-process buffer, and a
+background task drains it with batched inserts. A drain starts when
+``flush_rows`` rows are waiting, or every ``flush_interval`` seconds.
+
+When a spool directory is configured, each row is first appended to a local
+spool segment. Segments are deleted once all their rows are committed, and any
+left over are replayed on the next start. An acknowledged score therefore
+survives a crash. A crash between a commit and the segment cleanup replays
+that batch, so delivery is at-least-once.
+
+Workers can share one spool directory. Each buffer names its segments by pid
+and start time, and holds an flock on them until they are deleted, so recovery only picks up
+segments whose owner is gone. A segment is created and locked under a temporary
+name and only then renamed into place, so recovery never sees it unlocked.
+
+A failed batch always goes back to the head of the buffer. Connection-level
+errors are retried as they are. Anything else (an IntegrityError or DataError
+from a bad row, a TypeError from a malformed one) is retried ``max_retries``
+times, and then the batch is halved until the offending row is isolated.
+That row is moved to ``dead-letter.jsonl`` in the spool directory, or logged
+when there is none. Rows behind a poison row are therefore not blocked.
+"""
+import asyncio
+import contextlib
+import json
+import os
+import time
+from collections import deque
+from datetime import datetime
+from typing import IO, Any, Deque, Dict, List, Tuple
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, IntegrityError, SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
+from app.config.explanations import compact_rows
+from app.config.models_base import RiskScore
+from app.config.portfolio import apply_scores
+from app.utils.logger import get_logger
+from app.utils.metrics import WRITE_BEHIND_FLUSH_LATENCY, WRITE_BEHIND_ROWS
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - no locking on Windows; use one process per spool dir
+    fcntl = None
+
+WRITE_MODES = ("sync", "write_behind")
+SPOOL_PREFIX = "scores-"
+SPOOL_SUFFIX = ".jsonl"
+TEMP_SUFFIX = ".tmp"
+DEAD_LETTER_FILE = "dead-letter.jsonl"
+RETRY_DELAY = 1.0
+
+logger = get_logger("app.config.score_buffer")
+
+
+class BufferFull(Exception):
+    """Raised when the buffer stayed full for longer than ``put_timeout``."""
+
+
+def _is_permanent(error: Exception) -> bool:
+    """Errors that retrying the same rows will not fix, as opposed to a lost connection or lock timeout."""
+    return isinstance(error, (IntegrityError, DataError)) or not isinstance(error, SQLAlchemyError)
+
+
+class ScoreWriteBuffer:
+    def __init__(
+        self,
+        session_factory=None,
+        max_rows: int = 10000,
+        flush_rows: int = 500,
+        flush_interval: float = 0.2,
+        put_timeout: float = 0.5,
+        spool_dir: str | None = None,
+        fsync: bool = False,
+        segment_rows: int = 10000,
+        max_retries: int = 3,
+    ):
+        self.session_factory = session_factory
+        self.max_rows = max_rows
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.spool_dir = spool_dir
+        self.fsync = fsync
+        self.segment_rows = segment_rows
+        self.max_retries = max_retries
+        self.flushes = 0
+        self.failures = 0
+        self.dead_lettered = 0
+        self.unrecovered_segments: List[str] = []
+        self._batch_limit = flush_rows
+        self._retries = 0
+        self._rows: Deque[Tuple[int, Dict[str, Any]]] = deque()
+        self._inflight = 0
+        self._pending: Dict[int, int] = {}
+        self._segment = 0
+        self._segment_written = 0
+        self._spool_name = f"{SPOOL_PREFIX}{os.getpid()}-{time.time_ns()}"
+        self._files: Dict[int, IO[str]] = {}
+        self._flush_lock = asyncio.Lock()
+        self._wake: asyncio.Event | None = None
+        self._space: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        if spool_dir:
+            os.makedirs(spool_dir, exist_ok=True)
+        self._open_segment()
+
+    @property
+    def depth(self) -> int:
+        """Rows accepted but not yet committed, including the batch being written."""
+        return len(self._rows) + self._inflight
+
+    def _segment_path(self, seq: int) -> str:
+        return os.path.join(self.spool_dir, f"{self._spool_name}-{seq:06d}{SPOOL_SUFFIX}")
+
+    def _open_segment(self):
+        self._segment += 1
+        self._segment_written = 0
+        self._pending[self._segment] = 0
+        if self.spool_dir:
+            path = self._segment_path(self._segment)
+            spool = open(path + TEMP_SUFFIX, "a", encoding="utf-8")
+            if fcntl is not None:
+                fcntl.flock(spool, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            os.rename(path + TEMP_SUFFIX, path)
+            self._files[self._segment] = spool
+
+    def _remove_segment(self, segment: int):
+        spool = self._files.pop(segment)
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(self._segment_path(segment))
+        spool.close()
+
+    def _spool_write(self, row: Dict[str, Any]) -> int | None:
+        """Append ``row`` to the current segment; with fsync on, returns a duplicate fd to sync."""
+        spool = self._files.get(self._segment)
+        if spool is None:
+            return None
+        spool.write(json.dumps(row, default=datetime.isoformat) + "\n")
+        spool.flush()
+        # A duplicate stays valid if the segment is closed while the sync runs.
+        return os.dup(spool.fileno()) if self.fsync else None
+
+    @staticmethod
+    def _sync(fd: int):
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _release(self, batch: List[Tuple[int, Dict[str, Any]]]):
+        for segment, _ in batch:
+            self._pending[segment] -= 1
+        # Rotate a full segment, or one whose rows are all committed, so finished
+        # segments can be deleted.
+        if self._segment_written and (
+            self._pending[self._segment] == 0 or self._segment_written >= self.segment_rows
+        ):
+            self._open_segment()
+        for segment in [s for s, count in self._pending.items() if count == 0 and s != self._segment]:
+            del self._pending[segment]
+            if segment in self._files:
+                self._remove_segment(segment)
+
+    async def recover(self) -> int:
+        """Insert rows from spool segments left by processes that are gone; returns the row count."""
+        if not self.spool_dir:
+            return 0
+        recovered = 0
+        own = {self._segment_path(segment) for segment in self._files}
+        for name in sorted(os.listdir(self.spool_dir)):
+            path = os.path.join(self.spool_dir, name)
+            if not (name.startswith(SPOOL_PREFIX) and name.endswith(SPOOL_SUFFIX)):
+                continue
+            if path in own:
+                continue
+            try:
+                f = open(path, "r+", encoding="utf-8")
+            except FileNotFoundError:
+                continue  # its owner finished it after the listing
+            with f:
+                if fcntl is not None:
+                    try:
+                        fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    except BlockingIOError:
+                        continue  # owned by a live process
+                    try:
+                        if os.stat(path).st_ino != os.fstat(f.fileno()).st_ino:
+                            continue
+                    except FileNotFoundError:
+                        continue  # committed and removed between the open and the lock
+                try:
+                    rows = [json.loads(line) for line in f if line.strip()]
+                    for row in rows:
+                        row["created_at"] = datetime.fromisoformat(row["created_at"])
+                    for start in range(0, len(rows), self.flush_rows):
+                        await self._insert(rows[start:start + self.flush_rows])
+                except Exception as e:
+                    # Keep the segment for the next start and carry on with the others.
+                    logger.error("Could not replay spooled risk scores from %s, skipping it: %s", path, e)
+                    if path not in self.unrecovered_segments:
+                        self.unrecovered_segments.append(path)
+                    continue
+                with contextlib.suppress(FileNotFoundError):
+                    os.remove(path)
+            recovered += len(rows)
+        if recovered:
+            logger.info("Recovered %d buffered risk scores from %s", recovered, self.spool_dir)
+        return recovered
+
+    async def put(self, row: Dict[str, Any]):
+        """Accept a row for writing; waits up to ``put_timeout`` for space, then raises BufferFull."""
+        if self.depth >= self.max_rows:
+            await self._wait_for_space()
+        fd = self._spool_write(row)
+        self._rows.append((self._segment, row))
+        self._pending[self._segment] += 1
+        self._segment_written += 1
+        if self._wake is not None and len(self._rows) >= self.flush_rows:
+            self._wake.set()
+        if fd is not None:
+            # fsync can take milliseconds; acknowledge only once it is done, off the event loop.
+            await run_in_threadpool(self._sync, fd)
+
+    async def _wait_for_space(self):
+        deadline = time.monotonic() + self.put_timeout
+        while self.depth >= self.max_rows:
+            remaining = deadline - time.monotonic()
+            if self._space is None or remaining <= 0:
+                WRITE_BEHIND_ROWS.inc(result="rejected")
+                raise BufferFull()
+            self._space.clear()
+            try:
+                await asyncio.wait_for(self._space.wait(), remaining)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _insert(self, rows: List[Dict[str, Any]]):
+        async with self.session_factory() as db:
+            await db.execute(insert(RiskScore), await compact_rows(db, rows))
+            await apply_scores(db, rows)
+            await db.commit()
+
+    def _dead_letter(self, row: Dict[str, Any], error: Exception):
+        self.dead_lettered += 1
+        WRITE_BEHIND_ROWS.inc(result="dead_lettered")
+        if not self.spool_dir:
+            logger.error("Dropping risk score that cannot be written (%s): %s", error, row)
+            return
+        with open(os.path.join(self.spool_dir, DEAD_LETTER_FILE), "a", encoding="utf-8") as f:
+            f.write(json.dumps({"row": row, "error": str(error)}, default=datetime.isoformat) + "\n")
+        logger.error("Moved risk score that cannot be written to %s: %s", DEAD_LETTER_FILE, error)
+
+    def _failed(self, batch: List[Tuple[int, Dict[str, Any]]], error: Exception):
+        """Bookkeeping after a failed insert; ``batch`` is already back at the head of the buffer."""
+        self.failures += 1
+        WRITE_BEHIND_ROWS.inc(len(batch), result="retried")
+        if not _is_permanent(error):
+            logger.error("Write-behind flush of %d risk scores failed, will retry: %s", len(batch), error)
+            return
+        self._retries += 1
+        # Once bisecting, a permanent error needs no further retries before splitting again.
+        if self._retries < self.max_retries and self._batch_limit == self.flush_rows:
+            logger.error("Write-behind flush of %d risk scores failed (attempt %d), will retry: %s",
+                         len(batch), self._retries, error)
+            return
+        self._retries = 0
+        if len(batch) > 1:
+            self._batch_limit = max(1, len(batch) // 2)
+            logger.error("Write-behind batch of %d keeps failing, retrying in halves: %s", len(batch), error)
+            return
+        entry = self._rows.popleft()
+        self._dead_letter(entry[1], error)
+        self._release([entry])
+
+    async def flush(self) -> int:
+        """Write up to ``flush_rows`` buffered rows in one insert; returns how many were committed."""
+        async with self._flush_lock:
+            if not self._rows:
+                return 0
+            batch = [self._rows.popleft() for _ in range(min(self._batch_limit, len(self._rows)))]
+            self._inflight = len(batch)
+            start = time.perf_counter()
+            try:
+                await self._insert([row for _, row in batch])
+            except BaseException as e:
+                # Every failure path, cancellation included, puts the rows back first.
+                self._rows.extendleft(reversed(batch))
+                if not isinstance(e, Exception):
+                    raise
+                self._failed(batch, e)
+                return 0
+            finally:
+                self._inflight = 0
+            WRITE_BEHIND_FLUSH_LATENCY.observe(time.perf_counter() - start)
+            WRITE_BEHIND_ROWS.inc(len(batch), result="flushed")
+            self.flushes += 1
+            self._retries = 0
+            self._batch_limit = min(self.flush_rows, self._batch_limit * 2)
+            try:
+                self._release(batch)
+            except OSError as e:
+                # The rows are committed; a stale segment only means a duplicate replay later.
+                logger.error("Could not clean up write-behind spool: %s", e)
+            if self._space is not None:
+                self._space.set()
+            return len(batch)
+
+    async def flush_all(self) -> int:
+        flushed = 0
+        while self._rows:
+            count = await self.flush()
+            if not count:
+                break
+            flushed += count
+        return flushed
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                while self._rows and not self._stopping:
+                    if not await self.flush():
+                        await asyncio.sleep(RETRY_DELAY)
+                        break
+            except Exception:
+                # Never let the flusher die: the buffer would only fill up until requests get 503s.
+                logger.exception("Write-behind flusher error, continuing")
+                await asyncio.sleep(RETRY_DELAY)
+
+    async def start(self, session_factory=None):
+        """Replay the spool, then start the background flusher on the running loop."""
+        if session_factory is not None:
+            self.session_factory = session_factory
+        await self.recover()
+        self._stopping = False
+        self._wake = asyncio.Event()
+        self._space = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write everything still buffered."""
+        self._stopping = True
+        if self._task is not None:
+            self._wake.set()
+            await self._task
+            self._task = None
+        await self.flush_all()
+        if self.depth:
+            logger.error("%d risk scores could not be written at shutdown; they remain in the spool", self.depth)
+        for segment in list(self._files):
+            if self.depth:
+                self._files.pop(segment).close()
+            else:
+                self._remove_segment(segment)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self.depth,
+            "max_rows": self.max_rows,
+            "flushes": self.flushes,
+            "failures": self.failures,
+            "dead_lettered": self.dead_lettered,
+            "unrecovered_segments": len(self.unrecovered_segments),
+            "spool_segments": len(self._pending) if self.spool_dir else 0,
+        }
+
+
+_writer: ScoreWriteBuffer | None = None
+
+
+def write_mode() -> str:
+    mode = os.getenv("RISK_SCORE_WRITE_MODE", "sync").lower()
+    if mode not in WRITE_MODES:
+        raise ValueError(f"Unknown RISK_SCORE_WRITE_MODE '{mode}', expected one of {WRITE_MODES}")
+    return mode
+
+
+def current_score_writer() -> ScoreWriteBuffer | None:
+    """The write-behind buffer, or None when scores are written inline."""
+    global _writer
+    if _writer is None and write_mode() == "write_behind":
+        _writer = ScoreWriteBuffer(
+            max_rows=int(os.getenv("WRITE_BEHIND_MAX_ROWS", "10000")),
+            flush_rows=int(os.getenv("WRITE_BEHIND_FLUSH_ROWS", "500")),
+            flush_interval=float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", "0.2")),
+            put_timeout=float(os.getenv("WRITE_BEHIND_PUT_TIMEOUT", "0.5")),
+            spool_dir=os.getenv("WRITE_BEHIND_SPOOL_DIR") or None,
+            fsync=os.getenv("WRITE_BEHIND_FSYNC", "false").lower() in ("1", "true", "yes"),
+            max_retries=int(os.getenv("WRITE_BEHIND_MAX_RETRIES", "3")),
+        )
+    return _writer
+
+
+async def get_score_writer() -> ScoreWriteBuffer | None:
+    """FastAPI dependency; async so it is called inline instead of through the thread pool."""
+    return current_score_writer()
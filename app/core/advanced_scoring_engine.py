@@ -1,6 +1,11 @@
 import os
 import json
-from typing import Any, Callable, Dict
+import logging
+import numpy as np
+from typing import Any, Dict
+from app.core.bucket_table import BucketTable, compile_buckets
+from app.core.custom_rules import OK, RuleFunc, RuleRunner
+from app.core.score_cache import DEFAULT_CACHE_SIZE, ScoreCache
 from app.utils.logger import get_logger
 
 RISK_CONFIG_DEFAULT = {
@@ -29,15 +34,34 @@ RISK_CONFIG_DEFAULT = {
     },
 }
 
+BUCKET_FEATURES = ("age", "income", "activity_score")
+DEFAULT_CONFIG_PATH = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "config", "risk_config.json")
+)
+
+
+def _copy_result(cached: Dict[str, Any]) -> Dict[str, Any]:
+    """Deep copy of a cached explain() result; its nested dicts only hold scalars."""
+    result = dict(cached)
+    result["scores"] = dict(cached["scores"])
+    result["weights"] = dict(cached["weights"])
+    return result
+
 
 class AdvancedRiskEngine:
-    def __init__(self, config_path: str | None = None):
+    def __init__(
+        self,
+        config_path: str | None = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+        config: Dict[str, Any] | None = None,
+    ):
         self.logger = get_logger("app.core.advanced_engine")
-        self.config_path = config_path or os.path.abspath(
-            os.path.join(os.path.dirname(__file__), "..", "config", "risk_config.json")
-        )
-        self.config = self._load_config(self.config_path)
-        self.custom_rules: Dict[str, Callable[[Dict[str, Any]], float]] = {}
+        self.config_path = config_path or DEFAULT_CONFIG_PATH
+        self.config = config if config is not None else self._load_config(self.config_path)
+        self._tables = compile_buckets(self.config, BUCKET_FEATURES)
+        self.config_version = 0
+        self.cache = ScoreCache(cache_size)
+        self.custom_rules = RuleRunner()
 
     def _load_config(self, path: str) -> Dict[str, Any]:
         try:
@@ -46,38 +70,35 @@ class AdvancedRiskEngine:
                     cfg = json.load(f)
                     return cfg
         except Exception as e:
-            self.logger.error(f"Failed to load config at {path}: {e}")
+            self.logger.error("Failed to load config at %s: %s", path, e)
         return RISK_CONFIG_DEFAULT
 
     def update_config(self, new_config: Dict[str, Any]):
+        tables = compile_buckets(new_config, BUCKET_FEATURES)
         self.config = new_config
+        self._tables = tables
+        self.config_version += 1
+        self.cache.clear()
 
     def _get_weight(self, key: str) -> float:
         return float(self.config.get("weights", {}).get(key, 1.0))
 
     def _score_from_buckets(self, value: float, buckets: Dict[str, int], feature_name: str) -> tuple[int, str]:
-        for label, points in buckets.items():
-            if "-" in label and label[0].isdigit():
-                parts = label.split("-")
-                low = float(parts[0])
-                high = float(parts[1])
-                if low <= float(value) <= high:
-                    self.logger.debug(f"{feature_name}={value} matched {label} → {points}")
-                    return int(points), label
-            elif label.startswith("<"):
-                threshold = float(label[1:])
-                if float(value) < threshold:
-                    self.logger.debug(f"{feature_name}={value} matched {label} → {points}")
-                    return int(points), label
-            elif label.startswith(">"):
-                threshold = float(label[1:])
-                if float(value) > threshold:
-                    self.logger.debug(f"{feature_name}={value} matched {label} → {points}")
-                    return int(points), label
-        last_label = list(buckets.keys())[-1]
-        last_points = buckets[last_label]
-        self.logger.debug(f"{feature_name}={value} defaulted to {last_label} → {last_points}")
-        return int(last_points), last_label
+        table = self._tables.get(feature_name)
+        if table is None or buckets is not self.config.get(feature_name):
+            table = BucketTable(buckets)
+        points, label = table.lookup(value)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("%s=%s matched %s → %s", feature_name, value, label, points)
+        return points, label
+
+    def bucket_signature(self, age: int, income: float, activity_score: int) -> tuple[int, int, int]:
+        tables = self._tables
+        return (
+            tables["age"].index(age),
+            tables["income"].index(income),
+            tables["activity_score"].index(activity_score),
+        )
 
     def score_age(self, age: int) -> tuple[int, str]:
         points, label = self._score_from_buckets(age, self.config["age"], "age")
@@ -102,6 +123,26 @@ class AdvancedRiskEngine:
         )
         return float(final)
 
+    def calculate_batch(
+        self,
+        ages: Any,
+        incomes: Any,
+        activity_scores: Any,
+        return_contributions: bool = False,
+    ) -> np.ndarray | tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Score columnar inputs in one pass; matches calculate() bit for bit."""
+        points = np.column_stack((
+            self._tables["age"].points_array(ages),
+            self._tables["income"].points_array(incomes),
+            self._tables["activity_score"].points_array(activity_scores),
+        )).astype(np.float64)
+        weights = np.array([self._get_weight(f) for f in BUCKET_FEATURES], dtype=np.float64)
+        contrib = points * weights
+        final = contrib[:, 0] + contrib[:, 1] + contrib[:, 2]
+        if return_contributions:
+            return final, {f: contrib[:, i] for i, f in enumerate(BUCKET_FEATURES)}
+        return final
+
     def explain(self, age: int, income: float, activity_score: int) -> Dict[str, Any]:
         age_points, age_label = self.score_age(age)
         income_points, income_label = self.score_income(income)
@@ -138,23 +179,38 @@ class AdvancedRiskEngine:
         age = getattr(inputs, "age", None) if not isinstance(inputs, dict) else inputs.get("age")
         income = getattr(inputs, "income", None) if not isinstance(inputs, dict) else inputs.get("income")
         activity_score = getattr(inputs, "activity_score", None) if not isinstance(inputs, dict) else inputs.get("activity_score")
-        result = self.explain(age, income, activity_score)
-        custom = self.apply_custom_rules({"age": age, "income": income, "activity_score": activity_score})
-        if custom:
-            self.logger.debug(f"Custom rules evaluated: {custom}")
+        key = (self.config_version, *self.bucket_signature(age, income, activity_score))
+        cached = self.cache.get(key)
+        if cached is None:
+            cached = self.explain(age, income, activity_score)
+            self.cache.put(key, cached)
+        if not self.custom_rules:
+            return _copy_result(cached)
+        return self._with_custom_rules(cached, {"age": age, "income": income, "activity_score": activity_score})
+
+    def _with_custom_rules(self, base: Dict[str, Any], inputs: Dict[str, Any]) -> Dict[str, Any]:
+        outcomes = self.custom_rules.evaluate(inputs)
+        final = base["final_score"] + sum(outcome.contribution for outcome in outcomes)
+        sentences = [base["explanation"].rsplit(" Final score = ", 1)[0]]
+        for outcome in outcomes:
+            if outcome.status == OK:
+                sentences.append(f"Custom rule {outcome.name} contributed {outcome.contribution:.2f}.")
+            else:
+                sentences.append(f"Custom rule {outcome.name} not applied ({outcome.status}).")
+        sentences.append(f"Final score = {final:.2f}.")
+        result = _copy_result(base)
+        result["final_score"] = float(final)
+        result["explanation"] = " ".join(sentences)
+        result["custom_rules"] = {
+            outcome.name: {"status": outcome.status, "value": outcome.value, "contribution": outcome.contribution}
+            for outcome in outcomes
+        }
         return result
 
-    def add_custom_rule(self, rule_name: str, func: Callable[[Dict[str, Any]], float]):
-        """Allow plugging in custom scoring functions."""
-        self.custom_rules[rule_name] = func
+    def add_custom_rule(self, rule_name: str, func: RuleFunc, weight: float = 1.0, timeout: float | None = None):
+        """Register a rule; ``weight * func(inputs)`` is added to the final score."""
+        self.custom_rules.register(rule_name, func, weight=weight, timeout=timeout)
 
     def apply_custom_rules(self, data: Dict[str, Any]) -> Dict[str, float]:
-        """Evaluate custom rules if provided."""
-        results: Dict[str, float] = {}
-        for name, func in self.custom_rules.items():
-            try:
-                results[name] = float(func(data))
-            except Exception as e:
-                self.logger.error(f"Custom rule {name} failed: {e}")
-        return results
-
+        """Evaluate custom rules; returns the raw value of each rule that succeeded in time."""
+        return {outcome.name: outcome.value for outcome in self.custom_rules.evaluate(data) if outcome.status == OK}
@@ -0,0 +1,128 @@
+import math
+from bisect import bisect_left
+from typing import Any, Dict, List, Tuple
+import numpy as np
+
+INT_TABLE_MAX_SPAN = 4096
+
+
+def _parse_label(label: str) -> Tuple[str, float, float] | None:
+    if "-" in label and label[0].isdigit():
+        parts = label.split("-")
+        return "range", float(parts[0]), float(parts[1])
+    if label.startswith("<"):
+        return "lt", float(label[1:]), 0.0
+    if label.startswith(">"):
+        return "gt", float(label[1:]), 0.0
+    return None
+
+
+def _first_match(value: float, rules: List[Tuple[str, float, float, int]]) -> int:
+    for kind, a, b, index in rules:
+        if kind == "range":
+            if a <= value <= b:
+                return index
+        elif kind == "lt":
+            if value < a:
+                return index
+        elif value > a:
+            return index
+    return -1
+
+
+class BucketTable:
+    """Pre-parsed bucket labels for one feature, resolved with bisect.
+
+    The breakpoints of every label split the number line into alternating
+    open segments and single points; each of those segments is resolved once
+    at compile time with the same first-match rules as the label strings, so
+    a lookup is a bisect plus a tuple index.
+    """
+
+    __slots__ = (
+        "labels", "points", "breakpoints", "segments", "fallback",
+        "int_low", "int_table", "np_breakpoints", "np_segments", "np_points",
+    )
+
+    def __init__(self, buckets: Dict[str, Any]):
+        self.labels: List[str] = list(buckets.keys())
+        self.points: List[int] = [int(p) for p in buckets.values()]
+        if not self.labels:
+            raise ValueError("Bucket table requires at least one bucket")
+        self.fallback = len(self.labels) - 1
+
+        rules = []
+        cuts = set()
+        for index, label in enumerate(self.labels):
+            parsed = _parse_label(label)
+            if parsed is None:
+                continue
+            kind, a, b = parsed
+            rules.append((kind, a, b, index))
+            cuts.add(a)
+            if kind == "range":
+                cuts.add(b)
+        self.breakpoints: List[float] = sorted(cuts)
+
+        # segments[2 * i] is the open interval left of breakpoints[i],
+        # segments[2 * i + 1] is breakpoints[i] itself.
+        segments: List[int] = []
+        bp = self.breakpoints
+        for i, point in enumerate(bp):
+            left = point - 1.0 if i == 0 else (bp[i - 1] + point) / 2.0
+            segments.append(_first_match(left, rules))
+            segments.append(_first_match(point, rules))
+        tail = bp[-1] + 1.0 if bp else 0.0
+        segments.append(_first_match(tail, rules))
+        self.segments: List[int] = [self.fallback if s < 0 else s for s in segments]
+
+        self.np_breakpoints = np.asarray(self.breakpoints, dtype=np.float64)
+        self.np_segments = np.asarray(self.segments, dtype=np.intp)
+        self.np_points = np.asarray(self.points, dtype=np.int64)
+
+        self.int_low = 0
+        self.int_table: List[int] | None = None
+        if bp and all(float(p).is_integer() for p in bp):
+            low = int(bp[0]) - 1
+            high = int(bp[-1]) + 1
+            if high - low <= INT_TABLE_MAX_SPAN:
+                self.int_low = low
+                self.int_table = [self._bisect(v) for v in range(low, high + 1)]
+
+    def _bisect(self, value: float) -> int:
+        i = bisect_left(self.breakpoints, value)
+        if i < len(self.breakpoints) and self.breakpoints[i] == value:
+            return self.segments[2 * i + 1]
+        return self.segments[2 * i]
+
+    def index(self, value: float) -> int:
+        table = self.int_table
+        if table is not None and type(value) is int:
+            offset = value - self.int_low
+            if 0 <= offset < len(table):
+                return table[offset]
+        value = float(value)
+        if math.isnan(value):
+            return self.fallback
+        return self._bisect(value)
+
+    def lookup(self, value: float) -> Tuple[int, str]:
+        i = self.index(value)
+        return self.points[i], self.labels[i]
+
+    def index_array(self, values: np.ndarray) -> np.ndarray:
+        values = np.asarray(values, dtype=np.float64)
+        bp = self.np_breakpoints
+        if not len(bp):
+            return np.full(values.shape, self.segments[0], dtype=np.intp)
+        i = np.searchsorted(bp, values, side="left")
+        hit = bp[np.minimum(i, len(bp) - 1)] == values
+        idx = self.np_segments[2 * i + hit]
+        return np.where(np.isnan(values), self.fallback, idx)
+
+    def points_array(self, values: np.ndarray) -> np.ndarray:
+        return self.np_points[self.index_array(values)]
+
+
+def compile_buckets(config: Dict[str, Any], features: Tuple[str, ...]) -> Dict[str, BucketTable]:
+    return {name: BucketTable(config[name]) for name in features if name in config}
@@ -0,0 +1,204 @@
+"""Custom scoring rules for AdvancedRiskEngine.
+
+Each rule is a callable ``rule(inputs) -> float`` registered with a weight.
+Its contribution to ``final_score`` is ``weight * value``. All rules for one
+score run concurrently on a bounded thread pool. A rule that raises or misses
+its timeout contributes nothing to that score.
+
+After ``failure_threshold`` consecutive failures or timeouts, a rule's circuit
+opens and the rule is skipped for ``cooldown`` seconds. The next call after
+that is a single trial, and a success closes the circuit again.
+
+A timed-out rule cannot be interrupted, so it keeps a pool thread until it
+returns. Each rule may have at most its fair share of the pool in flight
+(``max_workers // number of rules``, at least one), and is skipped while it is
+at that limit, so a hung rule cannot take the threads of the others. A call
+that is still queued behind other rules when the wait ends is cancelled and
+counted as skipped, not as a timeout of its own rule. One bad rule therefore
+cannot open the circuits of healthy ones.
+
+``evaluate`` blocks while it waits; async callers run it in a thread.
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, NamedTuple
+
+RuleFunc = Callable[[Dict[str, Any]], float]
+
+DEFAULT_RULE_WORKERS = int(os.getenv("RISK_RULE_WORKERS", "4"))
+DEFAULT_RULE_TIMEOUT = float(os.getenv("RISK_RULE_TIMEOUT", "0.05"))
+DEFAULT_FAILURE_THRESHOLD = int(os.getenv("RISK_RULE_FAILURE_THRESHOLD", "5"))
+DEFAULT_COOLDOWN = float(os.getenv("RISK_RULE_COOLDOWN", "30"))
+
+OK, ERROR, TIMEOUT, SKIPPED = "ok", "error", "timeout", "skipped"
+
+
+class RuleOutcome(NamedTuple):
+    name: str
+    status: str
+    value: float
+    contribution: float
+
+
+class CustomRule:
+    def __init__(self, name: str, func: RuleFunc, weight: float, timeout: float):
+        self.name = name
+        self.func = func
+        self.weight = weight
+        self.timeout = timeout
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.skipped = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.running = 0
+
+    def stats(self) -> Dict[str, Any]:
+        completed = self.calls - self.timeouts
+        return {
+            "weight": self.weight,
+            "timeout_s": self.timeout,
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "skipped": self.skipped,
+            "latency_avg_ms": (self.latency_total / completed * 1000) if completed > 0 else 0.0,
+            "latency_max_ms": self.latency_max * 1000,
+            "circuit_open": self.open_until > time.monotonic(),
+        }
+
+
+def _timed(func: RuleFunc, inputs: Dict[str, Any]):
+    start = time.perf_counter()
+    value = float(func(inputs))
+    return value, time.perf_counter() - start
+
+
+class RuleRunner:
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_RULE_WORKERS,
+        default_timeout: float = DEFAULT_RULE_TIMEOUT,
+        failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+        cooldown: float = DEFAULT_COOLDOWN,
+    ):
+        self.max_workers = max_workers
+        self.default_timeout = default_timeout
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.rules: Dict[str, CustomRule] = {}
+        self._lock = threading.Lock()
+        self._pool: ThreadPoolExecutor | None = None
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def register(self, name: str, func: RuleFunc, weight: float = 1.0, timeout: float | None = None):
+        rules = dict(self.rules)
+        rules[name] = CustomRule(name, func, float(weight), self.default_timeout if timeout is None else timeout)
+        self.rules = rules  # swapped whole so evaluate() never sees a dict mid-update
+
+    def unregister(self, name: str):
+        rules = dict(self.rules)
+        rules.pop(name, None)
+        self.rules = rules
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            with self._lock:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="risk-rule")
+        return self._pool
+
+    def _record(self, rule: CustomRule, status: str, elapsed: float = 0.0):
+        with self._lock:
+            rule.calls += 1
+            if status == OK:
+                rule.latency_total += elapsed
+                rule.latency_max = max(rule.latency_max, elapsed)
+                rule.consecutive_failures = 0
+                rule.open_until = 0.0
+                return
+            if status == ERROR:
+                rule.errors += 1
+                rule.latency_total += elapsed
+            else:
+                rule.timeouts += 1
+            rule.consecutive_failures += 1
+            if rule.consecutive_failures >= self.failure_threshold:
+                rule.open_until = time.monotonic() + self.cooldown
+
+    def _admit(self, rule: CustomRule, now: float, share: int) -> bool:
+        with self._lock:
+            if rule.running >= share or (rule.open_until != 0.0 and now < rule.open_until):
+                rule.skipped += 1
+                return False
+            if rule.open_until != 0.0:
+                # Half-open: let one call through; failing it re-opens the circuit.
+                rule.open_until = now + self.cooldown
+            rule.running += 1
+            return True
+
+    def _finished(self, rule: CustomRule):
+        with self._lock:
+            rule.running -= 1
+
+    def _skip(self, rule: CustomRule):
+        with self._lock:
+            rule.skipped += 1
+
+    def evaluate(self, inputs: Dict[str, Any]) -> List[RuleOutcome]:
+        """Run every admitted rule concurrently and wait at most for the slowest rule's timeout."""
+        rules = list(self.rules.values())
+        if not rules:
+            return []
+        now = time.monotonic()
+        share = max(1, self.max_workers // len(rules))
+        pool = self._executor()
+        futures = {}
+        outcomes: Dict[str, RuleOutcome] = {}
+        for rule in rules:
+            if self._admit(rule, now, share):
+                future = pool.submit(_timed, rule.func, inputs)
+                future.add_done_callback(lambda _, rule=rule: self._finished(rule))
+                futures[rule.name] = (rule, future)
+            else:
+                outcomes[rule.name] = RuleOutcome(rule.name, SKIPPED, 0.0, 0.0)
+        if futures:
+            wait([future for _, future in futures.values()], timeout=max(rule.timeout for rule, _ in futures.values()))
+        for name, (rule, future) in futures.items():
+            if future.cancel():
+                # Never started: the pool was busy with other rules' calls.
+                self._skip(rule)
+                outcomes[name] = RuleOutcome(name, SKIPPED, 0.0, 0.0)
+                continue
+            if not future.done():
+                self._record(rule, TIMEOUT)
+                outcomes[name] = RuleOutcome(name, TIMEOUT, 0.0, 0.0)
+                continue
+            try:
+                value, elapsed = future.result()
+            except Exception:
+                self._record(rule, ERROR)
+                outcomes[name] = RuleOutcome(name, ERROR, 0.0, 0.0)
+                continue
+            if elapsed > rule.timeout:
+                self._record(rule, TIMEOUT)
+                outcomes[name] = RuleOutcome(name, TIMEOUT, 0.0, 0.0)
+                continue
+            self._record(rule, OK, elapsed)
+            outcomes[name] = RuleOutcome(name, OK, value, value * rule.weight)
+        return [outcomes[rule.name] for rule in rules]
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: rule.stats() for name, rule in self.rules.items()}
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
@@ -0,0 +1,137 @@
+import json
+import math
+import os
+import threading
+import time
+from typing import Any, Dict
+from app.core.advanced_scoring_engine import BUCKET_FEATURES, DEFAULT_CONFIG_PATH, AdvancedRiskEngine
+from app.core.bucket_table import compile_buckets
+from app.core.scoring_engine import RiskScoringEngine
+from app.utils.logger import get_logger
+
+ENGINE_KINDS = ("basic", "advanced")
+
+
+SAMPLE_CUSTOMER = {"age": 35, "income": 50000.0, "activity_score": 50}
+
+
+def score_sample(engine):
+    """Score ``SAMPLE_CUSTOMER`` through the engine's scoring paths; raises if any of them fails."""
+    engine.calculate(**SAMPLE_CUSTOMER)
+    engine.explain(**SAMPLE_CUSTOMER)
+
+
+def validate_config(config: Dict[str, Any]):
+    """Raise ValueError if ``config`` cannot drive AdvancedRiskEngine."""
+    if not isinstance(config, dict):
+        raise ValueError("risk config must be a JSON object")
+    missing = [name for name in BUCKET_FEATURES if name not in config]
+    if missing:
+        raise ValueError(f"missing buckets for {missing}")
+    weights = config.get("weights")
+    if not isinstance(weights, dict):
+        raise ValueError("weights must be a JSON object")
+    for name in BUCKET_FEATURES:
+        weight = weights.get(name)
+        if isinstance(weight, bool) or not isinstance(weight, (int, float)) or not math.isfinite(weight):
+            raise ValueError(f"weight for '{name}' must be a number, got {weight!r}")
+    compile_buckets(config, BUCKET_FEATURES)
+    score_sample(AdvancedRiskEngine(config=config, cache_size=1))
+
+
+class EngineProvider:
+    """Application-scoped scoring engine with mtime-based config hot reload.
+
+    Reloads build a complete new engine and swap the reference in one
+    assignment, so in-flight requests keep scoring with the engine they
+    already hold and nothing on the request path takes a lock.
+    """
+
+    def __init__(self, kind: str = "basic", config_path: str | None = None, check_interval: float = 5.0):
+        if kind not in ENGINE_KINDS:
+            raise ValueError(f"Unknown risk engine '{kind}', expected one of {ENGINE_KINDS}")
+        self.logger = get_logger("app.core.engine_provider")
+        self.kind = kind
+        self.config_path = config_path or DEFAULT_CONFIG_PATH
+        self.check_interval = check_interval
+        self.reloads = 0
+        self._reload_lock = threading.Lock()
+        self._mtime = self._current_mtime()
+        self._next_check = time.monotonic() + check_interval
+        self._engine = self._build(None)
+
+    def _current_mtime(self) -> float | None:
+        try:
+            return os.stat(self.config_path).st_mtime
+        except OSError:
+            return None
+
+    def _build(self, config: Dict[str, Any] | None):
+        if self.kind == "basic":
+            return RiskScoringEngine()
+        engine = AdvancedRiskEngine(self.config_path, config=config)
+        current = getattr(self, "_engine", None)
+        if current is not None:
+            engine.custom_rules = current.custom_rules
+        return engine
+
+    def get(self):
+        if self.kind == "advanced" and time.monotonic() >= self._next_check:
+            self._maybe_reload()
+        return self._engine
+
+    def _maybe_reload(self):
+        if not self._reload_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_check = time.monotonic() + self.check_interval
+            mtime = self._current_mtime()
+            if mtime is None or mtime == self._mtime:
+                return
+            self.reload()
+            self._mtime = mtime
+        finally:
+            self._reload_lock.release()
+
+    def reload(self) -> bool:
+        """Load and compile the config file, then swap in a fresh engine."""
+        if self.kind != "advanced":
+            return False
+        try:
+            with open(self.config_path, "r", encoding="utf-8") as f:
+                config = json.load(f)
+            validate_config(config)
+            engine = self._build(config)
+            score_sample(engine)
+        except Exception as e:
+            self.logger.error("Keeping current risk config, reload of %s failed: %s", self.config_path, e)
+            return False
+        self._engine = engine
+        self.reloads += 1
+        self.logger.info("Reloaded risk config from %s", self.config_path)
+        return True
+
+
+_provider: EngineProvider | None = None
+_provider_lock = threading.Lock()
+
+
+def get_engine_provider() -> EngineProvider:
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = EngineProvider(
+                    kind=os.getenv("RISK_ENGINE", "basic").lower(),
+                    config_path=os.getenv("RISK_CONFIG_PATH") or None,
+                    check_interval=float(os.getenv("RISK_CONFIG_CHECK_INTERVAL", "5")),
+                )
+    return _provider
+
+
+async def get_scoring_engine():
+    """FastAPI dependency returning the current application-scoped engine.
+
+    Declared async so FastAPI calls it inline instead of through the thread pool.
+    """
+    return get_engine_provider().get()
@@ -0,0 +1,63 @@
+import time
+from typing import Dict, Hashable, Tuple
+
+RATE_WINDOW_SECONDS = 60
+
+
+class ErrorStats:
+    """Per-status error counters plus a rolling per-second rate for 4xx responses."""
+
+    def __init__(self, window: int = RATE_WINDOW_SECONDS):
+        self.window = window
+        self.by_status: Dict[int, int] = {}
+        self._slots = [0] * window
+        self._slot_second = [0] * window
+
+    def record(self, status: int):
+        self.by_status[status] = self.by_status.get(status, 0) + 1
+        if 400 <= status < 500:
+            second = int(time.monotonic())
+            i = second % self.window
+            if self._slot_second[i] != second:
+                self._slot_second[i] = second
+                self._slots[i] = 0
+            self._slots[i] += 1
+
+    def client_error_rate(self) -> float:
+        now = int(time.monotonic())
+        total = sum(
+            count for count, second in zip(self._slots, self._slot_second) if now - second < self.window
+        )
+        return total / self.window
+
+    def snapshot(self) -> Dict[str, object]:
+        return {
+            "by_status": {str(k): v for k, v in sorted(self.by_status.items())},
+            "client_errors_total": sum(v for k, v in self.by_status.items() if 400 <= k < 500),
+            "server_errors_total": sum(v for k, v in self.by_status.items() if k >= 500),
+            "client_error_rate_per_sec": round(self.client_error_rate(), 3),
+        }
+
+
+class LogRateLimiter:
+    """Allows one log line per key per interval and counts what was suppressed."""
+
+    def __init__(self, interval: float = 10.0, max_keys: int = 1024):
+        self.interval = interval
+        self.max_keys = max_keys
+        self._seen: Dict[Hashable, Tuple[float, int]] = {}
+
+    def allow(self, key: Hashable) -> Tuple[bool, int]:
+        """Return (should_log, suppressed_since_last_log)."""
+        now = time.monotonic()
+        entry = self._seen.get(key)
+        if entry is not None and now - entry[0] < self.interval:
+            self._seen[key] = (entry[0], entry[1] + 1)
+            return False, 0
+        if entry is None and len(self._seen) >= self.max_keys:
+            self._seen.clear()
+        self._seen[key] = (now, 0)
+        return True, entry[1] if entry is not None else 0
+
+
+error_stats = ErrorStats()
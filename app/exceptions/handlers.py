@@ -1,33 +1,56 @@
-from fastapi import FastAPI, Request, HTTPException
+from fastapi import FastAPI, Request
+from fastapi.encoders import jsonable_encoder
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
+from starlette.exceptions import HTTPException as StarletteHTTPException
+from app.exceptions.error_stats import LogRateLimiter, error_stats
 from app.utils.logger import get_logger
+from app.utils.metrics import route_template
 
 logger = get_logger("app.exceptions")
 
-async def http_exception_handler(request: Request, exc: HTTPException):
-    logger.exception(f"HTTPException: {exc.detail}")
+# Expected client errors are logged as one compact line, at most once per
+# (status, route template, detail) per interval; tracebacks are kept for 5xx only.
+# Keying on the template makes /customer/1 and /customer/2 count as repeats.
+client_error_limiter = LogRateLimiter(interval=10.0)
+
+def _log_client_error(request: Request, status: int, detail: object):
+    allowed, suppressed = client_error_limiter.allow((status, route_template(request.scope), str(detail)))
+    if allowed:
+        logger.info(
+            "%d %s %s: %s (suppressed %d repeats)", status, request.method, request.url.path, detail, suppressed
+        )
+
+async def http_exception_handler(request: Request, exc: StarletteHTTPException):
+    error_stats.record(exc.status_code)
+    if exc.status_code >= 500:
+        logger.error("HTTPException %d: %s", exc.status_code, exc.detail, exc_info=exc)
+    else:
+        _log_client_error(request, exc.status_code, exc.detail)
     return JSONResponse(
         status_code=exc.status_code,
         content={"status": "error", "detail": exc.detail},
     )
 
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
-    logger.exception("RequestValidationError")
+    error_stats.record(422)
+    errors = exc.errors()
+    _log_client_error(request, 422, f"{len(errors)} validation error(s)")
     return JSONResponse(
         status_code=422,
-        content={"status": "validation_error", "errors": exc.errors()},
+        content={"status": "validation_error", "errors": jsonable_encoder(errors)},
     )
 
 async def generic_exception_handler(request: Request, exc: Exception):
-    logger.exception("Unhandled Exception")
+    error_stats.record(500)
+    logger.error("Unhandled Exception", exc_info=exc)
     return JSONResponse(
         status_code=500,
         content={"status": "error", "detail": "Internal server error"},
     )
 
 def register_exception_handlers(app: FastAPI):
-    app.add_exception_handler(HTTPException, http_exception_handler)
+    # Registered on Starlette's base class so unknown-route 404s are counted too.
+    app.add_exception_handler(StarletteHTTPException, http_exception_handler)
     app.add_exception_handler(RequestValidationError, validation_exception_handler)
     app.add_exception_handler(Exception, generic_exception_handler)
-
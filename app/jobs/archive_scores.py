@@ -0,0 +1,260 @@
+"""Retention for ``risk_scores``: archive old rows to JSONL.gz and restore them.
+
+A score is kept if it is one of the customer's ``keep_latest`` newest scores,
+or if it is newer than ``keep_days``. All other scores are archived.
+
+The job first finds, in one windowed pass, the ``keep_latest``-th newest score
+of every customer who has scores older than ``keep_days``. It then walks old
+rows in id order, ``batch_size`` at a time, and a row is expired if it is
+older than its customer's threshold. Each batch
+is appended to the archive file as its own gzip member and fsynced, and only
+then deleted in a short transaction. A crash can therefore leave a batch in
+the archive that is still in the table, but never the other way round.
+Restoring is idempotent: rows whose id still exists are skipped.
+
+New scores only push older rows further from the top, so thresholds taken at
+the start stay safe and the job can run alongside the write path. At worst a
+row that just became archivable is left for the next run.
+
+Archive lines carry the explanation text, so files stay readable without
+``risk_explanations``. On restore each text is re-linked to the shared row.
+
+On MySQL the ``partitions`` command maintains monthly partitions on
+``created_at``. ``archive`` also drops partitions that are left empty (see
+``app.config.partitions``).
+
+Usage:
+    python -m app.jobs.archive_scores archive --keep-latest 10 --keep-days 365 --archive-dir archive/
+    python -m app.jobs.archive_scores restore archive/risk_scores-20260101T000000.jsonl.gz
+    python -m app.jobs.archive_scores partitions --convert --months-ahead 3
+"""
+import argparse
+import gzip
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from sqlalchemy import delete, func, insert, select, text
+from app.config import partitions
+from app.config.explanations import compact_rows_sync
+from app.config.models_base import RiskExplanation, RiskScore, utcnow
+from app.config.portfolio import apply_scores_sync
+from app.utils.logger import get_logger
+
+DEFAULT_KEEP_LATEST = 10
+DEFAULT_KEEP_DAYS = 365
+DEFAULT_BATCH_SIZE = 2000
+ARCHIVE_PREFIX = "risk_scores-"
+ARCHIVE_SUFFIX = ".jsonl.gz"
+
+logger = get_logger("app.jobs.archive_scores")
+
+
+@dataclass
+class ArchiveProgress:
+    cutoff: Optional[str] = None
+    path: Optional[str] = None
+    scanned: int = 0
+    archived: int = 0
+    batches: int = 0
+    last_id: int = 0
+    dropped_partitions: List[str] = field(default_factory=list)
+    started_at: float = field(default_factory=time.time)
+    finished: bool = False
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        elapsed = time.time() - self.started_at
+        data["rows_per_sec"] = round(self.archived / elapsed, 1) if elapsed > 0 else 0.0
+        return data
+
+
+def _keep_thresholds(db, cutoff: datetime, keep_latest: int) -> Dict[int, Tuple[datetime, int]]:
+    """(created_at, id) of the ``keep_latest``-th newest score of each customer with scores before ``cutoff``.
+
+    Anything older than that is beyond the newest ``keep_latest``. Customers
+    with fewer scores have no entry and keep everything.
+    """
+    with_old = select(RiskScore.customer_id).where(RiskScore.created_at < cutoff).distinct()
+    ranked = select(
+        RiskScore.customer_id,
+        RiskScore.created_at,
+        RiskScore.id,
+        func.row_number().over(
+            partition_by=RiskScore.customer_id,
+            order_by=(RiskScore.created_at.desc(), RiskScore.id.desc()),
+        ).label("position"),
+    ).where(RiskScore.customer_id.in_(with_old)).subquery()
+    rows = db.execute(
+        select(ranked.c.customer_id, ranked.c.created_at, ranked.c.id).where(ranked.c.position == keep_latest)
+    )
+    return {customer_id: (created_at, score_id) for customer_id, created_at, score_id in rows}
+
+
+def _archive_rows(ids: List[int]):
+    return (
+        select(
+            RiskScore.id,
+            RiskScore.customer_id,
+            RiskScore.final_score,
+            func.coalesce(RiskExplanation.text, RiskScore.explanation_text).label("explanation"),
+            RiskScore.created_at,
+        )
+        .outerjoin(RiskExplanation, RiskScore.explanation_id == RiskExplanation.id)
+        .where(RiskScore.id.in_(ids))
+        .order_by(RiskScore.id)
+    )
+
+
+def _append(path: str, rows: List[Dict[str, Any]]):
+    with open(path, "ab") as raw:
+        with gzip.GzipFile(fileobj=raw, mode="ab") as archive:
+            for row in rows:
+                archive.write((json.dumps(row, default=datetime.isoformat) + "\n").encode("utf-8"))
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+def archive_scores(
+    session_factory,
+    archive_dir: str,
+    keep_latest: int = DEFAULT_KEEP_LATEST,
+    keep_days: int = DEFAULT_KEEP_DAYS,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    pause: float = 0.0,
+    now: datetime | None = None,
+) -> ArchiveProgress:
+    """Move expired scores to a new archive file in ``archive_dir``; see the module docstring."""
+    if keep_latest < 1:
+        raise ValueError("keep_latest must be at least 1")
+    now = now or utcnow()
+    cutoff = now - timedelta(days=keep_days)
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{ARCHIVE_PREFIX}{now:%Y%m%dT%H%M%S}{ARCHIVE_SUFFIX}")
+    progress = ArchiveProgress(cutoff=cutoff.isoformat(), path=path)
+    with session_factory() as db:
+        thresholds = _keep_thresholds(db, cutoff, keep_latest)
+        db.commit()
+        while True:
+            candidates = db.execute(
+                select(RiskScore.id, RiskScore.customer_id, RiskScore.created_at)
+                .where(RiskScore.id > progress.last_id, RiskScore.created_at < cutoff)
+                .order_by(RiskScore.id)
+                .limit(batch_size)
+            ).all()
+            if not candidates:
+                break
+            expired = [
+                row.id for row in candidates
+                if row.customer_id in thresholds and (row.created_at, row.id) < thresholds[row.customer_id]
+            ]
+            if expired:
+                rows = [dict(row._mapping) for row in db.execute(_archive_rows(expired))]
+                _append(path, rows)
+                db.execute(delete(RiskScore).where(RiskScore.id.in_(expired)))
+            db.commit()
+            progress.last_id = candidates[-1].id
+            progress.scanned += len(candidates)
+            progress.archived += len(expired)
+            progress.batches += 1
+            logger.info("archived %d of %d scanned scores (last id %d)",
+                        progress.archived, progress.scanned, progress.last_id)
+            if pause:
+                time.sleep(pause)
+        progress.dropped_partitions = partitions.drop_empty_partitions(db.connection(), cutoff.date())
+        db.commit()
+    if not progress.archived:
+        progress.path = None
+    progress.finished = True
+    return progress
+
+
+def iter_archive(path: str) -> Iterator[Dict[str, Any]]:
+    with gzip.open(path, "rt", encoding="utf-8") as archive:
+        for line in archive:
+            if line.strip():
+                row = json.loads(line)
+                row["created_at"] = datetime.fromisoformat(row["created_at"])
+                yield row
+
+
+def restore_scores(session_factory, path: str, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """Insert archived scores back under their original ids; returns the number restored."""
+    restored = 0
+
+    def flush(db, batch):
+        present = set(db.scalars(select(RiskScore.id).where(RiskScore.id.in_([row["id"] for row in batch]))))
+        rows = [row for row in batch if row["id"] not in present]
+        if rows:
+            db.execute(insert(RiskScore), compact_rows_sync(db, rows))
+            apply_scores_sync(db, rows)
+        db.commit()
+        return len(rows)
+
+    with session_factory() as db:
+        batch = []
+        for row in iter_archive(path):
+            batch.append(row)
+            if len(batch) >= batch_size:
+                restored += flush(db, batch)
+                batch = []
+        if batch:
+            restored += flush(db, batch)
+    logger.info("restored %d scores from %s", restored, path)
+    return restored
+
+
+def maintain_partitions(session_factory, convert: bool = False, months_ahead: int = 3) -> List[str]:
+    """Add upcoming monthly partitions; with ``convert``, partition the table first. No-op off MySQL."""
+    with session_factory() as db:
+        conn = db.connection()
+        statements = partitions.convert_statements(conn, months_ahead=months_ahead) if convert else []
+        for statement in statements:
+            logger.info("executing: %s", statement)
+            conn.execute(text(statement))
+        statements += partitions.ensure_partitions(conn, date.today(), months_ahead)
+        db.commit()
+    return statements
+
+
+def main(argv=None):
+    from app.config.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Archive, restore and partition risk scores")
+    commands = parser.add_subparsers(dest="command", required=True)
+    archive = commands.add_parser("archive", help="move expired scores to a JSONL.gz archive")
+    archive.add_argument("--archive-dir", default="archive")
+    archive.add_argument("--keep-latest", type=int, default=DEFAULT_KEEP_LATEST, help="newest scores kept per customer")
+    archive.add_argument("--keep-days", type=int, default=DEFAULT_KEEP_DAYS, help="scores newer than this are always kept")
+    archive.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    archive.add_argument("--pause", type=float, default=0.0, help="seconds to sleep between batches")
+    restore = commands.add_parser("restore", help="insert scores from archive files back into risk_scores")
+    restore.add_argument("paths", nargs="+")
+    restore.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    partition = commands.add_parser("partitions", help="maintain monthly partitions (MySQL only)")
+    partition.add_argument("--convert", action="store_true", help="partition an unpartitioned table (rebuilds it)")
+    partition.add_argument("--months-ahead", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    if args.command == "archive":
+        progress = archive_scores(
+            SessionLocal,
+            args.archive_dir,
+            keep_latest=args.keep_latest,
+            keep_days=args.keep_days,
+            batch_size=args.batch_size,
+            pause=args.pause,
+        )
+        logger.info("archive finished: %s", progress.to_dict())
+    elif args.command == "restore":
+        total = sum(restore_scores(SessionLocal, path, batch_size=args.batch_size) for path in args.paths)
+        logger.info("restore finished: %d scores", total)
+    else:
+        statements = maintain_partitions(SessionLocal, convert=args.convert, months_ahead=args.months_ahead)
+        logger.info("partition maintenance finished: %d statements", len(statements))
+
+
+if __name__ == "__main__":
+    main()
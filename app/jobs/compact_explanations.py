@@ -0,0 +1,58 @@
+"""Move per-row explanation text of existing scores into ``risk_explanations``.
+
+Rows written before explanations were deduplicated keep their text in
+``risk_scores.explanation``. This job walks them in id order, points each row
+at the shared explanation and clears the per-row text, one committed chunk at
+a time, so it can be stopped and re-run safely. On MySQL, run
+``OPTIMIZE TABLE risk_scores`` afterwards to give the space back.
+
+Usage: python -m app.jobs.compact_explanations --chunk-size 5000
+"""
+import argparse
+from sqlalchemy import select, update
+from app.config.explanations import explanation_ids_sync
+from app.config.models_base import RiskScore
+from app.utils.logger import get_logger
+
+DEFAULT_CHUNK_SIZE = 5000
+
+logger = get_logger("app.jobs.compact_explanations")
+
+
+def compact_explanations(session_factory, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+    """Returns the number of rows compacted."""
+    compacted = 0
+    last_id = 0
+    with session_factory() as db:
+        while True:
+            rows = db.execute(
+                select(RiskScore.id, RiskScore.explanation_text)
+                .where(RiskScore.id > last_id, RiskScore.explanation_id.is_(None), RiskScore.explanation_text.isnot(None))
+                .order_by(RiskScore.id)
+                .limit(chunk_size)
+            ).all()
+            if not rows:
+                return compacted
+            ids = explanation_ids_sync(db, [row.explanation_text for row in rows])
+            db.execute(
+                update(RiskScore),
+                [{"id": row.id, "explanation_id": ids[row.explanation_text], "explanation_text": None} for row in rows],
+            )
+            db.commit()
+            last_id = rows[-1].id
+            compacted += len(rows)
+            logger.info("compacted %d score explanations (last id %d)", compacted, last_id)
+
+
+def main(argv=None):
+    from app.config.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Deduplicate stored risk score explanations")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+    total = compact_explanations(SessionLocal, chunk_size=args.chunk_size)
+    logger.info("done: %d rows compacted", total)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+"""Streaming bulk import of customers from NDJSON or CSV.
+
+Input is consumed line by line, validated with the ``CustomerCreate`` rules and
+inserted in batches, one transaction per batch. Optionally every imported
+customer is scored in the same transaction.
+
+CSV goes through a single ``csv.reader``, so quoted fields may contain commas,
+quotes and newlines. Validation and scoring are CPU-bound and run in a worker
+thread, one batch at a time, so the event loop keeps serving other requests.
+
+Usage: python -m app.jobs.import_customers customers.csv --format csv --batch-size 1000 --score
+"""
+import argparse
+import asyncio
+import codecs
+import csv
+import json
+import math
+import time
+from collections import deque
+from typing import Any, AsyncIterable, AsyncIterator, Dict, List, Tuple
+from pydantic import ValidationError
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
+from app.config.explanations import compact_rows
+from app.config.models_base import Customer, RiskScore, utcnow
+from app.config.portfolio import apply_scores
+from app.schemas.customer_schema import CustomerCreate
+from app.utils.logger import get_logger
+
+FORMATS = ("ndjson", "csv")
+DEFAULT_BATCH_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+logger = get_logger("app.jobs.import_customers")
+
+
+class ImportReport:
+    def __init__(self, max_errors: int = MAX_REPORTED_ERRORS):
+        self.max_errors = max_errors
+        self.received = 0
+        self.inserted = 0
+        self.failed = 0
+        self.scored = 0
+        self.errors: List[Dict[str, Any]] = []
+        self.started = time.perf_counter()
+
+    def add_error(self, line: int, error: str):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({"line": line, "error": error})
+
+    def to_dict(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self.started
+        return {
+            "received": self.received,
+            "inserted": self.inserted,
+            "failed": self.failed,
+            "scored": self.scored,
+            "errors": self.errors,
+            "errors_truncated": self.failed > len(self.errors),
+            "elapsed_s": round(elapsed, 3),
+            "rows_per_sec": round(self.inserted / elapsed, 1) if elapsed > 0 else 0.0,
+        }
+
+
+async def iter_text_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream into decoded lines without buffering the whole body."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+class _LineFeed:
+    """Lines pushed in as they arrive, for a ``csv.reader`` to pull from."""
+
+    def __init__(self):
+        self.lines: deque = deque()
+        self.size = 0
+
+    def push(self, line: str):
+        self.lines.append(line)
+        self.size += len(line)
+
+    def clear(self):
+        self.lines.clear()
+        self.size = 0
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> str:
+        if not self.lines:
+            raise StopIteration
+        line = self.lines.popleft()
+        self.size -= len(line)
+        return line
+
+
+def _inside_quotes(line: str, quoted: bool) -> bool:
+    """Whether a CSV record is still inside a quoted field after ``line``, as ``csv`` parses it."""
+    if '"' not in line:
+        return quoted
+    field_start = not quoted
+    i = 0
+    while i < len(line):
+        char = line[i]
+        if quoted:
+            if char == '"':
+                if line[i + 1:i + 2] == '"':
+                    i += 1
+                else:
+                    quoted = False
+        elif char == '"' and field_start:
+            quoted = True
+        field_start = not quoted and char == ","
+        i += 1
+    return quoted
+
+
+async def _iter_csv_records(lines: AsyncIterable[str]) -> AsyncIterator[Tuple[int, Any]]:
+    # The reader is only advanced once a whole record has been pushed, so it
+    # never runs out of input in the middle of a quoted field.
+    feed = _LineFeed()
+    reader = csv.reader(feed)
+    header: List[str] | None = None
+    line_no = start = 0
+    quoted = False
+    async for line in lines:
+        line_no += 1
+        if not quoted:
+            start = line_no
+        feed.push(line if line.endswith("\n") else line + "\n")
+        quoted = _inside_quotes(line, quoted)
+        if quoted:
+            if feed.size > csv.field_size_limit():
+                feed.clear()
+                quoted = False
+                yield start, "unterminated quoted field"
+            continue
+        try:
+            values = next(reader)
+        except csv.Error as e:
+            feed.clear()
+            yield start, f"invalid CSV: {e}"
+            continue
+        if not values or (len(values) == 1 and not values[0].strip()):
+            continue
+        if header is None:
+            header = [v.strip() for v in values]
+            continue
+        if len(values) != len(header):
+            yield start, f"expected {len(header)} columns, got {len(values)}"
+            continue
+        yield start, dict(zip(header, values))
+    if quoted:
+        yield start, "unterminated quoted field"
+
+
+async def iter_records(lines: AsyncIterable[str], fmt: str) -> AsyncIterator[Tuple[int, Any]]:
+    """Yield (line_number, dict) for each record, or (line_number, error string).
+
+    For CSV the line number is the one the record starts on.
+    """
+    if fmt == "csv":
+        async for item in _iter_csv_records(lines):
+            yield item
+        return
+    line_no = 0
+    async for raw in lines:
+        line_no += 1
+        line = raw.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            yield line_no, f"invalid JSON: {e}"
+            continue
+        if not isinstance(record, dict):
+            yield line_no, "expected a JSON object"
+            continue
+        yield line_no, record
+
+
+def _validation_message(exc: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in exc.errors())
+
+
+def _prepare(records: List[Tuple[int, Any]], engine):
+    """Validate a batch and score its valid rows; CPU-bound, so it runs in a worker thread.
+
+    Returns (valid, results, errors), with ``results[i]`` scoring ``valid[i]``.
+    """
+    valid: List[Tuple[int, CustomerCreate]] = []
+    errors: List[Tuple[int, str]] = []
+    for line_no, record in records:
+        if isinstance(record, str):
+            errors.append((line_no, record))
+            continue
+        try:
+            valid.append((line_no, CustomerCreate(**record)))
+        except ValidationError as e:
+            errors.append((line_no, _validation_message(e)))
+    results = [engine.calculate_with_explanation(payload) for _, payload in valid] if engine is not None else []
+    return valid, results, errors
+
+
+MATCH_COLUMNS = ("name", "age", "income", "activity_score")
+
+
+def _same_row(row: Dict[str, Any], stored) -> bool:
+    # income is compared loosely: MySQL FLOAT keeps about 7 significant digits.
+    return (
+        (row["name"], row["age"], row["activity_score"]) == (stored.name, stored.age, stored.activity_score)
+        and math.isclose(row["income"], stored.income, rel_tol=1e-6)
+    )
+
+
+async def _insert_returning_ids(db, rows: List[Dict[str, Any]]) -> List[int]:
+    """Insert ``rows`` with one executemany and return their ids in order."""
+    dialect = db.sync_session.get_bind().dialect
+    if dialect.insert_executemany_returning_sort_by_parameter_order:
+        result = await db.execute(insert(Customer).returning(Customer.id, sort_by_parameter_order=True), rows)
+        return list(result.scalars())
+    # No RETURNING (MySQL): read the batch back by its shared created_at, above
+    # the highest id seen before the insert. Auto-increment ids are handed out
+    # in insert order, so in id order the rows line up with ``rows``. The rows
+    # are checked against what was inserted, and if a concurrent insert got
+    # in between the batch fails instead of scoring the wrong customer.
+    floor = (await db.execute(select(func.max(Customer.id)))).scalar() or 0
+    await db.execute(insert(Customer), rows)
+    found = (await db.execute(
+        select(Customer.id, *(getattr(Customer, c) for c in MATCH_COLUMNS))
+        .where(Customer.id > floor, Customer.created_at == rows[0]["created_at"])
+        .order_by(Customer.id)
+    )).all()
+    if len(found) != len(rows) or not all(_same_row(row, stored) for row, stored in zip(rows, found)):
+        raise LookupError(f"could not match {len(rows)} inserted customers to their ids")
+    return [stored.id for stored in found]
+
+
+async def _flush(db, records: List[Tuple[int, Any]], engine, report: ImportReport, cache):
+    valid, results, errors = await run_in_threadpool(_prepare, records, engine)
+    for line_no, error in errors:
+        report.add_error(line_no, error)
+    if not valid:
+        return
+    created_at = utcnow()
+    rows = [{**payload.dict(), "created_at": created_at} for _, payload in valid]
+    try:
+        if engine is None:
+            await db.execute(insert(Customer), rows)
+        else:
+            ids = await _insert_returning_ids(db, rows)
+            scores = [
+                {
+                    "customer_id": customer_id,
+                    "final_score": round(result["final_score"]),
+                    "explanation": result["explanation"],
+                    "created_at": created_at,
+                }
+                for customer_id, result in zip(ids, results)
+            ]
+            await db.execute(insert(RiskScore), await compact_rows(db, scores))
+            await apply_scores(db, scores)
+        await db.commit()
+    except (SQLAlchemyError, LookupError) as e:
+        await db.rollback()
+        logger.error("Import batch starting at line %d failed: %s", valid[0][0], e)
+        for line_no, _ in valid:
+            report.add_error(line_no, "database error")
+        return
+    report.inserted += len(valid)
+    if engine is not None:
+        report.scored += len(valid)
+        if cache is not None:
+            for customer_id in ids:
+                cache.delete(customer_id)
+
+
+async def import_customers(
+    lines: AsyncIterable[str],
+    db,
+    fmt: str = "ndjson",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    engine=None,
+    cache=None,
+    report: ImportReport | None = None,
+) -> ImportReport:
+    """Validate and insert streamed customer rows; ``engine`` enables inline scoring."""
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown import format '{fmt}', expected one of {FORMATS}")
+    report = report or ImportReport()
+    batch: List[Tuple[int, Any]] = []
+    async for line_no, record in iter_records(lines, fmt):
+        report.received += 1
+        batch.append((line_no, record))
+        if len(batch) >= batch_size:
+            await _flush(db, batch, engine, report, cache)
+            batch = []
+    if batch:
+        await _flush(db, batch, engine, report, cache)
+    return report
+
+
+async def _file_lines(path: str) -> AsyncIterator[str]:
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        for line in f:
+            yield line
+
+
+async def _main(args):
+    from app.config.database import AsyncSessionLocal
+    from app.core.engine_provider import get_engine_provider
+
+    engine = get_engine_provider().get() if args.score else None
+    async with AsyncSessionLocal() as db:
+        report = await import_customers(
+            _file_lines(args.path), db, fmt=args.format, batch_size=args.batch_size, engine=engine
+        )
+    summary = report.to_dict()
+    for err in summary["errors"]:
+        logger.warning("line %d: %s", err["line"], err["error"])
+    logger.info(
+        "import finished: %d inserted, %d failed, %d scored, %.0f rows/sec",
+        summary["inserted"], summary["failed"], summary["scored"], summary["rows_per_sec"],
+    )
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bulk import customers from NDJSON or CSV")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=FORMATS, help="defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--score", action="store_true", help="score each imported customer")
+    args = parser.parse_args(argv)
+    if args.format is None:
+        args.format = "csv" if args.path.lower().endswith(".csv") else "ndjson"
+    summary = asyncio.run(_main(args))
+    return 0 if summary["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,61 @@
+"""Recompute the portfolio rollups from the full ``risk_scores`` history.
+
+``customer_latest_scores`` and ``risk_score_histogram`` are normally kept up
+to date on every score insert (see ``app.config.portfolio``). Run this job
+after creating the tables on an existing database, after restoring a backup,
+or whenever the aggregates look wrong. Both tables are replaced in a single
+transaction, so readers see either the old rollups or the new ones.
+
+Usage: python -m app.jobs.rebuild_portfolio
+"""
+import argparse
+import time
+from sqlalchemy import delete, func, insert, select
+from app.config.models_base import CustomerLatestScore, RiskScore, ScoreHistogram
+from app.config.portfolio import HISTOGRAM_SHARDS
+from app.utils.logger import get_logger
+
+logger = get_logger("app.jobs.rebuild_portfolio")
+
+
+def rebuild_portfolio(session_factory) -> dict:
+    """Returns the number of customers and distinct scores in the rebuilt rollups."""
+    ranked = select(
+        RiskScore.customer_id,
+        RiskScore.final_score,
+        RiskScore.created_at,
+        func.row_number().over(
+            partition_by=RiskScore.customer_id,
+            order_by=(RiskScore.created_at.desc(), RiskScore.id.desc()),
+        ).label("position"),
+    ).subquery()
+    latest = select(ranked.c.customer_id, ranked.c.final_score, ranked.c.created_at).where(ranked.c.position == 1)
+    shard = (CustomerLatestScore.customer_id % HISTOGRAM_SHARDS).label("shard")
+    counts = select(CustomerLatestScore.final_score, shard, func.count()).group_by(CustomerLatestScore.final_score, shard)
+    started = time.perf_counter()
+    with session_factory() as db:
+        db.execute(delete(ScoreHistogram))
+        db.execute(delete(CustomerLatestScore))
+        db.execute(insert(CustomerLatestScore).from_select(["customer_id", "final_score", "created_at"], latest))
+        db.execute(insert(ScoreHistogram).from_select(["final_score", "shard", "customers"], counts))
+        db.commit()
+        result = {
+            "customers": db.scalar(select(func.count()).select_from(CustomerLatestScore)),
+            "scores": db.scalar(select(func.count(func.distinct(ScoreHistogram.final_score)))),
+            "elapsed_s": round(time.perf_counter() - started, 3),
+        }
+    return result
+
+
+def main(argv=None):
+    from app.config.database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Rebuild portfolio risk aggregates from risk_scores")
+    parser.parse_args(argv)
+    result = rebuild_portfolio(SessionLocal)
+    logger.info("portfolio rebuilt: %d customers, %d distinct scores in %.3fs",
+                result["customers"], result["scores"], result["elapsed_s"])
+
+
+if __name__ == "__main__":
+    main()
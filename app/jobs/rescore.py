@@ -0,0 +1,156 @@
+"""Re-score every customer after a risk config change.
+
+Customers are streamed in keyset-paginated chunks on ``Customer.id`` so memory
+stays flat regardless of table size. Each chunk is written with one batched
+insert and committed; the last committed id is checkpointed so an interrupted
+run can resume where it stopped.
+
+Usage: python -m app.jobs.rescore --chunk-size 5000 --checkpoint rescore.ckpt --resume
+"""
+import argparse
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Optional
+from sqlalchemy import func, insert, select
+from app.config.explanations import compact_rows_sync
+from app.config.models_base import Customer, RiskScore, utcnow
+from app.config.portfolio import apply_scores_sync
+from app.utils.logger import get_logger
+
+DEFAULT_CHUNK_SIZE = 2000
+
+logger = get_logger("app.jobs.rescore")
+
+
+@dataclass
+class RescoreProgress:
+    start_after: int = 0
+    last_id: int = 0
+    max_id: int = 0
+    processed: int = 0
+    chunks: int = 0
+    started_at: float = field(default_factory=time.time)
+    finished: bool = False
+    error: Optional[str] = None
+
+    @property
+    def rows_per_sec(self) -> float:
+        elapsed = time.time() - self.started_at
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["rows_per_sec"] = round(self.rows_per_sec, 1)
+        return data
+
+
+def read_checkpoint(path: str) -> int:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return int(json.load(f).get("last_id", 0))
+    except (OSError, ValueError):
+        return 0
+
+
+def write_checkpoint(path: str, last_id: int):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"last_id": last_id, "updated_at": time.time()}, f)
+    os.replace(tmp, path)
+
+
+def iter_customer_chunks(db, start_after: int, chunk_size: int):
+    """Yield lists of (id, age, income, activity_score) rows in id order."""
+    last_id = start_after
+    while True:
+        rows = db.execute(
+            select(Customer.id, Customer.age, Customer.income, Customer.activity_score)
+            .where(Customer.id > last_id)
+            .order_by(Customer.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def run_rescore(
+    session_factory,
+    engine,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    start_after: int = 0,
+    checkpoint_path: str | None = None,
+    progress: RescoreProgress | None = None,
+    on_progress: Callable[[RescoreProgress], None] | None = None,
+) -> RescoreProgress:
+    progress = progress or RescoreProgress()
+    progress.start_after = progress.last_id = start_after
+    with session_factory() as db:
+        progress.max_id = db.execute(select(func.max(Customer.id))).scalar() or 0
+        for rows in iter_customer_chunks(db, start_after, chunk_size):
+            batch = []
+            for row in rows:
+                result = engine.calculate_with_explanation(
+                    {"age": row.age, "income": row.income, "activity_score": row.activity_score}
+                )
+                batch.append({
+                    "customer_id": row.id,
+                    "final_score": round(result["final_score"]),
+                    "explanation": result["explanation"],
+                    "created_at": utcnow(),
+                })
+            db.execute(insert(RiskScore), compact_rows_sync(db, batch))
+            apply_scores_sync(db, batch)
+            db.commit()
+            progress.last_id = rows[-1].id
+            progress.processed += len(rows)
+            progress.chunks += 1
+            if checkpoint_path:
+                write_checkpoint(checkpoint_path, progress.last_id)
+            if on_progress:
+                on_progress(progress)
+    progress.finished = True
+    return progress
+
+
+def log_progress(progress: RescoreProgress):
+    pct = progress.last_id / progress.max_id * 100 if progress.max_id else 100.0
+    logger.info(
+        "rescore: %d customers, last_id=%d (%.1f%% of id range), %.0f rows/sec",
+        progress.processed, progress.last_id, pct, progress.rows_per_sec,
+    )
+
+
+def main(argv=None):
+    from app.config.database import SessionLocal
+    from app.core.engine_provider import get_engine_provider
+
+    parser = argparse.ArgumentParser(description="Re-score all customers with the current risk config")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--start-after", type=int, default=0, help="only score customers with id greater than this")
+    parser.add_argument("--checkpoint", help="file recording the last committed customer id")
+    parser.add_argument("--resume", action="store_true", help="continue after the id stored in --checkpoint")
+    args = parser.parse_args(argv)
+
+    start_after = args.start_after
+    if args.resume:
+        if not args.checkpoint:
+            parser.error("--resume requires --checkpoint")
+        start_after = max(start_after, read_checkpoint(args.checkpoint))
+
+    progress = run_rescore(
+        SessionLocal,
+        get_engine_provider().get(),
+        chunk_size=args.chunk_size,
+        start_after=start_after,
+        checkpoint_path=args.checkpoint,
+        on_progress=log_progress,
+    )
+    logger.info("rescore finished: %s", progress.to_dict())
+
+
+if __name__ == "__main__":
+    main()
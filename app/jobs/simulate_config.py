@@ -0,0 +1,296 @@
+"""What-if simulation of a candidate risk config against the stored customers.
+
+Customers are streamed in keyset-paginated chunks, as in the re-score job.
+Each chunk is scored under both the current and the candidate config with
+``AdvancedRiskEngine.calculate_batch``. Chunks are scored on a process pool
+while the next one is read, and only a few are in flight at a time, so memory
+stays flat. Each chunk returns only small partial aggregates: score
+histograms, band transitions and its largest movers. Nothing is written to
+the database.
+
+Scores are rounded the same way stored ``final_score`` values are. Custom
+rules are not part of the simulation because they can depend on state
+outside the config.
+
+Usage: python -m app.jobs.simulate_config candidate.json --workers 8 --top 50
+"""
+import argparse
+import heapq
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+import numpy as np
+from sqlalchemy import func, select
+from app.config.models_base import Customer
+from app.config.portfolio import DEFAULT_BAND_WIDTH, summarize
+from app.core.advanced_scoring_engine import AdvancedRiskEngine
+from app.jobs.rescore import iter_customer_chunks
+from app.utils.logger import get_logger
+
+DEFAULT_CHUNK_SIZE = 20000
+DEFAULT_TOP_MOVERS = 20
+
+logger = get_logger("app.jobs.simulate_config")
+
+
+class ChunkScorer:
+    """Scores one chunk under both configs and reduces it to mergeable partials."""
+
+    def __init__(self, current: Dict[str, Any], candidate: Dict[str, Any], band_width: int, top: int):
+        self.current = AdvancedRiskEngine(config=current)
+        self.candidate = AdvancedRiskEngine(config=candidate)
+        self.band_width = band_width
+        self.top = top
+
+    def score(self, ids, ages, incomes, activity_scores) -> Dict[str, Any]:
+        before = np.rint(self.current.calculate_batch(ages, incomes, activity_scores)).astype(np.int64)
+        after = np.rint(self.candidate.calculate_batch(ages, incomes, activity_scores)).astype(np.int64)
+        delta = after - before
+        moved = np.flatnonzero(before // self.band_width != after // self.band_width)
+        transitions = Counter(zip(
+            (before[moved] // self.band_width * self.band_width).tolist(),
+            (after[moved] // self.band_width * self.band_width).tolist(),
+        ))
+        magnitude = np.abs(delta)
+        top = min(self.top, int(np.count_nonzero(magnitude)))
+        movers = []
+        if top:
+            picked = np.argpartition(magnitude, -top)[-top:]
+            movers = [
+                (int(magnitude[i]), int(ids[i]), int(before[i]), int(after[i]))
+                for i in picked
+            ]
+        return {
+            "customers": len(ids),
+            "changed": int(np.count_nonzero(delta)),
+            "delta_sum": int(delta.sum()),
+            "abs_delta_sum": int(magnitude.sum()),
+            "before": Counter(dict(zip(*(a.tolist() for a in np.unique(before, return_counts=True))))),
+            "after": Counter(dict(zip(*(a.tolist() for a in np.unique(after, return_counts=True))))),
+            "transitions": transitions,
+            "movers": movers,
+        }
+
+
+_worker_scorer: ChunkScorer | None = None
+
+
+def _init_worker(current, candidate, band_width, top):
+    global _worker_scorer
+    _worker_scorer = ChunkScorer(current, candidate, band_width, top)
+
+
+def _score_in_worker(ids, ages, incomes, activity_scores):
+    return _worker_scorer.score(ids, ages, incomes, activity_scores)
+
+
+@dataclass
+class SimulationProgress:
+    processed: int = 0
+    chunks: int = 0
+    last_id: int = 0
+    max_id: int = 0
+    started_at: float = field(default_factory=time.time)
+    finished: bool = False
+    error: Optional[str] = None
+    report: Optional[Dict[str, Any]] = None
+
+    @property
+    def rows_per_sec(self) -> float:
+        elapsed = time.time() - self.started_at
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["rows_per_sec"] = round(self.rows_per_sec, 1)
+        return data
+
+
+class SimulationTotals:
+    def __init__(self, band_width: int, top: int):
+        self.band_width = band_width
+        self.top = top
+        self.customers = 0
+        self.changed = 0
+        self.delta_sum = 0
+        self.abs_delta_sum = 0
+        self.before: Counter = Counter()
+        self.after: Counter = Counter()
+        self.transitions: Counter = Counter()
+        self.movers: List[tuple] = []
+
+    def merge(self, partial: Dict[str, Any]):
+        self.customers += partial["customers"]
+        self.changed += partial["changed"]
+        self.delta_sum += partial["delta_sum"]
+        self.abs_delta_sum += partial["abs_delta_sum"]
+        self.before.update(partial["before"])
+        self.after.update(partial["after"])
+        self.transitions.update(partial["transitions"])
+        self.movers = heapq.nlargest(self.top, self.movers + partial["movers"])
+
+    def report(self) -> Dict[str, Any]:
+        width = self.band_width
+        current = summarize(sorted(self.before.items()), width)
+        candidate = summarize(sorted(self.after.items()), width)
+        before_bands = {band["lower"]: band["customers"] for band in current["bands"]}
+        after_bands = {band["lower"]: band["customers"] for band in candidate["bands"]}
+        band_deltas = [
+            {
+                "lower": lower,
+                "upper": lower + width,
+                "current": before_bands.get(lower, 0),
+                "candidate": after_bands.get(lower, 0),
+                "delta": after_bands.get(lower, 0) - before_bands.get(lower, 0),
+            }
+            for lower in sorted(set(before_bands) | set(after_bands))
+        ]
+        return {
+            "customers": self.customers,
+            "changed": self.changed,
+            "band_changes": sum(self.transitions.values()),
+            "band_width": width,
+            "mean_delta": self.delta_sum / self.customers if self.customers else None,
+            "mean_abs_delta": self.abs_delta_sum / self.customers if self.customers else None,
+            "current": current,
+            "candidate": candidate,
+            "band_deltas": band_deltas,
+            "band_transitions": [
+                {"from": source, "to": target, "customers": count}
+                for (source, target), count in sorted(self.transitions.items(), key=lambda item: (-item[1], item[0]))
+            ],
+            "top_movers": [
+                {"customer_id": customer_id, "current": before, "candidate": after, "delta": after - before}
+                for _, customer_id, before, after in self.movers
+            ],
+        }
+
+
+def _columns(rows):
+    ids, ages, incomes, activity_scores = zip(*rows)
+    return (
+        np.array(ids, dtype=np.int64),
+        np.array(ages, dtype=np.int64),
+        np.array(incomes, dtype=np.float64),
+        np.array(activity_scores, dtype=np.int64),
+    )
+
+
+def run_simulation(
+    session_factory,
+    candidate: Dict[str, Any],
+    current: Dict[str, Any] | None = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: int | None = None,
+    band_width: int = DEFAULT_BAND_WIDTH,
+    top: int = DEFAULT_TOP_MOVERS,
+    progress: SimulationProgress | None = None,
+    on_progress: Callable[[SimulationProgress], None] | None = None,
+) -> SimulationProgress:
+    """Score every customer under ``current`` and ``candidate``; the result is in ``progress.report``."""
+    if current is None:
+        current = AdvancedRiskEngine(os.getenv("RISK_CONFIG_PATH") or None).config
+    workers = workers or os.cpu_count() or 1
+    progress = progress or SimulationProgress()
+    totals = SimulationTotals(band_width, top)
+
+    def collect(partial):
+        totals.merge(partial)
+        progress.processed += partial["customers"]
+        progress.chunks += 1
+        if on_progress:
+            on_progress(progress)
+
+    with session_factory() as db:
+        progress.max_id = db.execute(select(func.max(Customer.id))).scalar() or 0
+        chunks = iter_customer_chunks(db, 0, chunk_size)
+        if workers == 1:
+            scorer = ChunkScorer(current, candidate, band_width, top)
+            for rows in chunks:
+                progress.last_id = rows[-1].id
+                collect(scorer.score(*_columns(rows)))
+        else:
+            # spawn: the caller may be a threaded server process, where fork is unsafe.
+            context = multiprocessing.get_context("spawn")
+            with ProcessPoolExecutor(
+                workers, mp_context=context, initializer=_init_worker,
+                initargs=(current, candidate, band_width, top),
+            ) as pool:
+                pending = set()
+                for rows in chunks:
+                    progress.last_id = rows[-1].id
+                    pending.add(pool.submit(_score_in_worker, *_columns(rows)))
+                    if len(pending) >= workers * 2:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            collect(future.result())
+                for future in pending:
+                    collect(future.result())
+    progress.report = totals.report()
+    progress.finished = True
+    return progress
+
+
+def log_progress(progress: SimulationProgress):
+    pct = progress.last_id / progress.max_id * 100 if progress.max_id else 100.0
+    logger.info(
+        "simulation: %d customers, last_id=%d (%.1f%% of id range), %.0f rows/sec",
+        progress.processed, progress.last_id, pct, progress.rows_per_sec,
+    )
+
+
+def main(argv=None):
+    from app.config.database import SessionLocal
+    from app.core.engine_provider import validate_config
+
+    parser = argparse.ArgumentParser(description="Compare a candidate risk config against the current one")
+    parser.add_argument("candidate", help="path to the candidate risk_config.json")
+    parser.add_argument("--current", help="config to compare against; defaults to RISK_CONFIG_PATH or the bundled config")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, help="scoring processes; defaults to the CPU count")
+    parser.add_argument("--band-width", type=int, default=DEFAULT_BAND_WIDTH)
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP_MOVERS, help="number of largest movers to report")
+    parser.add_argument("--output", help="write the report here instead of stdout")
+    args = parser.parse_args(argv)
+
+    configs = []
+    for path in (args.candidate, args.current):
+        if path is None:
+            configs.append(None)
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            config = json.load(f)
+        try:
+            validate_config(config)
+        except (TypeError, ValueError) as e:
+            parser.error(f"{path}: {e}")
+        configs.append(config)
+
+    progress = run_simulation(
+        SessionLocal,
+        configs[0],
+        current=configs[1],
+        chunk_size=args.chunk_size,
+        workers=args.workers,
+        band_width=args.band_width,
+        top=args.top,
+        on_progress=log_progress,
+    )
+    report = json.dumps(progress.report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    else:
+        sys.stdout.write(report + "\n")
+    logger.info("simulation finished: %d customers, %d changed, %d changed band",
+                progress.report["customers"], progress.report["changed"], progress.report["band_changes"])
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,50 @@
+from app.utils import startup
+from app.config import env  # noqa: F401  loads .env before the modules below read their settings
+import time
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from app.exceptions.handlers import register_exception_handlers
-from app.utils.logger import get_logger
+from fastapi.responses import PlainTextResponse
+from app.config.customer_cache import current_customer_cache
+from app.config.database import dispose_engines, get_async_session_factory, init_database, pool_status
+from app.config.score_buffer import current_score_writer
+from app.core.engine_provider import get_engine_provider
+from app.exceptions.error_stats import error_stats
+from app.exceptions.handlers import client_error_limiter, register_exception_handlers
+from app.utils.logger import dropped_records, get_logger, should_log_success
+from app.utils.metrics import (
+    REQUEST_DB_QUERIES,
+    REQUEST_LATENCY,
+    begin_request,
+    register_gauge_source,
+    render_metrics,
+    route_template,
+)
 from app.routes.customer_routes import router as customer_router
 from app.routes.risk_routes import router as risk_router
+from app.routes.admin_routes import router as admin_router
+
+startup.mark("imports")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    startup.mark("server")
+    app.state.engine_provider = get_engine_provider()
+    startup.mark("scoring_engine")
+    init_database()
+    startup.mark("database")
+    writer = current_score_writer()
+    if writer is not None:
+        await writer.start(get_async_session_factory())
+        startup.mark("score_writer")
+    timings = startup.report()
+    log.info("Startup finished in %.1fms %s", timings["total_ms"], timings["phases_ms"])
+    yield
+    if writer is not None:
+        await writer.stop()
+    await dispose_engines()
 
 def create_app():
-    app = FastAPI()
+    app = FastAPI(lifespan=lifespan)
     register_exception_handlers(app)
     return app
 
@@ -15,14 +54,132 @@ app = create_app()
 def health():
     return {"status": "ok"}
 
+@app.get("/health/startup")
+def health_startup():
+    return startup.report()
+
+@app.get("/health/pool")
+def health_pool():
+    return pool_status()
+
+@app.get("/health/errors")
+def health_errors():
+    return error_stats.snapshot()
+
+@app.get("/health/cache")
+def health_cache():
+    return {
+        "customer": current_customer_cache().stats(),
+        "score": _score_cache_stats(),
+    }
+
+@app.get("/health/rules")
+def health_rules():
+    rules = getattr(get_engine_provider().get(), "custom_rules", None)
+    return rules.stats() if rules is not None else {}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+def _score_cache_stats():
+    # Only the advanced engine caches results.
+    cache = getattr(get_engine_provider().get(), "cache", None)
+    return cache.stats() if cache is not None else None
+
+def _runtime_gauges():
+    cache = _score_cache_stats()
+    if cache is not None:
+        yield "risk_score_cache_entries", "gauge", "Entries in the engine score cache", {(): cache["size"]}
+        yield "risk_score_cache_events_total", "counter", "Engine score cache lookups by result", {
+            (("result", "hit"),): cache["hits"],
+            (("result", "miss"),): cache["misses"],
+            (("result", "eviction"),): cache["evictions"],
+        }
+    rules = getattr(get_engine_provider().get(), "custom_rules", None)
+    if rules:
+        rule_stats = rules.stats()
+        outcomes = {}
+        for name, stats in rule_stats.items():
+            outcomes[(("result", "ok"), ("rule", name))] = stats["calls"] - stats["errors"] - stats["timeouts"]
+            outcomes[(("result", "error"), ("rule", name))] = stats["errors"]
+            outcomes[(("result", "timeout"), ("rule", name))] = stats["timeouts"]
+            outcomes[(("result", "skipped"), ("rule", name))] = stats["skipped"]
+        yield "risk_custom_rule_calls_total", "counter", "Custom rule evaluations by outcome", outcomes
+        yield "risk_custom_rule_latency_avg_ms", "gauge", "Mean custom rule latency", {
+            (("rule", name),): stats["latency_avg_ms"] for name, stats in rule_stats.items()
+        }
+        yield "risk_custom_rule_latency_max_ms", "gauge", "Max custom rule latency", {
+            (("rule", name),): stats["latency_max_ms"] for name, stats in rule_stats.items()
+        }
+        yield "risk_custom_rule_circuit_open", "gauge", "1 while a rule's circuit breaker is open", {
+            (("rule", name),): int(stats["circuit_open"]) for name, stats in rule_stats.items()
+        }
+    customers = current_customer_cache().stats()
+    yield "customer_cache_entries", "gauge", "Entries in the customer cache", {(): customers["size"]}
+    yield "customer_cache_events_total", "counter", "Customer cache lookups by result", {
+        (("result", "hit"),): customers["hits"],
+        (("result", "miss"),): customers["misses"],
+        (("result", "eviction"),): customers["evictions"],
+    }
+    for name, snap in pool_status().items():
+        if name == "config":
+            continue
+        labels = (("pool", name),)
+        yield "db_pool_checked_out", "gauge", "Connections currently checked out", {labels: snap.get("checked_out", 0)}
+        yield "db_pool_overflow_in_use", "gauge", "Overflow connections in use", {labels: snap.get("overflow_in_use", 0)}
+        yield "db_pool_checkouts_total", "counter", "Pool checkouts", {labels: snap["checkouts"]}
+        yield "db_pool_timeouts_total", "counter", "Pool checkout timeouts", {labels: snap["timeouts"]}
+        yield "db_pool_invalidated_total", "counter", "Invalidated connections", {labels: snap["invalidated"]}
+    writer = current_score_writer()
+    if writer is not None:
+        buffered = writer.stats()
+        yield "risk_score_write_behind_depth", "gauge", "Risk scores accepted but not yet committed", {(): buffered["depth"]}
+        yield "risk_score_write_behind_spool_segments", "gauge", "Open write-behind spool segments", {
+            (): buffered["spool_segments"]
+        }
+    errors = error_stats.snapshot()
+    yield "http_errors_total", "counter", "Error responses by status", {
+        (("status", status),): count for status, count in errors["by_status"].items()
+    }
+    yield "http_client_error_rate", "gauge", "4xx responses per second over the last minute", {
+        (): errors["client_error_rate_per_sec"]
+    }
+    yield "log_records_dropped_total", "counter", "Log records dropped because the queue was full", {
+        (): dropped_records()
+    }
+
+register_gauge_source(_runtime_gauges)
+
 app.include_router(customer_router, prefix="/customer")
 app.include_router(risk_router, prefix="/risk")
+app.include_router(admin_router, prefix="/admin")
 
 log = get_logger("app.main")
 
+startup.mark("app")
+
 @app.middleware("http")
 async def log_requests(request, call_next):
-    log.info(f"Request: {request.method} {request.url}")
+    ctx = begin_request()
+    start = ctx.started
     response = await call_next(request)
-    log.info(f"Response Status: {response.status_code}")
+    status = response.status_code
+    elapsed = time.perf_counter() - start
+    path_template = route_template(request.scope)
+    REQUEST_LATENCY.observe(elapsed, method=request.method, route=path_template)
+    REQUEST_DB_QUERIES.observe(ctx.db_queries, method=request.method, route=path_template)
+    if status >= 500:
+        log_line = True
+    elif status >= 400:
+        # The exception handler already logged the detail; the access line shares its limiter.
+        log_line, _ = client_error_limiter.allow(("access", status, request.method, path_template))
+    else:
+        log_line = should_log_success()
+    if log_line:
+        latency_ms = round(elapsed * 1000, 3)
+        log.info(
+            "%s %s %d %.3fms", request.method, request.url.path, status, latency_ms,
+            extra={"method": request.method, "path": request.url.path, "status": status, "latency_ms": latency_ms},
+        )
     return response
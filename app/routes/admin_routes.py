@@ -0,0 +1,127 @@
+import hmac
+import os
+import threading
+from fastapi import APIRouter, BackgroundTasks, Depends, Header, HTTPException
+from app.config.database import get_session_factory
+from app.core.advanced_scoring_engine import AdvancedRiskEngine
+from app.core.engine_provider import get_engine_provider, get_scoring_engine, validate_config
+from app.jobs.rescore import RescoreProgress, log_progress, read_checkpoint, run_rescore
+from app.jobs import simulate_config
+from app.schemas.admin_schema import RescoreRequest, SimulationRequest
+from app.utils.logger import get_logger
+
+def require_admin_token(x_admin_token: str | None = Header(None)):
+    """Admin routes need ADMIN_API_TOKEN in the X-Admin-Token header, and are disabled while it is unset."""
+    expected = os.getenv("ADMIN_API_TOKEN")
+    if not expected:
+        raise HTTPException(status_code=403, detail="Admin API is disabled")
+    if x_admin_token is None or not hmac.compare_digest(x_admin_token.encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token")
+
+router = APIRouter(dependencies=[Depends(require_admin_token)])
+logger = get_logger("app.routes.admin")
+
+RESCORE_CHECKPOINT_PATH = os.getenv("RESCORE_CHECKPOINT_PATH")
+
+# Each lock is taken and released by the job itself, so a background task that
+# never runs (e.g. the client went away first) cannot leave it held. The
+# handlers only check it to answer 409 early.
+_rescore_lock = threading.Lock()
+_rescore_progress: RescoreProgress | None = None
+
+_simulation_lock = threading.Lock()
+_simulation_progress: simulate_config.SimulationProgress | None = None
+
+def _run_rescore_job(session_factory, engine, payload: RescoreRequest, start_after: int, progress: RescoreProgress):
+    global _rescore_progress
+    if not _rescore_lock.acquire(blocking=False):
+        logger.warning("Rescore job already running, request starting after id %d ignored", start_after)
+        return
+    try:
+        _rescore_progress = progress
+        run_rescore(
+            session_factory,
+            engine,
+            chunk_size=payload.chunk_size,
+            start_after=start_after,
+            checkpoint_path=RESCORE_CHECKPOINT_PATH,
+            progress=progress,
+            on_progress=log_progress,
+        )
+    except Exception as e:
+        progress.error = str(e)
+        logger.exception("Rescore job failed")
+    finally:
+        _rescore_lock.release()
+
+@router.post("/rescore", status_code=202)
+def start_rescore(
+    payload: RescoreRequest,
+    background_tasks: BackgroundTasks,
+    session_factory=Depends(get_session_factory),
+    engine=Depends(get_scoring_engine),
+):
+    if _rescore_lock.locked():
+        raise HTTPException(status_code=409, detail="Rescore job already running")
+    start_after = payload.start_after
+    if payload.resume:
+        if RESCORE_CHECKPOINT_PATH:
+            start_after = max(start_after, read_checkpoint(RESCORE_CHECKPOINT_PATH))
+        elif _rescore_progress is not None:
+            start_after = max(start_after, _rescore_progress.last_id)
+    progress = RescoreProgress(start_after=start_after, last_id=start_after)
+    background_tasks.add_task(_run_rescore_job, session_factory, engine, payload, start_after, progress)
+    return progress.to_dict()
+
+@router.get("/rescore")
+def rescore_status():
+    if _rescore_progress is None:
+        raise HTTPException(status_code=404, detail="No rescore job has run")
+    return _rescore_progress.to_dict()
+
+def _run_simulation_job(session_factory, current, payload: SimulationRequest, progress):
+    global _simulation_progress
+    if not _simulation_lock.acquire(blocking=False):
+        logger.warning("Config simulation already running, request ignored")
+        return
+    try:
+        _simulation_progress = progress
+        simulate_config.run_simulation(
+            session_factory,
+            payload.config,
+            current=current,
+            chunk_size=payload.chunk_size,
+            workers=payload.workers,
+            band_width=payload.band_width,
+            top=payload.top,
+            progress=progress,
+            on_progress=simulate_config.log_progress,
+        )
+    except Exception as e:
+        progress.error = str(e)
+        logger.exception("Config simulation failed")
+    finally:
+        _simulation_lock.release()
+
+@router.post("/simulate", status_code=202)
+def start_simulation(
+    payload: SimulationRequest,
+    background_tasks: BackgroundTasks,
+    session_factory=Depends(get_session_factory),
+):
+    try:
+        validate_config(payload.config)
+    except (TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid candidate config: {e}")
+    if _simulation_lock.locked():
+        raise HTTPException(status_code=409, detail="Config simulation already running")
+    current = AdvancedRiskEngine(get_engine_provider().config_path).config
+    progress = simulate_config.SimulationProgress()
+    background_tasks.add_task(_run_simulation_job, session_factory, current, payload, progress)
+    return progress.to_dict()
+
+@router.get("/simulate")
+def simulation_status():
+    if _simulation_progress is None:
+        raise HTTPException(status_code=404, detail="No config simulation has run")
+    return _simulation_progress.to_dict()
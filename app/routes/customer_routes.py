@@ -1,14 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
-from app.config.database import get_db
+from app.config.customer_cache import customer_to_dict, get_customer_cache
+from app.config.database import get_async_db
 from app.config.models_base import Customer
-from app.schemas.customer_schema import CustomerCreate, CustomerResponse
+from app.core.engine_provider import get_scoring_engine
+from app.jobs.import_customers import DEFAULT_BATCH_SIZE, FORMATS, import_customers, iter_text_lines
+from app.schemas.customer_schema import CustomerCreate, CustomerImportReport, CustomerResponse
+from app.utils.responses import OrjsonResponse
 
 router = APIRouter()
 
 @router.post("/add", response_model=CustomerResponse)
-def add_customer(payload: CustomerCreate, db: Session = Depends(get_db)):
+async def add_customer(
+    payload: CustomerCreate,
+    db: AsyncSession = Depends(get_async_db),
+    cache=Depends(get_customer_cache),
+):
     try:
         customer = Customer(
             name=payload.name,
@@ -17,20 +25,47 @@ def add_customer(payload: CustomerCreate, db: Session = Depends(get_db)):
             activity_score=payload.activity_score,
         )
         db.add(customer)
-        db.commit()
-        db.refresh(customer)
+        await db.commit()
+        cache.delete(customer.id)
         return customer
     except SQLAlchemyError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail="Internal server error")
 
+@router.post("/import", response_model=CustomerImportReport)
+async def import_customer_file(
+    request: Request,
+    format: str | None = Query(None, description="ndjson or csv; defaults from Content-Type"),
+    batch_size: int = Query(DEFAULT_BATCH_SIZE, ge=1, le=10000),
+    score: bool = Query(False, description="score each imported customer in the same transaction"),
+    db: AsyncSession = Depends(get_async_db),
+    cache=Depends(get_customer_cache),
+    engine=Depends(get_scoring_engine),
+):
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+    if fmt not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of {', '.join(FORMATS)}")
+    report = await import_customers(
+        iter_text_lines(request.stream()),
+        db,
+        fmt=fmt,
+        batch_size=batch_size,
+        engine=engine if score else None,
+        cache=cache,
+    )
+    return report.to_dict()
+
 @router.get("/{id}", response_model=CustomerResponse)
-def get_customer(id: int, db: Session = Depends(get_db)):
+async def get_customer(id: int, db: AsyncSession = Depends(get_async_db), cache=Depends(get_customer_cache)):
+    cached = cache.get(id)
+    if cached is not None:
+        return OrjsonResponse(cached)
     try:
-        customer = db.query(Customer).filter(Customer.id == id).first()
+        customer = await db.get(Customer, id)
         if not customer:
             raise HTTPException(status_code=404, detail="Customer not found")
-        return customer
+        data = customer_to_dict(customer)
+        cache.set(id, data)
+        return OrjsonResponse(data)
     except SQLAlchemyError:
         raise HTTPException(status_code=500, detail="Internal server error")
-
@@ -1,39 +1,216 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import and_, func, insert, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
-from app.config.database import get_db
-from app.config.models_base import Customer, RiskScore
-from app.core.scoring_engine import RiskScoringEngine
-from app.schemas.risk_schema import RiskScoreCreate, RiskScoreResponse
+from starlette.concurrency import run_in_threadpool
+from app.config.customer_cache import customer_to_dict, get_customer_cache
+from app.config.database import get_async_db
+from app.config.explanations import compact_rows, explanation_ids
+from app.config.models_base import Customer, RiskExplanation, RiskScore, utcnow
+from app.config.portfolio import DEFAULT_BAND_WIDTH, DEFAULT_PERCENTILES, SELECT_HISTOGRAM, apply_scores, summarize
+from app.config.score_buffer import BufferFull, get_score_writer
+from app.core.engine_provider import get_scoring_engine
+from app.utils.metrics import ENGINE_CALLS, score_stage_timer
+from app.utils.responses import OrjsonResponse
+from app.schemas.risk_schema import (
+    PortfolioAggregates,
+    RiskScoreBatchCreate,
+    RiskScoreBatchItem,
+    RiskScoreBatchResponse,
+    RiskScoreCreate,
+    RiskScoreResponse,
+)
 
 router = APIRouter()
 
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+def _score_all(engine, items):
+    return [engine.calculate_with_explanation(item) for item in items]
+
+async def _score(engine, items):
+    """Score ``items``, in a worker thread when custom rules are registered.
+
+    Rules block while they wait on their timeouts. Without them scoring takes
+    microseconds and stays inline.
+    """
+    if getattr(engine, "custom_rules", None):
+        return await run_in_threadpool(_score_all, engine, items)
+    return _score_all(engine, items)
+
 @router.post("/score", response_model=RiskScoreResponse)
-def score(payload: RiskScoreCreate, db: Session = Depends(get_db)):
+async def score(
+    payload: RiskScoreCreate,
+    db: AsyncSession = Depends(get_async_db),
+    engine=Depends(get_scoring_engine),
+    cache=Depends(get_customer_cache),
+    writer=Depends(get_score_writer),
+):
+    timer = score_stage_timer()
+    timer.mark("validation")
     try:
-        customer = db.query(Customer).filter(Customer.id == payload.customer_id).first()
-        if not customer:
-            raise HTTPException(status_code=404, detail="Customer not found")
-        result = RiskScoringEngine().calculate_with_explanation(payload)
-        risk = RiskScore(
-            customer_id=payload.customer_id,
-            final_score=result["final_score"],
-            explanation=result["explanation"],
+        if cache.get(payload.customer_id) is None:
+            customer = await db.get(Customer, payload.customer_id)
+            if not customer:
+                raise HTTPException(status_code=404, detail="Customer not found")
+            cache.set(payload.customer_id, customer_to_dict(customer))
+        timer.mark("customer_lookup")
+        result = (await _score(engine, [payload]))[0]
+        ENGINE_CALLS.inc(endpoint="score")
+        timer.mark("engine")
+        if writer is not None:
+            row = {
+                "customer_id": payload.customer_id,
+                "final_score": round(result["final_score"]),
+                "explanation": result["explanation"],
+                "created_at": utcnow(),
+            }
+            try:
+                await writer.put(row)
+            except BufferFull:
+                raise HTTPException(status_code=503, detail="Score write buffer is full, retry later")
+            timer.mark("enqueue")
+            return {"id": None, **row}
+        row = {
+            "customer_id": payload.customer_id,
+            "final_score": round(result["final_score"]),
+            "created_at": utcnow(),
+        }
+        explanation_id = (await explanation_ids(db, [result["explanation"]]))[result["explanation"]]
+        inserted = await db.execute(insert(RiskScore).values(**row, explanation_id=explanation_id))
+        await apply_scores(db, [row])
+        await db.commit()
+        timer.mark("insert_commit")
+        return {"id": inserted.inserted_primary_key[0], "explanation": result["explanation"], **row}
+    except SQLAlchemyError:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.post("/score/batch", response_model=RiskScoreBatchResponse)
+async def score_batch(
+    payload: RiskScoreBatchCreate,
+    db: AsyncSession = Depends(get_async_db),
+    engine=Depends(get_scoring_engine),
+):
+    try:
+        requested = {item.customer_id for item in payload.items}
+        known = set(await db.scalars(select(Customer.id).where(Customer.id.in_(requested))))
+        scored = iter(await _score(engine, [item for item in payload.items if item.customer_id in known]))
+        results = []
+        rows = []
+        for index, item in enumerate(payload.items):
+            if item.customer_id not in known:
+                results.append(RiskScoreBatchItem(
+                    index=index, customer_id=item.customer_id, status="error", detail="Customer not found"
+                ))
+                continue
+            result = next(scored)
+            ENGINE_CALLS.inc(endpoint="score_batch")
+            final_score = round(result["final_score"])
+            rows.append({
+                "customer_id": item.customer_id,
+                "final_score": final_score,
+                "explanation": result["explanation"],
+                "created_at": utcnow(),
+            })
+            results.append(RiskScoreBatchItem(
+                index=index,
+                customer_id=item.customer_id,
+                status="ok",
+                final_score=final_score,
+                explanation=result["explanation"],
+            ))
+        if rows:
+            await db.execute(insert(RiskScore), await compact_rows(db, rows))
+            await apply_scores(db, rows)
+            await db.commit()
+        return RiskScoreBatchResponse(succeeded=len(rows), failed=len(results) - len(rows), results=results)
+    except SQLAlchemyError:
+        await db.rollback()
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+@router.get("/portfolio", response_model=PortfolioAggregates)
+async def portfolio(
+    band_width: int = Query(DEFAULT_BAND_WIDTH, ge=1, le=1000),
+    percentile: List[float] = Query(list(DEFAULT_PERCENTILES), description="repeat for several percentiles"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if any(p <= 0 or p > 100 for p in percentile):
+        raise HTTPException(status_code=400, detail="percentile must be in (0, 100]")
+    try:
+        histogram = (await db.execute(SELECT_HISTOGRAM)).all()
+    except SQLAlchemyError:
+        raise HTTPException(status_code=500, detail="Internal server error")
+    return OrjsonResponse(summarize(histogram, band_width, percentile))
+
+# Read paths select these columns and build response dicts directly (no ORM
+# entities, no per-row model validation); the keys match RiskScoreResponse.
+SCORE_FIELDS = ("id", "customer_id", "final_score", "explanation", "created_at")
+
+SELECT_SCORES = select(
+    RiskScore.id,
+    RiskScore.customer_id,
+    RiskScore.final_score,
+    func.coalesce(RiskExplanation.text, RiskScore.explanation_text),
+    RiskScore.created_at,
+).outerjoin(RiskExplanation, RiskScore.explanation_id == RiskExplanation.id)
+
+def _newest_first(query):
+    return query.order_by(RiskScore.created_at.desc(), RiskScore.id.desc())
+
+def _keyset(cursor_id: int, older: bool):
+    # Compare against the cursor row's stored created_at so the cursor stays a plain score id.
+    cursor_created = select(RiskScore.created_at).where(RiskScore.id == cursor_id).scalar_subquery()
+    if older:
+        return or_(
+            RiskScore.created_at < cursor_created,
+            and_(RiskScore.created_at == cursor_created, RiskScore.id < cursor_id),
         )
-        db.add(risk)
-        db.commit()
-        db.refresh(risk)
-        return risk
+    return or_(
+        RiskScore.created_at > cursor_created,
+        and_(RiskScore.created_at == cursor_created, RiskScore.id > cursor_id),
+    )
+
+@router.get("/{customer_id}/latest", response_model=RiskScoreResponse)
+async def latest_score(customer_id: int, db: AsyncSession = Depends(get_async_db)):
+    try:
+        query = _newest_first(SELECT_SCORES.where(RiskScore.customer_id == customer_id)).limit(1)
+        row = (await db.execute(query)).first()
+        if not row:
+            raise HTTPException(status_code=404, detail="No risk scores for customer")
+        return OrjsonResponse(dict(zip(SCORE_FIELDS, row)))
     except SQLAlchemyError:
-        db.rollback()
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @router.get("/{customer_id}", response_model=List[RiskScoreResponse])
-def list_scores(customer_id: int, db: Session = Depends(get_db)):
+async def list_scores(
+    customer_id: int,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    before: Optional[int] = Query(None, description="return scores older than this score id"),
+    after: Optional[int] = Query(None, description="return scores newer than this score id"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if before is not None and after is not None:
+        raise HTTPException(status_code=400, detail="Use either before or after, not both")
     try:
-        scores = db.query(RiskScore).filter(RiskScore.customer_id == customer_id).all()
-        return scores
+        query = SELECT_SCORES.where(RiskScore.customer_id == customer_id)
+        if after is not None:
+            query = query.where(_keyset(after, older=False)).order_by(RiskScore.created_at, RiskScore.id)
+        else:
+            if before is not None:
+                query = query.where(_keyset(before, older=True))
+            query = _newest_first(query)
+        rows = (await db.execute(query.limit(limit))).all()
+        cursor = after if after is not None else before
+        # A deleted or archived cursor row makes every keyset comparison false,
+        # so only an empty page needs the check that tells it from the real end.
+        if not rows and cursor is not None and not await db.scalar(select(RiskScore.id).where(RiskScore.id == cursor)):
+            raise HTTPException(status_code=400, detail=f"Unknown cursor: score {cursor} does not exist")
+        if after is not None:
+            rows.reverse()
+        headers = {"X-Next-Cursor": str(rows[-1][0])} if len(rows) == limit else None
+        return OrjsonResponse([dict(zip(SCORE_FIELDS, row)) for row in rows], headers=headers)
     except SQLAlchemyError:
         raise HTTPException(status_code=500, detail="Internal server error")
-
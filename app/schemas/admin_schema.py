@@ -0,0 +1,50 @@
+from typing import Any, Dict, Optional
+from pydantic import BaseModel, validator
+
+class RescoreRequest(BaseModel):
+    chunk_size: int = 2000
+    start_after: int = 0
+    resume: bool = False
+
+    @validator("chunk_size")
+    def chunk_size_range(cls, v):
+        if v < 1 or v > 50000:
+            raise ValueError("chunk_size must be between 1 and 50000")
+        return v
+
+    @validator("start_after")
+    def start_after_non_negative(cls, v):
+        if v < 0:
+            raise ValueError("start_after must be greater than or equal to 0")
+        return v
+
+class SimulationRequest(BaseModel):
+    config: Dict[str, Any]
+    chunk_size: int = 20000
+    workers: Optional[int] = None
+    band_width: int = 10
+    top: int = 20
+
+    @validator("chunk_size")
+    def chunk_size_range(cls, v):
+        if v < 1 or v > 200000:
+            raise ValueError("chunk_size must be between 1 and 200000")
+        return v
+
+    @validator("workers")
+    def workers_positive(cls, v):
+        if v is not None and v < 1:
+            raise ValueError("workers must be at least 1")
+        return v
+
+    @validator("band_width")
+    def band_width_positive(cls, v):
+        if v < 1:
+            raise ValueError("band_width must be at least 1")
+        return v
+
+    @validator("top")
+    def top_range(cls, v):
+        if v < 0 or v > 1000:
+            raise ValueError("top must be between 0 and 1000")
+        return v
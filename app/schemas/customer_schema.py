@@ -1,4 +1,5 @@
 from datetime import datetime
+from typing import List
 from pydantic import BaseModel, validator
 
 class CustomerCreate(BaseModel):
@@ -45,3 +46,17 @@ class CustomerResponse(BaseModel):
     class Config:
         orm_mode = True
 
+
+class CustomerImportError(BaseModel):
+    line: int
+    error: str
+
+class CustomerImportReport(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    scored: int
+    errors: List[CustomerImportError]
+    errors_truncated: bool
+    elapsed_s: float
+    rows_per_sec: float
@@ -1,6 +1,9 @@
 from datetime import datetime
+from typing import Dict, List, Optional
 from pydantic import BaseModel, validator
 
+MAX_BATCH_SIZE = 5000
+
 class RiskScoreCreate(BaseModel):
     customer_id: int
     income: float
@@ -35,7 +38,8 @@ class RiskScoreCreate(BaseModel):
         orm_mode = True
 
 class RiskScoreResponse(BaseModel):
-    id: int
+    # None when the row is still in the write-behind buffer.
+    id: Optional[int] = None
     customer_id: int
     final_score: int
     explanation: str
@@ -44,3 +48,41 @@ class RiskScoreResponse(BaseModel):
     class Config:
         orm_mode = True
 
+
+class RiskScoreBatchCreate(BaseModel):
+    items: List[RiskScoreCreate]
+
+    @validator("items")
+    def items_size(cls, v):
+        if not v:
+            raise ValueError("items must not be empty")
+        if len(v) > MAX_BATCH_SIZE:
+            raise ValueError(f"items must contain at most {MAX_BATCH_SIZE} entries")
+        return v
+
+class RiskScoreBatchItem(BaseModel):
+    index: int
+    customer_id: int
+    status: str
+    final_score: Optional[int] = None
+    explanation: Optional[str] = None
+    detail: Optional[str] = None
+
+class RiskScoreBatchResponse(BaseModel):
+    succeeded: int
+    failed: int
+    results: List[RiskScoreBatchItem]
+
+class PortfolioBand(BaseModel):
+    lower: int
+    upper: int
+    customers: int
+    share: float
+
+class PortfolioAggregates(BaseModel):
+    customers: int
+    mean: Optional[float] = None
+    min: Optional[int] = None
+    max: Optional[int] = None
+    percentiles: Dict[str, Optional[int]]
+    bands: List[PortfolioBand]
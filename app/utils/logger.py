@@ -1,16 +1,121 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import random
 import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_FORMAT = "[%(asctime)s] [%(levelname)s] %(name)s: %(message)s"
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_STYLE = os.getenv("LOG_FORMAT", "text").lower()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_REQUEST_SAMPLE_RATE = float(os.getenv("LOG_REQUEST_SAMPLE_RATE", "1.0"))
+
+# Fields passed through ``extra=`` that the JSON formatter copies into the record.
+STRUCTURED_FIELDS = ("method", "path", "status", "latency_ms", "client")
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key in STRUCTURED_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                data[key] = value
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hands records to the listener thread untouched and drops them when the queue is full.
+
+    Message formatting happens on the listener thread, so the caller only pays
+    for building the LogRecord.
+    """
+
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def build_formatter(style: str = LOG_STYLE) -> logging.Formatter:
+    return JsonFormatter() if style == "json" else logging.Formatter(LOG_FORMAT)
+
+
+_queue_handler: NonBlockingQueueHandler | None = None
+_listener: QueueListener | None = None
+_setup_lock = threading.Lock()
+
+
+def _shared_queue_handler() -> NonBlockingQueueHandler:
+    global _queue_handler, _listener
+    if _queue_handler is None:
+        with _setup_lock:
+            if _queue_handler is None:
+                log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+                stream = logging.StreamHandler(sys.stdout)
+                stream.setFormatter(build_formatter())
+                _listener = QueueListener(log_queue, stream, respect_handler_level=True)
+                _listener.start()
+                atexit.register(stop_logging)
+                _queue_handler = NonBlockingQueueHandler(log_queue)
+    return _queue_handler
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def _restart_after_fork():
+    # The listener thread does not survive fork(); give the child its own queue and thread.
+    global _listener
+    if _queue_handler is None or _listener is None:
+        return
+    log_queue: queue.Queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    handlers = _listener.handlers
+    _queue_handler.queue = log_queue
+    _queue_handler.dropped = 0
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+
+
+os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def dropped_records() -> int:
+    return _queue_handler.dropped if _queue_handler is not None else 0
+
+
+def should_log_success(sample_rate: float = LOG_REQUEST_SAMPLE_RATE) -> bool:
+    return sample_rate >= 1.0 or (sample_rate > 0.0 and random.random() < sample_rate)
 
-LOG_FORMAT = "[%(asctime)s] [%(levelname)s] %(message)s | %(pathname)s:%(lineno)d"
 
 def get_logger(name: str) -> logging.Logger:
     logger = logging.getLogger(name)
     if not logger.handlers:
-        handler = logging.StreamHandler(sys.stdout)
-        formatter = logging.Formatter(LOG_FORMAT)
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        logger.setLevel(logging.INFO)
+        logger.addHandler(_shared_queue_handler())
+        logger.setLevel(LOG_LEVEL)
         logger.propagate = False
     return logger
-
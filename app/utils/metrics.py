@@ -0,0 +1,174 @@
+"""In-process metrics rendered in the Prometheus text exposition format.
+
+Updates are plain integer/float increments on per-series lists. They run on
+the event loop thread (or under the GIL from worker threads), so there are no
+locks on the request path; a concurrent scrape may see a series mid-update,
+which Prometheus tolerates.
+"""
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Tuple
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = buckets
+        self._series: Dict[Labels, List[float]] = {}
+
+    def observe(self, value: float, **labels: str):
+        key = tuple(sorted(labels.items()))
+        series = self._series.get(key)
+        if series is None:
+            # [bucket counts..., +Inf count, sum]
+            series = self._series.setdefault(key, [0] * (len(self.buckets) + 1) + [0.0])
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for key, series in list(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                yield f"{self.name}_bucket{_labels(key, le=_fmt(bound))} {cumulative}"
+            cumulative += series[len(self.buckets)]
+            yield f'{self.name}_bucket{_labels(key, le="+Inf")} {cumulative}'
+            yield f"{self.name}_sum{_labels(key)} {_fmt(series[-1])}"
+            yield f"{self.name}_count{_labels(key)} {cumulative}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._series: Dict[Labels, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str):
+        key = tuple(sorted(labels.items()))
+        self._series[key] = self._series.get(key, 0) + amount
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for key, value in list(self._series.items()):
+            yield f"{self.name}{_labels(key)} {_fmt(value)}"
+
+
+def _fmt(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _labels(key: Labels, **extra: str) -> str:
+    items = list(key) + list(extra.items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+
+REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Request latency by route")
+REQUEST_DB_QUERIES = Histogram("http_request_db_queries", "DB statements executed per request", COUNT_BUCKETS)
+SCORE_STAGE_LATENCY = Histogram("risk_score_stage_seconds", "Time spent in each stage of POST /risk/score")
+ENGINE_CALLS = Counter("risk_engine_calls_total", "Scoring engine invocations")
+WRITE_BEHIND_FLUSH_LATENCY = Histogram("risk_score_flush_seconds", "Write-behind batch insert latency")
+WRITE_BEHIND_ROWS = Counter("risk_score_write_behind_rows_total", "Write-behind rows by outcome")
+
+REGISTRY: List[Histogram | Counter] = [
+    REQUEST_LATENCY,
+    REQUEST_DB_QUERIES,
+    SCORE_STAGE_LATENCY,
+    ENGINE_CALLS,
+    WRITE_BEHIND_FLUSH_LATENCY,
+    WRITE_BEHIND_ROWS,
+]
+
+# Snapshot sources (cache, pool, error stats) read at scrape time;
+# each yields (name, "gauge" | "counter", help, {labels: value}).
+GaugeSource = Callable[[], Iterable[Tuple[str, str, str, Dict[Labels, float]]]]
+GAUGE_SOURCES: List[GaugeSource] = []
+
+
+class RequestContext:
+    __slots__ = ("started", "db_queries")
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+
+
+_request_ctx: ContextVar[RequestContext | None] = ContextVar("request_metrics", default=None)
+
+
+def begin_request() -> RequestContext:
+    ctx = RequestContext()
+    _request_ctx.set(ctx)
+    return ctx
+
+
+def current_request() -> RequestContext | None:
+    return _request_ctx.get()
+
+
+class StageTimer:
+    """Records the time since the previous mark under each stage name."""
+
+    __slots__ = ("histogram", "last")
+
+    def __init__(self, histogram: Histogram, since: float | None = None):
+        self.histogram = histogram
+        self.last = since if since is not None else time.perf_counter()
+
+    def mark(self, stage: str):
+        now = time.perf_counter()
+        self.histogram.observe(now - self.last, stage=stage)
+        self.last = now
+
+
+def score_stage_timer() -> StageTimer:
+    """Start timing /risk/score; the first mark covers parsing and validation since the request began."""
+    ctx = current_request()
+    return StageTimer(SCORE_STAGE_LATENCY, ctx.started if ctx is not None else None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_db_query(conn, cursor, statement, parameters, context, executemany):
+    ctx = _request_ctx.get()
+    if ctx is not None:
+        ctx.db_queries += 1
+
+
+def route_template(scope) -> str:
+    """Templated path of the matched route, e.g. /risk/{customer_id}."""
+    effective = scope.get("fastapi", {}).get("effective_route_context")
+    if effective is not None:
+        return effective.path
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+def register_gauge_source(source: GaugeSource):
+    GAUGE_SOURCES.append(source)
+
+
+def render_metrics() -> str:
+    lines: List[str] = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    for source in GAUGE_SOURCES:
+        for name, kind, help_text, series in source():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in series.items():
+                lines.append(f"{name}{_labels(key)} {_fmt(value)}")
+    lines.append("")
+    return "\n".join(lines)
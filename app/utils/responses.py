@@ -0,0 +1,14 @@
+import orjson
+from starlette.responses import JSONResponse
+
+
+class OrjsonResponse(JSONResponse):
+    """JSON response encoded with orjson.
+
+    Routes return it with plain dicts/lists they built themselves, which skips
+    FastAPI's response-model validation and the stdlib encoder. Naive datetimes
+    are rendered without an offset, as the Pydantic path does.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
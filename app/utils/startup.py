@@ -0,0 +1,100 @@
+"""Startup timing: phase marks recorded while a worker boots, plus an import breakdown.
+
+``app.main`` imports this module first and marks each phase (module imports,
+app construction, lifespan warm-up). ``python -m app.utils.startup`` runs a
+fresh interpreter with ``-X importtime`` and reports where import time goes,
+grouped by top-level package.
+
+Usage: python -m app.utils.startup --module app.main --top 15
+"""
+import time
+from typing import Dict, List, Tuple
+
+_started = time.perf_counter()
+_last = _started
+_phases: List[Tuple[str, float]] = []
+
+
+def mark(phase: str) -> float:
+    """Record the time since the previous mark under ``phase``; returns it in seconds."""
+    global _last
+    now = time.perf_counter()
+    elapsed = now - _last
+    _phases.append((phase, elapsed))
+    _last = now
+    return elapsed
+
+
+def report() -> Dict[str, object]:
+    return {
+        "phases_ms": {name: round(elapsed * 1000, 3) for name, elapsed in _phases},
+        "total_ms": round((_last - _started) * 1000, 3),
+    }
+
+
+def parse_importtime(output: str) -> List[Tuple[str, int, int]]:
+    """Parse ``-X importtime`` stderr into (module, self_us, cumulative_us) rows."""
+    rows = []
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        rows.append((parts[2].strip(), int(parts[0]), int(parts[1])))
+    return rows
+
+
+def import_breakdown(module: str = "app.main", top: int = 15) -> Dict[str, object]:
+    """Import ``module`` in a fresh interpreter and summarize where the time went."""
+    import os
+    import subprocess
+    import sys
+
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        cwd=os.getcwd(),
+        check=True,
+    )
+    rows = parse_importtime(result.stderr)
+    by_package: Dict[str, int] = {}
+    for name, self_us, _ in rows:
+        package = name.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+    total_us = sum(self_us for _, self_us, _ in rows)
+    return {
+        "module": module,
+        "total_ms": round(total_us / 1000, 3),
+        "by_package_ms": {
+            name: round(us / 1000, 3)
+            for name, us in sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+        },
+        "slowest_modules_ms": {
+            name: round(cumulative / 1000, 3)
+            for name, _, cumulative in sorted(rows, key=lambda row: row[2], reverse=True)[:top]
+        },
+    }
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Report import time for a worker's entry module")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args(argv)
+
+    breakdown = import_breakdown(args.module, args.top)
+    print(f"import {breakdown['module']}: {breakdown['total_ms']:.1f} ms")
+    print("by top-level package (self time):")
+    for name, ms in breakdown["by_package_ms"].items():
+        print(f"  {name:<32} {ms:>9.1f} ms")
+    print("slowest modules (cumulative):")
+    for name, ms in breakdown["slowest_modules_ms"].items():
+        print(f"  {name:<48} {ms:>9.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
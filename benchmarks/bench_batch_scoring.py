@@ -0,0 +1,54 @@
+"""Rows/sec for the scalar and vectorized scoring paths.
+
+Run with: python -m benchmarks.bench_batch_scoring --rows 1000000
+"""
+import argparse
+import time
+import numpy as np
+from app.core.advanced_scoring_engine import AdvancedRiskEngine
+from app.core.scoring_engine import RiskScoringEngine
+
+
+def make_columns(rows: int, seed: int = 42):
+    rng = np.random.default_rng(seed)
+    ages = rng.integers(18, 81, rows)
+    incomes = rng.uniform(0, 200000, rows).round(2)
+    activity = rng.integers(0, 101, rows)
+    return ages, incomes, activity
+
+
+def rows_per_sec(fn, rows: int) -> float:
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    return rows / elapsed if elapsed else float("inf")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--scalar-rows", type=int, default=50_000, help="rows used for the slower scalar path")
+    args = parser.parse_args()
+
+    ages, incomes, activity = make_columns(args.rows)
+    s_ages, s_incomes, s_activity = (c[: args.scalar_rows].tolist() for c in (ages, incomes, activity))
+    n_scalar = len(s_ages)
+
+    basic = RiskScoringEngine()
+    advanced = AdvancedRiskEngine()
+    cases = [
+        ("RiskScoringEngine.calculate_score", n_scalar,
+         lambda: [basic.calculate_score(a, i, s) for a, i, s in zip(s_ages, s_incomes, s_activity)]),
+        ("RiskScoringEngine.calculate_batch", args.rows,
+         lambda: basic.calculate_batch(ages, incomes, activity)),
+        ("AdvancedRiskEngine.calculate", n_scalar,
+         lambda: [advanced.calculate(a, i, s) for a, i, s in zip(s_ages, s_incomes, s_activity)]),
+        ("AdvancedRiskEngine.calculate_batch", args.rows,
+         lambda: advanced.calculate_batch(ages, incomes, activity)),
+    ]
+    for name, rows, fn in cases:
+        print(f"{name:<40} {rows_per_sec(fn, rows):>15,.0f} rows/sec")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Fetch + serialize time for score history pages: ORM/Pydantic path vs column tuples + orjson.
+
+The legacy path is what the routes did before: load ``RiskScore`` entities,
+validate each through ``RiskScoreResponse`` (orm_mode), run
+``jsonable_encoder`` and encode with the stdlib ``json`` as Starlette's
+JSONResponse does. The fast path is what ``list_scores`` does now.
+
+Run with: python -m benchmarks.bench_serialization --sizes 1 100 10000
+"""
+import argparse
+import json
+import time
+from typing import Callable, Dict, List
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.config.models_base import Base, Customer, RiskExplanation, RiskScore, utcnow
+from app.routes.risk_routes import SCORE_FIELDS, SELECT_SCORES
+from app.schemas.risk_schema import RiskScoreResponse
+from app.utils.responses import OrjsonResponse
+
+EXPLANATIONS = [
+    f"Age contributed {a} points. Income added {i} points. Activity score added {s} points. Final score = {a + i + s}."
+    for a in (5, 10, 15, 20) for i in (2, 5, 15, 25) for s in (2, 5, 15, 30)
+]
+
+
+def make_session(rows: int):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Customer(name="Bench", age=30, income=1.0, activity_score=1))
+    session.execute(insert(RiskExplanation), [
+        {"digest": str(n), "text": text} for n, text in enumerate(EXPLANATIONS)
+    ])
+    now = utcnow()
+    session.execute(insert(RiskScore), [
+        {"customer_id": 1, "final_score": n % 100, "explanation_id": n % len(EXPLANATIONS) + 1, "created_at": now}
+        for n in range(rows)
+    ])
+    session.commit()
+    return session
+
+
+def to_response(score) -> RiskScoreResponse:
+    # What FastAPI does with an orm_mode response_model, on Pydantic v2 or v1.
+    if hasattr(RiskScoreResponse, "model_validate"):
+        return RiskScoreResponse.model_validate(score, from_attributes=True)
+    return RiskScoreResponse.from_orm(score)
+
+
+def legacy_page(session, limit: int) -> bytes:
+    scores = session.scalars(select(RiskScore).order_by(RiskScore.id.desc()).limit(limit)).all()
+    content = jsonable_encoder([to_response(score) for score in scores])
+    return json.dumps(content, ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def fast_page(session, limit: int) -> bytes:
+    rows = session.execute(SELECT_SCORES.order_by(RiskScore.id.desc()).limit(limit)).all()
+    return OrjsonResponse([dict(zip(SCORE_FIELDS, row)) for row in rows]).body
+
+
+def ms_per_call(fn: Callable[[], bytes], min_time: float = 0.5) -> float:
+    fn()
+    calls, start = 0, time.perf_counter()
+    while True:
+        fn()
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / calls * 1000
+
+
+def run_serialization(sizes: List[int]) -> Dict[int, Dict[str, float]]:
+    session = make_session(max(sizes))
+    results = {}
+    for size in sizes:
+        session.expunge_all()
+        if json.loads(legacy_page(session, size)) != json.loads(fast_page(session, size)):
+            raise AssertionError(f"legacy and fast outputs differ at {size} rows")
+        legacy = ms_per_call(lambda: legacy_page(session, size))
+        fast = ms_per_call(lambda: fast_page(session, size))
+        results[size] = {"legacy_ms": round(legacy, 3), "fast_ms": round(fast, 3), "speedup": round(legacy / fast, 2)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 10000])
+    args = parser.parse_args()
+    for size, data in run_serialization(args.sizes).items():
+        print(f"{size:>6} rows  legacy {data['legacy_ms']:>9.3f} ms  fast {data['fast_ms']:>9.3f} ms  {data['speedup']:>5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""Compare two benchmark result files and fail on regressions.
+
+Exit status is 1 when any metric is worse than the baseline by more than the
+threshold (a fraction, 0.10 = 10%).
+"""
+import argparse
+import json
+import sys
+from typing import Dict, List, Tuple
+
+# metric name -> True when a larger value is better
+METRIC_DIRECTION = {
+    "ns_per_op": False,
+    "p50_ms": False,
+    "p95_ms": False,
+    "p99_ms": False,
+    "rps": True,
+    "import_ms": False,
+}
+
+
+def find_regressions(baseline: Dict, current: Dict, threshold: float) -> List[Tuple[str, str, float, float, float]]:
+    regressions = []
+    for section in ("micro", "load", "startup"):
+        for name, metrics in baseline.get(section, {}).items():
+            now = current.get(section, {}).get(name)
+            if now is None:
+                continue
+            for metric, higher_is_better in METRIC_DIRECTION.items():
+                if metric not in metrics or metric not in now or not metrics[metric]:
+                    continue
+                before, after = float(metrics[metric]), float(now[metric])
+                change = (after - before) / before
+                worse = -change if higher_is_better else change
+                if worse > threshold:
+                    regressions.append((f"{section}:{name}", metric, before, after, worse))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("baseline")
+    parser.add_argument("current")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args(argv)
+
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    with open(args.current, encoding="utf-8") as f:
+        current = json.load(f)
+
+    regressions = find_regressions(baseline, current, args.threshold)
+    for name, metric, before, after, worse in regressions:
+        print(f"REGRESSION {name} {metric}: {before:.3f} -> {after:.3f} ({worse:+.1%})")
+    if regressions:
+        return 1
+    print(f"no regressions above {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
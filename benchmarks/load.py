@@ -0,0 +1,132 @@
+"""In-process ASGI load generator against a local SQLite stand-in.
+
+Requests go straight into the FastAPI app through httpx's ASGI transport, so
+the numbers cover routing, validation, the engine and the ORM/DB layer without
+any network or MySQL server.
+"""
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import time
+from typing import Awaitable, Callable, Dict, List
+import httpx
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from app.config.database import get_async_db
+from app.config.models_base import Base
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(latencies: List[float], elapsed: float, errors: int) -> Dict[str, float]:
+    ordered = sorted(latencies)
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "rps": round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(ordered, 50) * 1000, 3),
+        "p95_ms": round(percentile(ordered, 95) * 1000, 3),
+        "p99_ms": round(percentile(ordered, 99) * 1000, 3),
+    }
+
+
+async def _drive(
+    concurrency: int,
+    requests: int,
+    call: Callable[[int], Awaitable[httpx.Response]],
+) -> Dict[str, float]:
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            start = time.perf_counter()
+            r = await call(i)
+            latencies.append(time.perf_counter() - start)
+            if r.status_code >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+async def run_load_async(requests: int = 500, concurrency: int = 16, seed: int = 1) -> Dict[str, Dict[str, float]]:
+    from app.main import app
+
+    # A file database with a real pool so concurrent requests get their own connections.
+    workdir = tempfile.mkdtemp(prefix="risk-bench-")
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{os.path.join(workdir, 'bench.db')}",
+        connect_args={"timeout": 30},
+        pool_size=concurrency,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    rng = random.Random(seed)
+    previous = app.dependency_overrides.get(get_async_db)
+    app.dependency_overrides[get_async_db] = override_get_db
+    results: Dict[str, Dict[str, float]] = {}
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            def customer_payload():
+                return {
+                    "name": "Bench",
+                    "age": rng.randint(18, 80),
+                    "income": round(rng.uniform(0, 200000), 2),
+                    "activity_score": rng.randint(0, 100),
+                }
+
+            customer_ids: List[int] = []
+
+            async def add_customer(_):
+                r = await client.post("/customer/add", json=customer_payload())
+                if r.status_code == 200:
+                    customer_ids.append(r.json()["id"])
+                return r
+
+            results["/customer/add"] = await _drive(concurrency, requests, add_customer)
+            if not customer_ids:
+                raise RuntimeError("load test could not create any customers")
+
+            async def score(i):
+                payload = customer_payload()
+                payload.pop("name")
+                payload["customer_id"] = customer_ids[i % len(customer_ids)]
+                return await client.post("/risk/score", json=payload)
+
+            results["/risk/score"] = await _drive(concurrency, requests, score)
+
+            async def list_scores(i):
+                return await client.get(f"/risk/{customer_ids[i % len(customer_ids)]}")
+
+            results["/risk/{customer_id}"] = await _drive(concurrency, requests, list_scores)
+    finally:
+        if previous is None:
+            app.dependency_overrides.pop(get_async_db, None)
+        else:
+            app.dependency_overrides[get_async_db] = previous
+        await engine.dispose()
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def run_load(requests: int = 500, concurrency: int = 16) -> Dict[str, Dict[str, float]]:
+    return asyncio.run(run_load_async(requests=requests, concurrency=concurrency))
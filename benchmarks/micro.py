@@ -0,0 +1,36 @@
+"""Micro-benchmarks for the scoring engines' hot paths."""
+import timeit
+from typing import Callable, Dict
+from app.core.advanced_scoring_engine import AdvancedRiskEngine
+from app.core.scoring_engine import RiskScoringEngine
+
+SAMPLE = {"age": 35, "income": 45000.0, "activity_score": 55}
+
+
+def _ns_per_op(fn: Callable[[], object], number: int, repeat: int) -> float:
+    best = min(timeit.repeat(fn, number=number, repeat=repeat))
+    return best / number * 1e9
+
+
+def micro_cases() -> Dict[str, Callable[[], object]]:
+    basic = RiskScoringEngine()
+    advanced = AdvancedRiskEngine()
+    income_buckets = advanced.config["income"]
+    age, income, activity = SAMPLE["age"], SAMPLE["income"], SAMPLE["activity_score"]
+    return {
+        "basic.calculate_score": lambda: basic.calculate_score(age, income, activity),
+        "basic.explain": lambda: basic.explain(age, income, activity),
+        "basic.calculate_with_explanation": lambda: basic.calculate_with_explanation(SAMPLE),
+        "advanced.calculate": lambda: advanced.calculate(age, income, activity),
+        "advanced.explain": lambda: advanced.explain(age, income, activity),
+        "advanced.calculate_with_explanation": lambda: advanced.calculate_with_explanation(SAMPLE),
+        "advanced._score_from_buckets": lambda: advanced._score_from_buckets(income, income_buckets, "income"),
+    }
+
+
+def run_micro(number: int = 20000, repeat: int = 5) -> Dict[str, Dict[str, float]]:
+    """Best-of-``repeat`` nanoseconds per call for each case."""
+    return {
+        name: {"ns_per_op": round(_ns_per_op(fn, number, repeat), 1)}
+        for name, fn in micro_cases().items()
+    }
@@ -0,0 +1,58 @@
+"""Run the micro and load benchmarks and write the results as JSON.
+
+Usage:
+    python -m benchmarks.run_suite --output bench/current.json
+    python -m benchmarks.compare bench/baseline.json bench/current.json --threshold 0.15
+"""
+import argparse
+import json
+import os
+import platform
+import time
+from benchmarks.load import run_load
+from benchmarks.micro import run_micro
+from app.utils.startup import import_breakdown
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the scoring API benchmark suite")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--micro-number", type=int, default=20000, help="calls per micro-benchmark repeat")
+    parser.add_argument("--requests", type=int, default=500, help="requests per endpoint in the load test")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--skip-load", action="store_true")
+    parser.add_argument("--skip-startup", action="store_true")
+    args = parser.parse_args(argv)
+
+    results = {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+        },
+        "micro": run_micro(number=args.micro_number),
+        "load": {} if args.skip_load else run_load(requests=args.requests, concurrency=args.concurrency),
+        "startup": {} if args.skip_startup else {"app.main": {"import_ms": import_breakdown("app.main")["total_ms"]}},
+    }
+    directory = os.path.dirname(args.output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+
+    for name, data in results["micro"].items():
+        print(f"{name:<40} {data['ns_per_op']:>12,.1f} ns/op")
+    for route, data in results["load"].items():
+        print(
+            f"{route:<24} {data['rps']:>10,.1f} req/s  p50 {data['p50_ms']:.2f}ms  "
+            f"p95 {data['p95_ms']:.2f}ms  p99 {data['p99_ms']:.2f}ms  errors {data['errors']}"
+        )
+    for module, data in results["startup"].items():
+        print(f"import {module:<17} {data['import_ms']:>10,.1f} ms")
+    print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,36 @@
+"""Production serving: ``gunicorn -c gunicorn.conf.py app.main:app``.
+
+The app is imported once in the master (``preload_app``) and the scoring engine
+is built there before workers fork, so every worker shares the compiled risk
+config copy-on-write instead of parsing it again. DB engines are created per
+worker in the lifespan hook, each sized for its share of ``DB_MAX_CONNECTIONS``.
+Workers are recycled after ``GUNICORN_MAX_REQUESTS`` requests (with jitter so
+they do not all restart together) and get ``GUNICORN_GRACEFUL_TIMEOUT`` seconds
+to finish in-flight requests.
+"""
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY") or multiprocessing.cpu_count())
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "10000"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", str(max_requests // 10)))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+accesslog = None
+
+# Workers read this to size their DB pools (app.config.database.pool_sizes).
+os.environ["WEB_CONCURRENCY"] = str(workers)
+
+
+def on_starting(server):
+    from app.core.engine_provider import get_engine_provider
+
+    provider = get_engine_provider()
+    server.log.info("Loaded %s risk engine (config %s) before forking %d workers", provider.kind, provider.config_path, workers)
+    # Keep the GC from touching (and un-sharing) everything loaded so far.
+    gc.freeze()
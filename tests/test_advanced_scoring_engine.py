@@ -0,0 +1,94 @@
+from app.core.advanced_scoring_engine import AdvancedRiskEngine, RISK_CONFIG_DEFAULT
+
+engine = AdvancedRiskEngine()
+
+
+def reference_bucket(value, buckets):
+    for label, points in buckets.items():
+        if "-" in label and label[0].isdigit():
+            low, high = (float(p) for p in label.split("-"))
+            if low <= float(value) <= high:
+                return int(points), label
+        elif label.startswith("<"):
+            if float(value) < float(label[1:]):
+                return int(points), label
+        elif label.startswith(">"):
+            if float(value) > float(label[1:]):
+                return int(points), label
+    last_label = list(buckets.keys())[-1]
+    return int(buckets[last_label]), last_label
+
+
+def test_compiled_buckets_match_label_parsing():
+    values = {
+        "age": list(range(0, 120)) + [17.5, 24.999, 25.0, 25.5, 40.0, 60.0, 100.5],
+        "income": [0, 19999.99, 20000, 20000.01, 49999, 50000, 75000, 100000, 100000.01, 1e9],
+        "activity_score": list(range(0, 101)) + [29.5, 30.0, 80.0, 80.5],
+    }
+    for feature, samples in values.items():
+        for value in samples:
+            expected = reference_bucket(value, RISK_CONFIG_DEFAULT[feature])
+            assert engine._score_from_buckets(value, engine.config[feature], feature) == expected
+
+
+def test_overlapping_boundaries_first_match_wins():
+    assert engine.score_age(25) == (20, "18-25")
+    assert engine.score_age(40) == (10, "25-40")
+    assert engine.score_income(100000) == (5, "50000-100000")
+
+
+def test_unmatched_value_falls_back_to_last_bucket():
+    assert engine.score_age(10) == (15, "60-100")
+    assert engine.score_age(101) == (15, "60-100")
+
+
+def test_update_config_recompiles_tables():
+    local = AdvancedRiskEngine()
+    cfg = dict(RISK_CONFIG_DEFAULT)
+    cfg["age"] = {"18-30": 50, ">30": 1}
+    local.update_config(cfg)
+    assert local.score_age(22) == (50, "18-30")
+    assert local.score_age(31) == (1, ">30")
+
+
+def test_calculate_uses_weights():
+    expected = 10 * 1.2 + 15 * 1.5 + 15 * 1.0
+    assert engine.calculate(age=35, income=45000, activity_score=55) == expected
+
+
+def test_calculate_batch_bit_identical_to_scalar():
+    import numpy as np
+    rng = np.random.default_rng(11)
+    ages = np.concatenate([rng.integers(0, 120, 1000), [18, 25, 40, 60, 100]])
+    incomes = np.concatenate([rng.uniform(0, 200000, 1000).round(2), [20000, 50000, 100000, 0, 1e6]])
+    activity = np.concatenate([rng.integers(0, 101, 1000), [30, 60, 80, 0, 100]])
+    final, parts = engine.calculate_batch(ages, incomes, activity, return_contributions=True)
+    for row, (a, i, s) in enumerate(zip(ages.tolist(), incomes.tolist(), activity.tolist())):
+        assert final[row] == engine.calculate(a, i, s)
+    assert set(parts) == {"age", "income", "activity_score"}
+    assert (parts["age"] + parts["income"] + parts["activity_score"] == final).all()
+
+
+def test_calculate_with_explanation_cached_by_bucket_signature():
+    local = AdvancedRiskEngine(cache_size=8)
+    first = local.calculate_with_explanation({"age": 30, "income": 45000, "activity_score": 55})
+    second = local.calculate_with_explanation({"age": 35, "income": 30000, "activity_score": 45})
+    assert second == first
+    assert local.cache.stats()["hits"] == 1
+    assert local.cache.stats()["misses"] == 1
+    first["scores"]["age_score"] = -1
+    first["weights"]["age"] = -1.0
+    third = local.calculate_with_explanation({"age": 30, "income": 45000, "activity_score": 55})
+    assert third["scores"]["age_score"] == 10 and third["weights"]["age"] == 1.2
+
+
+def test_update_config_invalidates_cache():
+    local = AdvancedRiskEngine()
+    before = local.calculate_with_explanation({"age": 30, "income": 45000, "activity_score": 55})
+    cfg = dict(RISK_CONFIG_DEFAULT)
+    cfg["weights"] = {"age": 2.0, "income": 1.0, "activity_score": 1.0}
+    local.update_config(cfg)
+    after = local.calculate_with_explanation({"age": 30, "income": 45000, "activity_score": 55})
+    assert after["final_score"] == 10 * 2.0 + 15 + 15
+    assert after["final_score"] != before["final_score"]
+    assert local.cache.stats()["misses"] == 2
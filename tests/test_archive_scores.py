@@ -0,0 +1,68 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import select
+from app.config import partitions
+from app.config.models_base import Customer, RiskScore
+from app.jobs.archive_scores import archive_scores, iter_archive, maintain_partitions, restore_scores
+
+NOW = datetime(2026, 6, 1)
+
+def add_history(factory):
+    with factory() as db:
+        db.add_all([Customer(name=f"C{i}", age=30, income=40000, activity_score=50) for i in range(2)])
+        db.flush()
+        # Customer 1: five scores 100..500 days old. Customer 2: one old score and one recent.
+        for days in (100, 200, 300, 400, 500):
+            db.add(RiskScore(customer_id=1, final_score=days // 10, explanation_text=f"e{days}",
+                             created_at=NOW - timedelta(days=days)))
+        db.add(RiskScore(customer_id=2, final_score=1, explanation_text="old", created_at=NOW - timedelta(days=900)))
+        db.add(RiskScore(customer_id=2, final_score=2, explanation_text="new", created_at=NOW - timedelta(days=5)))
+        db.commit()
+    return factory
+
+def stored(factory):
+    with factory() as db:
+        return {
+            score.id: (score.customer_id, score.final_score, score.explanation, score.created_at)
+            for score in db.scalars(select(RiskScore))
+        }
+
+def test_archive_keeps_latest_and_recent_then_restores(tmp_path, session_factory):
+    factory = add_history(session_factory)
+    before = stored(factory)
+    progress = archive_scores(factory, str(tmp_path), keep_latest=2, keep_days=250, batch_size=2, now=NOW)
+    assert progress.finished and progress.archived == 3
+    remaining = stored(factory)
+    # Customer 1 keeps its two newest (100, 200 days), customer 2 keeps both (newest two).
+    assert sorted(v[1] for v in remaining.values()) == [1, 2, 10, 20]
+    archived = list(iter_archive(progress.path))
+    assert sorted(row["final_score"] for row in archived) == [30, 40, 50]
+    assert all(before[row["id"]][2] == row["explanation"] for row in archived)
+
+    assert restore_scores(factory, progress.path, batch_size=2) == 3
+    assert stored(factory) == before
+    assert restore_scores(factory, progress.path) == 0
+    assert archive_scores(factory, str(tmp_path / "again"), keep_latest=1, keep_days=150, now=NOW).archived == 5
+
+def test_partitioning_is_a_noop_on_sqlite_and_builds_monthly_ranges(session_factory):
+    factory = add_history(session_factory)
+    assert maintain_partitions(factory, convert=True) == []
+    clause = partitions.partition_clause(date(2025, 11, 15), date(2026, 1, 1))
+    assert "PARTITION p202511 VALUES LESS THAN (TO_DAYS('2025-12-01'))" in clause
+    assert "PARTITION p202601 VALUES LESS THAN (TO_DAYS('2026-02-01'))" in clause
+    assert clause.rstrip().endswith("PARTITION pmax VALUES LESS THAN MAXVALUE\n)")
+
+def test_archive_ranks_histories_once_across_batches(tmp_path, session_factory):
+    from sqlalchemy import event
+    factory = add_history(session_factory)
+    engine = factory.kw["bind"]
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(engine, "before_cursor_execute", record)
+    try:
+        progress = archive_scores(factory, str(tmp_path), keep_latest=2, keep_days=250, batch_size=1, now=NOW)
+    finally:
+        event.remove(engine, "before_cursor_execute", record)
+    assert progress.archived == 3 and progress.batches == 4
+    assert sum("ROW_NUMBER" in statement.upper() for statement in statements) == 1
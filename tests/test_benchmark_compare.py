@@ -0,0 +1,21 @@
+from benchmarks.compare import find_regressions
+
+BASELINE = {
+    "micro": {"advanced.calculate": {"ns_per_op": 1000.0}},
+    "load": {"/risk/score": {"rps": 500.0, "p99_ms": 20.0}},
+}
+
+def test_no_regression_within_threshold():
+    current = {
+        "micro": {"advanced.calculate": {"ns_per_op": 1050.0}},
+        "load": {"/risk/score": {"rps": 480.0, "p99_ms": 21.0}},
+    }
+    assert find_regressions(BASELINE, current, 0.10) == []
+
+def test_slower_latency_and_lower_throughput_flagged():
+    current = {
+        "micro": {"advanced.calculate": {"ns_per_op": 1500.0}},
+        "load": {"/risk/score": {"rps": 300.0, "p99_ms": 19.0}},
+    }
+    flagged = {(name, metric) for name, metric, *_ in find_regressions(BASELINE, current, 0.10)}
+    assert flagged == {("micro:advanced.calculate", "ns_per_op"), ("load:/risk/score", "rps")}
@@ -0,0 +1,129 @@
+import threading
+import time
+from app.core.advanced_scoring_engine import AdvancedRiskEngine
+from app.core.custom_rules import ERROR, OK, SKIPPED, TIMEOUT, RuleRunner
+
+SAMPLE = {"age": 35, "income": 45000.0, "activity_score": 55}
+
+
+def test_weighted_rules_feed_final_score_and_explanation():
+    engine = AdvancedRiskEngine()
+    base = engine.calculate_with_explanation(SAMPLE)
+    engine.add_custom_rule("high_income_young", lambda d: 4.0, weight=2.5)
+    result = engine.calculate_with_explanation(SAMPLE)
+    assert result["final_score"] == base["final_score"] + 10.0
+    assert "Custom rule high_income_young contributed 10.00." in result["explanation"]
+    assert result["explanation"].endswith(f"Final score = {result['final_score']:.2f}.")
+    assert result["custom_rules"]["high_income_young"]["status"] == OK
+    assert engine.calculate_with_explanation(SAMPLE)["final_score"] == result["final_score"]
+    assert "custom_rules" not in engine.explain(35, 45000.0, 55)
+
+
+def test_rules_run_concurrently():
+    runner = RuleRunner(max_workers=4, default_timeout=1.0)
+    barrier = threading.Barrier(3, timeout=0.5)
+
+    def rule(_):
+        barrier.wait()  # only passes if all three rules are running at once
+        return 1.0
+
+    for name in ("a", "b", "c"):
+        runner.register(name, rule)
+    assert [o.status for o in runner.evaluate(SAMPLE)] == [OK, OK, OK]
+
+
+def test_slow_and_failing_rules_do_not_block_or_count():
+    runner = RuleRunner(max_workers=4, default_timeout=0.02)
+    release = threading.Event()
+    runner.register("slow", lambda d: release.wait(1.0) and 1.0)
+    runner.register("broken", lambda d: 1 / 0)
+    runner.register("fine", lambda d: 2.0, weight=3.0)
+    start = time.perf_counter()
+    outcomes = {o.name: o for o in runner.evaluate(SAMPLE)}
+    assert time.perf_counter() - start < 0.5
+    release.set()
+    assert outcomes["slow"].status == TIMEOUT
+    assert outcomes["broken"].status == ERROR
+    assert outcomes["fine"].contribution == 6.0
+    stats = runner.stats()
+    assert stats["slow"]["timeouts"] == 1
+    assert stats["broken"]["errors"] == 1
+    assert stats["fine"]["calls"] == 1 and stats["fine"]["latency_max_ms"] >= 0.0
+
+
+def test_circuit_opens_after_repeated_failures_and_half_opens():
+    runner = RuleRunner(failure_threshold=2, cooldown=0.05)
+    healthy = {"ok": False}
+
+    def flaky(_):
+        if not healthy["ok"]:
+            raise RuntimeError("down")
+        return 1.0
+
+    runner.register("flaky", flaky)
+    assert runner.evaluate(SAMPLE)[0].status == ERROR
+    assert runner.evaluate(SAMPLE)[0].status == ERROR
+    assert runner.evaluate(SAMPLE)[0].status == SKIPPED
+    assert runner.stats()["flaky"]["circuit_open"]
+    healthy["ok"] = True
+    time.sleep(0.06)
+    assert runner.evaluate(SAMPLE)[0].status == OK
+    assert not runner.stats()["flaky"]["circuit_open"]
+    assert runner.evaluate(SAMPLE)[0].status == OK
+
+
+def test_hung_rule_holds_its_share_and_healthy_rule_keeps_running():
+    runner = RuleRunner(max_workers=4, default_timeout=0.05, failure_threshold=5)
+    release = threading.Event()
+    runner.register("hung", lambda d: release.wait(5.0) and 0.0)
+    runner.register("healthy", lambda d: 1.0)
+    try:
+        statuses = [{o.name: o.status for o in runner.evaluate(SAMPLE)} for _ in range(10)]
+    finally:
+        release.set()
+    assert [s["healthy"] for s in statuses] == [OK] * 10
+    # Two of the four threads are the hung rule's share; after that it is skipped.
+    assert [s["hung"] for s in statuses[:2]] == [TIMEOUT, TIMEOUT]
+    assert {s["hung"] for s in statuses[2:]} == {SKIPPED}
+    stats = runner.stats()
+    assert stats["hung"]["timeouts"] == 2 and stats["hung"]["skipped"] == 8
+    assert not stats["healthy"]["circuit_open"]
+
+
+def test_call_queued_behind_busy_pool_is_skipped_not_timed_out():
+    runner = RuleRunner(max_workers=1, default_timeout=0.05)
+    release = threading.Event()
+    runner.register("slow", lambda d: release.wait(5.0) and 0.0)
+    runner.register("fast", lambda d: 1.0)
+    try:
+        outcomes = {o.name: o.status for o in runner.evaluate(SAMPLE)}
+    finally:
+        release.set()
+    assert outcomes == {"slow": TIMEOUT, "fast": SKIPPED}
+    assert runner.stats()["fast"]["timeouts"] == 0
+
+
+def test_scoring_with_rules_does_not_block_the_event_loop():
+    import asyncio
+    from app.routes.risk_routes import _score
+
+    engine = AdvancedRiskEngine()
+    engine.add_custom_rule("slow", lambda d: time.sleep(0.2) or 1.0, timeout=0.5)
+
+    async def run():
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        task = asyncio.create_task(ticker())
+        results = await asyncio.gather(*(_score(engine, [SAMPLE]) for _ in range(4)))
+        task.cancel()
+        return ticks, results
+
+    ticks, results = asyncio.run(run())
+    assert ticks >= 10
+    assert all(r[0]["custom_rules"]["slow"]["status"] == OK for r in results)
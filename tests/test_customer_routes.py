@@ -1,23 +1,25 @@
+import asyncio
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.pool import StaticPool
 from app.main import app
 from app.config.models_base import Base
-from app.config.database import get_db
+from app.config.database import get_async_db
 
-engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base.metadata.create_all(bind=engine)
+engine = create_async_engine("sqlite+aiosqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
 
-def override_get_db():
-    db = TestingSessionLocal()
-    try:
+async def init_models():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+asyncio.run(init_models())
+
+async def override_get_db():
+    async with TestingSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_db
 client = TestClient(app)
 
 def test_post_customer_add_valid_200():
@@ -50,3 +52,53 @@ def test_get_customer_non_existing_404():
     r = client.get("/customer/99999")
     assert r.status_code == 404
 
+
+def test_post_customer_add_single_statement():
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        r = client.post("/customer/add", json={"name": "Ola", "age": 41, "income": 52000, "activity_score": 33})
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+    assert r.status_code == 200
+    assert r.json()["created_at"]
+    assert len(statements) == 1
+    assert statements[0].lstrip().upper().startswith("INSERT")
+    assert client.get(f"/customer/{r.json()['id']}").json()["created_at"] == r.json()["created_at"]
+
+def test_created_at_server_default_is_utc():
+    from datetime import datetime, timedelta
+    from sqlalchemy import text
+    from sqlalchemy.dialects import mysql
+    from sqlalchemy.schema import CreateTable
+    from app.config.models_base import Customer, utcnow
+    assert "DEFAULT (UTC_TIMESTAMP())" in str(CreateTable(Customer.__table__).compile(dialect=mysql.dialect()))
+
+    async def insert_raw():
+        async with TestingSessionLocal() as db:
+            await db.execute(text("INSERT INTO customers (name, age, income, activity_score) VALUES ('Raw', 30, 1000, 10)"))
+            created = (await db.execute(text("SELECT created_at FROM customers WHERE name = 'Raw'"))).scalar()
+            await db.commit()
+            return created
+    created = asyncio.run(insert_raw())
+    assert abs(datetime.fromisoformat(str(created)) - utcnow()) < timedelta(minutes=1)
+
+def test_get_customer_served_from_cache():
+    from app.config.customer_cache import get_customer_cache
+    from app.utils.ttl_cache import TTLCache
+    cache = TTLCache(maxsize=100, ttl=60)
+    app.dependency_overrides[get_customer_cache] = lambda: cache
+    try:
+        cid = client.post("/customer/add", json={"name": "Pia", "age": 52, "income": 90000, "activity_score": 70}).json()["id"]
+        first = client.get(f"/customer/{cid}")
+        second = client.get(f"/customer/{cid}")
+    finally:
+        del app.dependency_overrides[get_customer_cache]
+    assert first.json() == second.json()
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
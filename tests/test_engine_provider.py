@@ -0,0 +1,57 @@
+import json
+import os
+import pytest
+from app.core.advanced_scoring_engine import AdvancedRiskEngine, RISK_CONFIG_DEFAULT
+from app.core.engine_provider import EngineProvider
+from app.core.scoring_engine import RiskScoringEngine
+
+def write_config(path, config, mtime):
+    path.write_text(json.dumps(config))
+    os.utime(path, (mtime, mtime))
+
+def test_basic_engine_is_reused():
+    provider = EngineProvider(kind="basic")
+    assert isinstance(provider.get(), RiskScoringEngine)
+    assert provider.get() is provider.get()
+
+def test_unknown_engine_kind_rejected():
+    with pytest.raises(ValueError):
+        EngineProvider(kind="quantum")
+
+def test_advanced_engine_reloads_on_mtime_change(tmp_path):
+    path = tmp_path / "risk_config.json"
+    write_config(path, RISK_CONFIG_DEFAULT, 1_000_000)
+    provider = EngineProvider(kind="advanced", config_path=str(path), check_interval=0)
+    first = provider.get()
+    assert isinstance(first, AdvancedRiskEngine)
+    assert provider.get() is first
+
+    changed = dict(RISK_CONFIG_DEFAULT, weights={"age": 2.0, "income": 1.0, "activity_score": 1.0})
+    write_config(path, changed, 1_000_100)
+    second = provider.get()
+    assert second is not first
+    assert second.calculate(age=30, income=45000, activity_score=55) == 10 * 2.0 + 15 + 15
+    assert first.calculate(age=30, income=45000, activity_score=55) == 10 * 1.2 + 15 * 1.5 + 15
+    assert provider.reloads == 1
+
+def test_invalid_config_keeps_current_engine(tmp_path):
+    path = tmp_path / "risk_config.json"
+    write_config(path, RISK_CONFIG_DEFAULT, 1_000_000)
+    provider = EngineProvider(kind="advanced", config_path=str(path), check_interval=0)
+    first = provider.get()
+    path.write_text("{not json")
+    os.utime(path, (1_000_100, 1_000_100))
+    assert provider.get() is first
+    assert provider.reloads == 0
+
+def test_bad_weights_reload_rejected(tmp_path):
+    path = tmp_path / "risk_config.json"
+    write_config(path, RISK_CONFIG_DEFAULT, 1_000_000)
+    provider = EngineProvider(kind="advanced", config_path=str(path), check_interval=0)
+    first = provider.get()
+    for weights in ({**RISK_CONFIG_DEFAULT["weights"], "income": "high"}, [1.0, 1.0, 1.0]):
+        path.write_text(json.dumps({**RISK_CONFIG_DEFAULT, "weights": weights}))
+        assert provider.reload() is False
+        assert provider.get() is first
+    assert provider.reloads == 0
+    assert first.calculate(age=30, income=45000, activity_score=55) == 10 * 1.2 + 15 * 1.5 + 15
@@ -0,0 +1,63 @@
+import logging
+from fastapi.testclient import TestClient
+from app.main import app
+from app.exceptions.error_stats import ErrorStats, LogRateLimiter
+
+client = TestClient(app)
+
+def test_client_errors_counted_without_traceback(caplog):
+    before = client.get("/health/errors").json()["client_errors_total"]
+    logger = logging.getLogger("app.exceptions")
+    logger.addHandler(caplog.handler)
+    try:
+        with caplog.at_level(logging.INFO, logger="app.exceptions"):
+            for _ in range(3):
+                assert client.get("/no/such/route").status_code == 404
+    finally:
+        logger.removeHandler(caplog.handler)
+    records = [r for r in caplog.records if r.name == "app.exceptions"]
+    assert len(records) == 1
+    assert records[0].exc_info is None
+    stats = client.get("/health/errors").json()
+    assert stats["client_errors_total"] == before + 3
+    assert stats["client_error_rate_per_sec"] > 0
+
+def test_client_errors_rate_limited_per_route_template(caplog):
+    from app.exceptions.handlers import client_error_limiter
+    from tests.test_risk_routes import client as db_client
+    client_error_limiter._seen.clear()
+    loggers = [logging.getLogger("app.exceptions"), logging.getLogger("app.main")]
+    for logger in loggers:
+        logger.addHandler(caplog.handler)
+    try:
+        with caplog.at_level(logging.INFO):
+            for customer_id in range(999001, 999006):
+                assert db_client.get(f"/customer/{customer_id}").status_code == 404
+    finally:
+        for logger in loggers:
+            logger.removeHandler(caplog.handler)
+    assert [r.name for r in caplog.records if r.name in ("app.exceptions", "app.main")] == [
+        "app.exceptions", "app.main",
+    ]
+
+def test_unknown_route_uses_api_error_body():
+    r = client.get("/no/such/route")
+    assert r.json() == {"status": "error", "detail": "Not Found"}
+
+def test_rate_limiter_reports_suppressed_count():
+    limiter = LogRateLimiter(interval=0.0)
+    assert limiter.allow("k") == (True, 0)
+    limiter = LogRateLimiter(interval=60.0)
+    assert limiter.allow("k") == (True, 0)
+    assert limiter.allow("k") == (False, 0)
+    assert limiter.allow("other") == (True, 0)
+
+def test_error_stats_split_client_and_server():
+    stats = ErrorStats()
+    stats.record(404)
+    stats.record(422)
+    stats.record(500)
+    snap = stats.snapshot()
+    assert snap["client_errors_total"] == 2
+    assert snap["server_errors_total"] == 1
+    assert snap["by_status"] == {"404": 1, "422": 1, "500": 1}
@@ -0,0 +1,56 @@
+import asyncio
+from sqlalchemy import func, select
+from app.config import explanations
+from app.config.models_base import Customer, RiskExplanation, RiskScore
+from app.jobs.compact_explanations import compact_explanations
+from tests.test_risk_routes import TestingSessionLocal, client, create_customer
+
+def test_identical_explanations_are_stored_once():
+    cid = create_customer("Una", 30, 40000, 50)
+    payload = {"customer_id": cid, "age": 30, "income": 40000, "activity_score": 50}
+    first = client.post("/risk/score", json=payload).json()
+    second = client.post("/risk/score", json=payload).json()
+    assert first["explanation"] == second["explanation"]
+
+    async def stored():
+        async with TestingSessionLocal() as db:
+            rows = (await db.execute(
+                select(RiskScore.explanation_id, RiskScore.explanation_text).where(RiskScore.customer_id == cid)
+            )).all()
+            texts = await db.scalar(
+                select(func.count()).where(RiskExplanation.text == first["explanation"])
+            )
+            return rows, texts
+
+    rows, texts = asyncio.run(stored())
+    assert texts == 1
+    assert len({explanation_id for explanation_id, _ in rows}) == 1
+    assert all(text is None for _, text in rows)
+    history = client.get(f"/risk/{cid}").json()
+    assert [s["explanation"] for s in history] == [first["explanation"]] * 2
+
+def test_legacy_rows_render_and_compact(session_factory):
+    with session_factory() as db:
+        db.add(Customer(name="Old", age=40, income=1000, activity_score=10))
+        db.flush()
+        db.add_all([RiskScore(customer_id=1, final_score=50, explanation_text=t) for t in ("a", "b", "a")])
+        db.commit()
+        assert [s.explanation for s in db.scalars(select(RiskScore).order_by(RiskScore.id))] == ["a", "b", "a"]
+
+    assert compact_explanations(session_factory, chunk_size=2) == 3
+    with session_factory() as db:
+        scores = db.scalars(select(RiskScore).order_by(RiskScore.id)).all()
+        assert [s.explanation for s in scores] == ["a", "b", "a"]
+        assert all(s.explanation_text is None for s in scores)
+        assert scores[0].explanation_id == scores[2].explanation_id
+        assert db.scalar(select(func.count(RiskExplanation.id))) == 2
+    assert compact_explanations(session_factory) == 0
+
+def test_ids_are_cached_only_after_commit(session_factory):
+    with session_factory() as db:
+        explanations.explanation_ids_sync(db, ["rolled back"])
+        db.rollback()
+        assert explanations.digest("rolled back") not in explanations._cache(db)
+        ids = explanations.explanation_ids_sync(db, ["kept"])
+        db.commit()
+        assert explanations._cache(db)[explanations.digest("kept")] == ids["kept"]
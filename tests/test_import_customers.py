@@ -0,0 +1,94 @@
+import asyncio
+from fastapi.testclient import TestClient
+from app.core.scoring_engine import RiskScoringEngine
+from app.jobs.import_customers import iter_text_lines
+from app.main import app
+from tests.test_risk_routes import client as risk_client
+
+client = TestClient(app)
+
+def collect_lines(chunks):
+    async def source():
+        for chunk in chunks:
+            yield chunk
+
+    async def run():
+        return [line async for line in iter_text_lines(source())]
+
+    return asyncio.run(run())
+
+def test_iter_text_lines_handles_split_chunks_and_utf8():
+    chunks = [b'{"name": "Zo', "ë\"}\n{\"na".encode("utf-8")[:5], "ë\"}\n{\"na".encode("utf-8")[5:], b'me": 1}']
+    assert collect_lines(chunks) == ['{"name": "Zoë"}', '{"name": 1}']
+
+def test_import_ndjson_reports_row_errors():
+    body = "\n".join([
+        '{"name": "Ann", "age": 30, "income": 40000, "activity_score": 50}',
+        '{"name": "Bo", "age": 17, "income": 40000, "activity_score": 50}',
+        'not json',
+        '{"name": "Cy", "age": 45, "income": 90000, "activity_score": 20}',
+    ])
+    r = client.post("/customer/import?batch_size=1", content=body, headers={"content-type": "application/x-ndjson"})
+    assert r.status_code == 200
+    report = r.json()
+    assert report["received"] == 4
+    assert report["inserted"] == 2
+    assert report["failed"] == 2
+    assert [e["line"] for e in report["errors"]] == [2, 3]
+    assert "Age must be between 18 and 80" in report["errors"][0]["error"]
+
+def test_import_csv_with_inline_scoring():
+    body = "name,age,income,activity_score\nDee,22,10000,10\nEd,65,150000,90\nFi,x,1,1\n"
+    r = client.post("/customer/import?score=true", content=body, headers={"content-type": "text/csv"})
+    report = r.json()
+    assert report["inserted"] == 2
+    assert report["scored"] == 2
+    assert report["failed"] == 1
+    assert report["errors"][0]["line"] == 4
+
+def test_imported_customers_are_scored():
+    body = '{"name": "Gus", "age": 22, "income": 10000, "activity_score": 10}\n'
+    client.post("/customer/import?score=true", content=body)
+    r = risk_client.post("/customer/add", json={"name": "Probe", "age": 30, "income": 1, "activity_score": 1})
+    gus_id = r.json()["id"] - 1
+    latest = client.get(f"/risk/{gus_id}/latest")
+    assert latest.status_code == 200
+    assert latest.json()["final_score"] == 20 + 25 + 30
+
+def test_import_unknown_format_400():
+    r = client.post("/customer/import?format=xml", content="<a/>")
+    assert r.status_code == 400
+
+def test_import_csv_quoted_fields_span_lines():
+    body = 'name,age,income,activity_score\n"Hal, ""the""\nsecond",40,50000,60\n"Ivy",33,1,1\n"Jo,25,1,1\n'
+    r = client.post("/customer/import", content=body, headers={"content-type": "text/csv"})
+    report = r.json()
+    assert report["inserted"] == 2
+    assert report["errors"] == [{"line": 5, "error": "unterminated quoted field"}]
+    r = risk_client.post("/customer/add", json={"name": "Probe", "age": 30, "income": 1, "activity_score": 1})
+    assert client.get(f"/customer/{r.json()['id'] - 2}").json()["name"] == 'Hal, "the"\nsecond'
+
+def test_import_scoring_without_returning(monkeypatch):
+    from sqlalchemy.dialects.sqlite.aiosqlite import SQLiteDialect_aiosqlite
+    monkeypatch.setattr(SQLiteDialect_aiosqlite, "insert_executemany_returning_sort_by_parameter_order", False)
+    body = "name,age,income,activity_score\nKim,22,10000,10\nKim,22,10000,10\nLee,65,150000,90\n"
+    r = client.post("/customer/import?score=true", content=body, headers={"content-type": "text/csv"})
+    assert r.json()["scored"] == 3
+    r = risk_client.post("/customer/add", json={"name": "Probe", "age": 30, "income": 1, "activity_score": 1})
+    probe = r.json()["id"]
+    scores = [client.get(f"/risk/{probe - i}/latest").json()["final_score"] for i in (3, 2, 1)]
+    assert scores[0] == scores[1] == 20 + 25 + 30
+    assert scores[2] != scores[0]
+
+def test_import_scoring_without_returning_maps_ids_by_insert_order(monkeypatch):
+    from sqlalchemy.dialects.sqlite.aiosqlite import SQLiteDialect_aiosqlite
+    monkeypatch.setattr(SQLiteDialect_aiosqlite, "insert_executemany_returning_sort_by_parameter_order", False)
+    incomes = [10000, 150000, 30000]
+    body = "name,age,income,activity_score\n" + "".join(f"Max,40,{income},50\n" for income in incomes)
+    assert client.post("/customer/import?score=true", content=body, headers={"content-type": "text/csv"}).json()["scored"] == 3
+    probe = risk_client.post("/customer/add", json={"name": "Probe", "age": 30, "income": 1, "activity_score": 1}).json()["id"]
+    for offset, income in zip((3, 2, 1), incomes):
+        customer_id = probe - offset
+        assert client.get(f"/customer/{customer_id}").json()["income"] == income
+        expected = RiskScoringEngine().calculate_score(40, income, 50)
+        assert client.get(f"/risk/{customer_id}/latest").json()["final_score"] == expected
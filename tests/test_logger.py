@@ -0,0 +1,30 @@
+import json
+import logging
+import queue
+from app.utils.logger import JsonFormatter, NonBlockingQueueHandler, should_log_success
+
+def make_record(**extra):
+    record = logging.LogRecord("app.test", logging.INFO, __file__, 1, "%s %s %d", ("GET", "/health", 200), None)
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+def test_json_formatter_includes_structured_fields():
+    line = JsonFormatter().format(make_record(method="GET", path="/health", status=200, latency_ms=1.5))
+    data = json.loads(line)
+    assert data["message"] == "GET /health 200"
+    assert data["level"] == "INFO"
+    assert data["latency_ms"] == 1.5
+    assert data["status"] == 200
+
+def test_queue_handler_drops_when_full_without_blocking():
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=1))
+    handler.handle(make_record())
+    handler.handle(make_record())
+    assert handler.dropped == 1
+    queued = handler.queue.get_nowait()
+    assert queued.args == ("GET", "/health", 200)
+
+def test_sampling_bounds():
+    assert should_log_success(1.0) is True
+    assert should_log_success(0.0) is False
@@ -0,0 +1,40 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.utils.metrics import Counter, Histogram
+from tests.test_risk_routes import create_customer
+
+client = TestClient(app)
+
+def test_histogram_renders_cumulative_buckets():
+    h = Histogram("test_latency", "help", buckets=(0.1, 1.0))
+    h.observe(0.05, route="/a")
+    h.observe(0.5, route="/a")
+    h.observe(5.0, route="/a")
+    lines = list(h.render())
+    assert 'test_latency_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'test_latency_bucket{route="/a",le="1.0"} 2' in lines
+    assert 'test_latency_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'test_latency_count{route="/a"} 3' in lines
+
+def test_counter_renders_labels():
+    c = Counter("test_calls_total", "help")
+    c.inc(endpoint="score")
+    c.inc(2, endpoint="score")
+    assert 'test_calls_total{endpoint="score"} 3' in list(c.render())
+
+def test_metrics_endpoint_exposes_route_and_stage_timings():
+    cid = create_customer("Ivan", 30, 40000, 50)
+    client.post("/risk/score", json={"customer_id": cid, "age": 30, "income": 40000, "activity_score": 50})
+    with TestClient(app) as started:  # runs the lifespan, which creates the async pool
+        r = started.get("/metrics")
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain")
+    text = r.text
+    assert 'http_request_duration_seconds_count{method="POST",route="/risk/score"}' in text
+    assert 'http_request_db_queries_sum{method="POST",route="/risk/score"}' in text
+    for stage in ("validation", "customer_lookup", "engine", "insert_commit"):
+        assert f'risk_score_stage_seconds_count{{stage="{stage}"}}' in text
+    assert 'risk_engine_calls_total{endpoint="score"}' in text
+    assert "customer_cache_entries" in text
+    assert "risk_score_cache_entries" not in text  # the default basic engine has no result cache
+    assert 'db_pool_checked_out{pool="async"}' in text
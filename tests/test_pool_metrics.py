@@ -0,0 +1,38 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app.config.pool_metrics import InstrumentedQueuePool, get_pool_stats, instrument_pool_events
+
+def make_engine(tmp_path, name):
+    engine = create_engine(
+        f"sqlite:///{tmp_path}/pool.db",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+        pool_logging_name=name,
+    )
+    instrument_pool_events(engine, name)
+    return engine
+
+def test_checkout_and_connect_counters(tmp_path):
+    engine = make_engine(tmp_path, "test-counters")
+    for _ in range(3):
+        with engine.connect() as conn:
+            conn.execute(text("select 1"))
+    snap = get_pool_stats("test-counters").snapshot(engine.pool)
+    assert snap["checkouts"] == 3
+    assert snap["connects"] == 1
+    assert snap["checked_out"] == 0
+    assert snap["size"] == 1
+
+def test_timeout_and_invalidate_counted(tmp_path):
+    engine = make_engine(tmp_path, "test-timeout")
+    held = engine.connect()
+    with pytest.raises(PoolTimeoutError):
+        engine.connect()
+    held.invalidate()
+    held.close()
+    snap = get_pool_stats("test-timeout").snapshot(engine.pool)
+    assert snap["timeouts"] == 1
+    assert snap["invalidated"] == 1
@@ -0,0 +1,71 @@
+import asyncio
+from datetime import timedelta
+from sqlalchemy import func, select, update
+from app.config.models_base import Customer, CustomerLatestScore, RiskScore, ScoreHistogram
+from app.config.portfolio import SELECT_HISTOGRAM, apply_scores_sync, summarize
+from app.core.scoring_engine import RiskScoringEngine
+from app.jobs.rebuild_portfolio import rebuild_portfolio
+from app.jobs.rescore import run_rescore
+from tests.test_risk_routes import TestingSessionLocal, client, create_customer
+
+def latest_scores_from_history(db):
+    newest = {}
+    for customer_id, score, created_at, score_id in db.execute(
+        select(RiskScore.customer_id, RiskScore.final_score, RiskScore.created_at, RiskScore.id)
+    ):
+        key = (created_at, score_id)
+        if customer_id not in newest or key > newest[customer_id][0]:
+            newest[customer_id] = (key, score)
+    return sorted(score for _, score in newest.values())
+
+def test_portfolio_tracks_latest_score_per_customer():
+    cid = create_customer("Pia", 22, 10000, 10)
+    client.post("/risk/score", json={"customer_id": cid, "age": 22, "income": 10000, "activity_score": 10})
+    client.post("/risk/score/batch", json={"items": [
+        {"customer_id": cid, "age": 50, "income": 90000, "activity_score": 70},
+    ]})
+    data = client.get("/risk/portfolio", params={"band_width": 25, "percentile": [50, 100]}).json()
+
+    async def expected():
+        async with TestingSessionLocal() as db:
+            return await db.run_sync(latest_scores_from_history)
+
+    scores = asyncio.run(expected())
+    assert data["customers"] == len(scores)
+    assert data["min"] == scores[0] and data["max"] == scores[-1]
+    assert data["percentiles"]["p100"] == scores[-1]
+    assert abs(data["mean"] - sum(scores) / len(scores)) < 1e-9
+    assert sum(band["customers"] for band in data["bands"]) == len(scores)
+    assert abs(sum(band["share"] for band in data["bands"]) - 1.0) < 1e-9
+    assert client.get("/risk/portfolio", params={"percentile": 0}).status_code == 400
+
+def test_summarize_bands_and_percentiles():
+    stats = summarize([(12, 1), (18, 2), (35, 1)], band_width=10, percentiles=[50, 75, 100])
+    assert stats["customers"] == 4
+    assert stats["mean"] == 20.75
+    assert stats["percentiles"] == {"p50": 18, "p75": 18, "p100": 35}
+    assert [(b["lower"], b["customers"]) for b in stats["bands"]] == [(10, 3), (20, 0), (30, 1)]
+    assert summarize([])["customers"] == 0
+
+def test_stale_rows_are_ignored_and_rebuild_restores_drift(session_factory):
+    with session_factory() as db:
+        db.add_all([Customer(name=f"c{i}", age=30 + i, income=20000 * i, activity_score=20 * i) for i in range(1, 4)])
+        db.commit()
+    run_rescore(session_factory, RiskScoringEngine())
+    with session_factory() as db:
+        current = db.get(CustomerLatestScore, 1)
+        old = current.created_at - timedelta(days=1)
+        apply_scores_sync(db, [{"customer_id": 1, "final_score": 999, "created_at": old}])
+        db.commit()
+        assert db.get(CustomerLatestScore, 1).final_score == current.final_score
+        assert db.scalar(select(func.sum(ScoreHistogram.customers))) == 3
+        db.execute(update(ScoreHistogram).values(customers=ScoreHistogram.customers + 5))
+        db.commit()
+
+    assert rebuild_portfolio(session_factory)["customers"] == 3
+    with session_factory() as db:
+        assert db.scalar(select(func.sum(ScoreHistogram.customers))) == 3
+        histogram = dict(db.execute(SELECT_HISTOGRAM).all())
+        latest = db.execute(select(CustomerLatestScore.final_score)).scalars().all()
+        assert sum(histogram.values()) == len(latest)
+        assert all(histogram[score] >= 1 for score in latest)
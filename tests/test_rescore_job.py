@@ -0,0 +1,84 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from app.main import app
+from app.config.database import get_session_factory
+from app.config.models_base import Customer, RiskScore
+from app.core.scoring_engine import RiskScoringEngine
+from app.jobs.rescore import RescoreProgress, read_checkpoint, run_rescore
+from app.schemas.admin_schema import RescoreRequest
+
+def add_customers(factory, customers):
+    with factory() as db:
+        db.add_all([
+            Customer(name=f"C{i}", age=20 + i * 10, income=15000 * (i + 1), activity_score=10 + i * 20)
+            for i in range(customers)
+        ])
+        db.commit()
+    return factory
+
+def count_scores(factory):
+    with factory() as db:
+        return db.execute(select(func.count(RiskScore.id))).scalar()
+
+def test_rescore_scores_every_customer_in_chunks(tmp_path, session_factory):
+    factory = add_customers(session_factory, 5)
+    checkpoint = str(tmp_path / "rescore.ckpt")
+    progress = run_rescore(factory, RiskScoringEngine(), chunk_size=2, checkpoint_path=checkpoint)
+    assert progress.finished
+    assert progress.processed == 5
+    assert progress.chunks == 3
+    assert read_checkpoint(checkpoint) == progress.last_id == 5
+    assert count_scores(factory) == 5
+    with factory() as db:
+        first = db.execute(select(RiskScore).where(RiskScore.customer_id == 1)).scalar_one()
+    assert first.final_score == RiskScoringEngine().calculate_score(20, 15000, 10)
+
+def test_rescore_resumes_after_start_id(session_factory):
+    factory = add_customers(session_factory, 5)
+    progress = run_rescore(factory, RiskScoringEngine(), chunk_size=10, start_after=3)
+    assert progress.processed == 2
+    with factory() as db:
+        ids = sorted(db.scalars(select(RiskScore.customer_id)))
+    assert ids == [4, 5]
+
+def test_admin_rescore_endpoint_runs_job(session_factory, monkeypatch):
+    factory = add_customers(session_factory, 3)
+    monkeypatch.setenv("ADMIN_API_TOKEN", "secret")
+    app.dependency_overrides[get_session_factory] = lambda: factory
+    try:
+        client = TestClient(app, headers={"X-Admin-Token": "secret"})
+        r = client.post("/admin/rescore", json={"chunk_size": 2})
+        assert r.status_code == 202
+        status = client.get("/admin/rescore").json()
+        assert status["finished"] is True
+        assert status["processed"] == 3
+        assert count_scores(factory) == 3
+    finally:
+        del app.dependency_overrides[get_session_factory]
+
+def test_admin_routes_require_token(session_factory, monkeypatch):
+    client = TestClient(app)
+    monkeypatch.delenv("ADMIN_API_TOKEN", raising=False)
+    assert client.get("/admin/rescore", headers={"X-Admin-Token": ""}).status_code == 403
+    monkeypatch.setenv("ADMIN_API_TOKEN", "secret")
+    assert client.post("/admin/rescore", json={}).status_code == 401
+    assert client.get("/admin/simulate", headers={"X-Admin-Token": "wrong"}).status_code == 401
+
+def test_rescore_lock_is_held_only_by_the_running_job(session_factory, monkeypatch):
+    from app.routes import admin_routes
+    factory = add_customers(session_factory, 2)
+    monkeypatch.setenv("ADMIN_API_TOKEN", "secret")
+    app.dependency_overrides[get_session_factory] = lambda: factory
+    client = TestClient(app, headers={"X-Admin-Token": "secret"})
+    try:
+        with admin_routes._rescore_lock:
+            assert client.post("/admin/rescore", json={}).status_code == 409
+            progress = RescoreProgress()
+            admin_routes._run_rescore_job(factory, RiskScoringEngine(), RescoreRequest(), 0, progress)
+            assert progress.processed == 0
+            assert count_scores(factory) == 0
+        assert client.post("/admin/rescore", json={}).status_code == 202
+        assert not admin_routes._rescore_lock.locked()
+        assert count_scores(factory) == 2
+    finally:
+        del app.dependency_overrides[get_session_factory]
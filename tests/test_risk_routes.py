@@ -1,23 +1,25 @@
+import asyncio
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.pool import StaticPool
 from app.main import app
 from app.config.models_base import Base
-from app.config.database import get_db
+from app.config.database import get_async_db
 
-engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base.metadata.create_all(bind=engine)
+engine = create_async_engine("sqlite+aiosqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+TestingSessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
 
-def override_get_db():
-    db = TestingSessionLocal()
-    try:
+async def init_models():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+asyncio.run(init_models())
+
+async def override_get_db():
+    async with TestingSessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
-app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_db
 client = TestClient(app)
 
 def create_customer(name, age, income, activity_score):
@@ -53,3 +55,83 @@ def test_get_risk_scores_empty_list_200():
     assert r.status_code == 200
     assert r.json() == []
 
+
+def test_post_risk_score_batch_partial_failure_200():
+    cid = create_customer("Erin", 45, 80000, 75)
+    payload = {"items": [
+        {"customer_id": cid, "age": 45, "income": 80000, "activity_score": 75},
+        {"customer_id": 99999, "age": 45, "income": 80000, "activity_score": 75},
+        {"customer_id": cid, "age": 22, "income": 10000, "activity_score": 10},
+    ]}
+    r = client.post("/risk/score/batch", json=payload)
+    assert r.status_code == 200
+    data = r.json()
+    assert data["succeeded"] == 2
+    assert data["failed"] == 1
+    assert [item["status"] for item in data["results"]] == ["ok", "error", "ok"]
+    assert data["results"][1]["detail"] == "Customer not found"
+    assert data["results"][2]["final_score"] == 20 + 25 + 30
+    assert len(client.get(f"/risk/{cid}").json()) == 2
+
+def test_post_risk_score_batch_empty_422():
+    r = client.post("/risk/score/batch", json={"items": []})
+    assert r.status_code == 422
+
+def test_get_risk_scores_paginated_newest_first():
+    cid = create_customer("Frank", 50, 70000, 40)
+    for age in (20, 30, 50, 65, 70):
+        client.post("/risk/score", json={"customer_id": cid, "age": age, "income": 70000, "activity_score": 40})
+    r = client.get(f"/risk/{cid}", params={"limit": 2})
+    assert r.status_code == 200
+    page1 = r.json()
+    assert len(page1) == 2
+    assert page1[0]["id"] > page1[1]["id"]
+    cursor = r.headers["x-next-cursor"]
+    assert cursor == str(page1[-1]["id"])
+    page2 = client.get(f"/risk/{cid}", params={"limit": 2, "before": cursor}).json()
+    page3 = client.get(f"/risk/{cid}", params={"limit": 2, "before": page2[-1]["id"]}).json()
+    ids = [s["id"] for s in page1 + page2 + page3]
+    assert ids == sorted(ids, reverse=True)
+    assert len(set(ids)) == 5
+    newer = client.get(f"/risk/{cid}", params={"limit": 2, "after": page3[0]["id"]}).json()
+    assert [s["id"] for s in newer] == [page2[0]["id"], page2[1]["id"]]
+
+def test_get_risk_scores_before_and_after_400():
+    r = client.get("/risk/1", params={"before": 5, "after": 1})
+    assert r.status_code == 400
+
+def test_get_risk_scores_unknown_cursor_400():
+    cid = create_customer("Gwen", 40, 50000, 40)
+    score_id = client.post("/risk/score", json={"customer_id": cid, "age": 40, "income": 50000, "activity_score": 40}).json()["id"]
+    assert client.get(f"/risk/{cid}", params={"before": score_id}).json() == []
+    r = client.get(f"/risk/{cid}", params={"before": 10**9})
+    assert r.status_code == 400
+    assert client.get(f"/risk/{cid}", params={"after": 10**9}).status_code == 400
+
+def test_get_latest_risk_score_200():
+    cid = create_customer("Grace", 33, 40000, 50)
+    client.post("/risk/score", json={"customer_id": cid, "age": 33, "income": 40000, "activity_score": 50})
+    last = client.post("/risk/score", json={"customer_id": cid, "age": 22, "income": 10000, "activity_score": 10}).json()
+    r = client.get(f"/risk/{cid}/latest")
+    assert r.status_code == 200
+    assert r.json()["id"] == last["id"]
+    assert r.json()["final_score"] == 20 + 25 + 30
+
+def test_get_latest_risk_score_none_404():
+    cid = create_customer("Heidi", 33, 40000, 50)
+    r = client.get(f"/risk/{cid}/latest")
+    assert r.status_code == 404
+
+def test_list_scores_matches_response_model():
+    import json
+    from app.schemas.risk_schema import RiskScoreResponse
+
+    cid = create_customer("Ivy", 33, 40000, 50)
+    created = client.post("/risk/score", json={"customer_id": cid, "age": 33, "income": 40000, "activity_score": 50})
+    r = client.get(f"/risk/{cid}")
+    assert r.headers["content-type"] == "application/json"
+    assert r.json() == [created.json()]
+    model = RiskScoreResponse(**r.json()[0])
+    # model_dump_json on Pydantic v2, .json() on v1.
+    dumped = model.model_dump_json() if hasattr(model, "model_dump_json") else model.json()
+    assert r.json()[0] == json.loads(dumped)
@@ -0,0 +1,157 @@
+import asyncio
+import json
+import os
+from sqlalchemy import func, select
+from app.main import app
+from app.config.models_base import RiskScore, utcnow
+from app.config.score_buffer import ScoreWriteBuffer, get_score_writer
+from tests.test_risk_routes import TestingSessionLocal, client, create_customer
+
+def count_scores(customer_id):
+    async def run():
+        async with TestingSessionLocal() as db:
+            return await db.scalar(select(func.count()).where(RiskScore.customer_id == customer_id))
+    return asyncio.run(run())
+
+def row(customer_id, score=50):
+    return {"customer_id": customer_id, "final_score": score, "explanation": "x", "created_at": utcnow()}
+
+def test_write_behind_score_returns_before_insert():
+    cid = create_customer("Wendy", 30, 40000, 50)
+    buffer = ScoreWriteBuffer(TestingSessionLocal)
+    app.dependency_overrides[get_score_writer] = lambda: buffer
+    try:
+        r = client.post("/risk/score", json={"customer_id": cid, "age": 30, "income": 40000, "activity_score": 50})
+    finally:
+        del app.dependency_overrides[get_score_writer]
+    assert r.status_code == 200
+    assert r.json()["id"] is None
+    assert count_scores(cid) == 0
+    assert asyncio.run(buffer.flush()) == 1
+    latest = client.get(f"/risk/{cid}/latest").json()
+    assert latest["final_score"] == r.json()["final_score"]
+    assert latest["created_at"] == r.json()["created_at"]
+
+def test_full_buffer_returns_503():
+    cid = create_customer("Xavier", 30, 40000, 50)
+    buffer = ScoreWriteBuffer(TestingSessionLocal, max_rows=1, put_timeout=0.01)
+    app.dependency_overrides[get_score_writer] = lambda: buffer
+    payload = {"customer_id": cid, "age": 30, "income": 40000, "activity_score": 50}
+    try:
+        assert client.post("/risk/score", json=payload).status_code == 200
+        r = client.post("/risk/score", json=payload)
+    finally:
+        del app.dependency_overrides[get_score_writer]
+    assert r.status_code == 503
+    assert buffer.depth == 1
+
+def test_background_flusher_drains_on_stop(tmp_path):
+    cid = create_customer("Yara", 30, 40000, 50)
+
+    async def run():
+        buffer = ScoreWriteBuffer(flush_rows=2, flush_interval=60, spool_dir=str(tmp_path))
+        await buffer.start(TestingSessionLocal)
+        for _ in range(5):
+            await buffer.put(row(cid))
+        await buffer.stop()
+        return buffer
+
+    buffer = asyncio.run(run())
+    assert buffer.depth == 0
+    assert count_scores(cid) == 5
+    assert os.listdir(tmp_path) == []
+
+def test_spool_replayed_after_crash(tmp_path):
+    cid = create_customer("Zane", 30, 40000, 50)
+    crashed = ScoreWriteBuffer(TestingSessionLocal, spool_dir=str(tmp_path))
+    for score in (10, 20, 30):
+        asyncio.run(crashed.put(row(cid, score)))
+
+    survivor = ScoreWriteBuffer(TestingSessionLocal, spool_dir=str(tmp_path))
+    assert asyncio.run(survivor.recover()) == 0  # segment still locked by its live owner
+
+    for spool in crashed._files.values():
+        spool.close()  # the process dies without flushing
+    assert asyncio.run(survivor.recover()) == 3
+    assert count_scores(cid) == 3
+    assert len(os.listdir(tmp_path)) == 1  # only the survivor's own open segment
+
+def test_poison_row_is_dead_lettered_without_blocking_others(tmp_path):
+    cid = create_customer("Pol", 30, 40000, 50)
+    buffer = ScoreWriteBuffer(TestingSessionLocal, flush_rows=4, max_retries=2, spool_dir=str(tmp_path))
+
+    async def run():
+        for score in (10, None, 30, 40, 50):  # NULL final_score violates NOT NULL
+            await buffer.put(row(cid, score))
+        for _ in range(20):
+            if not buffer.depth:
+                break
+            await buffer.flush()
+
+    asyncio.run(run())
+    assert buffer.depth == 0
+    assert count_scores(cid) == 4
+    assert buffer.stats()["dead_lettered"] == 1
+    with open(tmp_path / "dead-letter.jsonl") as f:
+        assert [json.loads(line)["row"]["final_score"] for line in f] == [None]
+
+def test_unexpected_errors_requeue_and_flusher_survives(monkeypatch):
+    cid = create_customer("Quin", 30, 40000, 50)
+    buffer = ScoreWriteBuffer(TestingSessionLocal, flush_interval=0.01)
+    real_insert = buffer._insert
+    calls = []
+
+    async def flaky(rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+        await real_insert(rows)
+
+    monkeypatch.setattr(buffer, "_insert", flaky)
+    monkeypatch.setattr("app.config.score_buffer.RETRY_DELAY", 0.01)
+
+    async def run():
+        await buffer.start()
+        await buffer.put(row(cid))
+        for _ in range(100):
+            if not buffer.depth:
+                break
+            await asyncio.sleep(0.01)
+        await buffer.stop()
+
+    asyncio.run(run())
+    assert calls[0] == 1 and len(calls) >= 2
+    assert buffer.failures == 1
+    assert count_scores(cid) == 1
+
+def test_recover_skips_unreadable_segment(tmp_path):
+    cid = create_customer("Rho", 30, 40000, 50)
+    (tmp_path / "scores-1-1-000001.jsonl").write_text("not json\n")
+    good = ScoreWriteBuffer(TestingSessionLocal, spool_dir=str(tmp_path))
+    asyncio.run(good.put(row(cid, 70)))
+    for spool in good._files.values():
+        spool.close()
+
+    survivor = ScoreWriteBuffer(TestingSessionLocal, spool_dir=str(tmp_path))
+    assert asyncio.run(survivor.recover()) == 1
+    assert count_scores(cid) == 1
+    assert survivor.stats()["unrecovered_segments"] == 1
+    assert (tmp_path / "scores-1-1-000001.jsonl").exists()
+
+def test_fsynced_puts_and_stop_after_segment_was_removed(tmp_path):
+    cid = create_customer("Sig", 30, 40000, 50)
+
+    async def run():
+        buffer = ScoreWriteBuffer(flush_rows=10, flush_interval=60, spool_dir=str(tmp_path), fsync=True)
+        await buffer.start(TestingSessionLocal)
+        for _ in range(3):
+            await buffer.put(row(cid))
+        assert [name.endswith(".jsonl") for name in os.listdir(tmp_path)] == [True]
+        await buffer.flush_all()
+        for name in os.listdir(tmp_path):
+            os.remove(tmp_path / name)  # e.g. already cleaned up by recovery elsewhere
+        await buffer.stop()
+
+    asyncio.run(run())
+    assert count_scores(cid) == 3
+    assert os.listdir(tmp_path) == []
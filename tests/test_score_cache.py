@@ -0,0 +1,20 @@
+from app.core.score_cache import ScoreCache
+
+def test_lru_eviction_and_counters():
+    cache = ScoreCache(maxsize=2)
+    cache.put("a", {"v": 1})
+    cache.put("b", {"v": 2})
+    assert cache.get("a") == {"v": 1}
+    cache.put("c", {"v": 3})
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": 1}
+    stats = cache.stats()
+    assert stats["size"] == 2
+    assert stats["hits"] == 2
+    assert stats["misses"] == 1
+    assert stats["evictions"] == 1
+
+def test_zero_size_disables_cache():
+    cache = ScoreCache(maxsize=0)
+    cache.put("a", {"v": 1})
+    assert cache.get("a") is None
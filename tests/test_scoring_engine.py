@@ -35,3 +35,21 @@ def test_explanation_contains_final_score_text():
     assert f"Final score = {score}." in text
     assert "Age contributed" in text
 
+
+def test_calculate_batch_matches_scalar():
+    import numpy as np
+    rng = np.random.default_rng(7)
+    ages = rng.integers(18, 81, 2000)
+    incomes = rng.uniform(0, 200000, 2000).round(2)
+    activity = rng.integers(0, 101, 2000)
+    batch = engine.calculate_batch(ages, incomes, activity)
+    expected = [engine.calculate_score(int(a), float(i), int(s)) for a, i, s in zip(ages, incomes, activity)]
+    assert batch.tolist() == expected
+
+def test_calculate_with_explanation_matches_score_and_explain():
+    local = RiskScoringEngine()
+    result = local.calculate_with_explanation({"age": 30, "income": 45000, "activity_score": 55})
+    assert result == {
+        "final_score": 10 + 15 + 15,
+        "explanation": local.explain(30, 45000, 55),
+    }
@@ -0,0 +1,29 @@
+import os
+import pytest
+from app.config.database import pool_sizes
+from app.utils import logger as logger_module
+
+def test_pool_budget_split_across_workers(monkeypatch):
+    monkeypatch.setenv("DB_MAX_CONNECTIONS", "40")
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    monkeypatch.delenv("DB_POOL_SIZE", raising=False)
+    monkeypatch.delenv("DB_MAX_OVERFLOW", raising=False)
+    assert pool_sizes() == (5, 5)
+    monkeypatch.setenv("DB_POOL_SIZE", "8")
+    assert pool_sizes() == (8, 5)
+
+def test_pool_defaults_without_budget(monkeypatch):
+    for name in ("DB_MAX_CONNECTIONS", "DB_POOL_SIZE", "DB_MAX_OVERFLOW"):
+        monkeypatch.delenv(name, raising=False)
+    assert pool_sizes() == (5, 10)
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="requires fork()")
+def test_log_listener_restarts_in_forked_worker():
+    logger_module.get_logger("tests.fork")
+    pid = os.fork()
+    if pid == 0:
+        listener = logger_module._listener
+        alive = listener is not None and listener._thread is not None and listener._thread.is_alive()
+        os._exit(0 if alive else 1)
+    _, status = os.waitpid(pid, 0)
+    assert os.waitstatus_to_exitcode(status) == 0
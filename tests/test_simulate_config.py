@@ -0,0 +1,77 @@
+import copy
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from app.main import app
+from app.config.database import get_session_factory
+from app.config.models_base import Customer, RiskScore
+from app.core.advanced_scoring_engine import RISK_CONFIG_DEFAULT, AdvancedRiskEngine
+from app.jobs.simulate_config import run_simulation
+
+def add_customers(factory, customers=40):
+    with factory() as db:
+        db.add_all([
+            Customer(name=f"C{i}", age=18 + i % 60, income=2500.0 * i, activity_score=i * 7 % 101)
+            for i in range(customers)
+        ])
+        db.commit()
+    return factory
+
+def candidate_config():
+    config = copy.deepcopy(RISK_CONFIG_DEFAULT)
+    config["weights"]["income"] = 3.0
+    config["activity_score"]["<30"] = 10
+    return config
+
+def test_simulation_matches_per_customer_scoring(session_factory):
+    factory = add_customers(session_factory)
+    candidate = candidate_config()
+    report = run_simulation(
+        factory, candidate, current=RISK_CONFIG_DEFAULT, chunk_size=7, workers=1, top=5
+    ).report
+    current_engine, candidate_engine = AdvancedRiskEngine(config=RISK_CONFIG_DEFAULT), AdvancedRiskEngine(config=candidate)
+    with factory() as db:
+        customers = db.scalars(select(Customer)).all()
+        assert db.scalar(select(func.count(RiskScore.id))) == 0
+    moves = {
+        c.id: (
+            round(current_engine.calculate(c.age, c.income, c.activity_score)),
+            round(candidate_engine.calculate(c.age, c.income, c.activity_score)),
+        )
+        for c in customers
+    }
+    assert report["customers"] == 40
+    assert report["changed"] == sum(1 for a, b in moves.values() if a != b)
+    assert report["band_changes"] == sum(1 for a, b in moves.values() if a // 10 != b // 10)
+    assert sum(band["delta"] for band in report["band_deltas"]) == 0
+    largest = max(abs(b - a) for a, b in moves.values())
+    assert abs(report["top_movers"][0]["delta"]) == largest
+    assert len(report["top_movers"]) == 5
+    mover = report["top_movers"][0]
+    assert moves[mover["customer_id"]] == (mover["current"], mover["candidate"])
+
+    unchanged = run_simulation(factory, RISK_CONFIG_DEFAULT, current=RISK_CONFIG_DEFAULT, workers=1).report
+    assert unchanged["changed"] == unchanged["band_changes"] == 0
+    assert unchanged["top_movers"] == []
+
+def test_process_pool_gives_same_report(session_factory):
+    factory = add_customers(session_factory)
+    kwargs = dict(current=RISK_CONFIG_DEFAULT, chunk_size=6, top=10)
+    inline = run_simulation(factory, candidate_config(), workers=1, **kwargs).report
+    pooled = run_simulation(factory, candidate_config(), workers=2, **kwargs).report
+    assert pooled == inline
+
+def test_admin_simulate_endpoint(session_factory, monkeypatch):
+    factory = add_customers(session_factory, 10)
+    monkeypatch.setenv("ADMIN_API_TOKEN", "secret")
+    app.dependency_overrides[get_session_factory] = lambda: factory
+    try:
+        client = TestClient(app, headers={"X-Admin-Token": "secret"})
+        assert client.post("/admin/simulate", json={"config": {"age": {}}}).status_code == 400
+        r = client.post("/admin/simulate", json={"config": candidate_config(), "workers": 1})
+        assert r.status_code == 202
+        status = client.get("/admin/simulate").json()
+        assert status["finished"] is True
+        assert status["processed"] == 10
+        assert status["report"]["customers"] == 10
+    finally:
+        del app.dependency_overrides[get_session_factory]
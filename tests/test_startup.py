@@ -0,0 +1,34 @@
+import subprocess
+import sys
+from app.utils import startup
+
+def test_compute_modules_import_without_db_stack():
+    code = (
+        "import sys\n"
+        "import app.core.scoring_engine, app.core.advanced_scoring_engine, app.core.engine_provider\n"
+        "import app.config.database\n"
+        "print(','.join(m for m in ('sqlalchemy', 'dotenv', 'fastapi') if m in sys.modules))\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
+
+def test_database_engines_are_created_on_first_use():
+    from app.config import database
+
+    assert "sync" not in database._engines
+    assert database.pool_status().keys() >= {"config"}
+
+def test_parse_importtime():
+    output = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   numpy.core\n"
+        "import time:       300 |        420 | numpy\n"
+        "unrelated line\n"
+    )
+    assert startup.parse_importtime(output) == [("numpy.core", 120, 120), ("numpy", 300, 420)]
+
+def test_report_lists_marked_phases():
+    startup.mark("test_phase")
+    timings = startup.report()
+    assert "test_phase" in timings["phases_ms"]
+    assert timings["total_ms"] >= timings["phases_ms"]["test_phase"]
@@ -0,0 +1,27 @@
+from app.utils import ttl_cache
+from app.utils.ttl_cache import TTLCache
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(ttl_cache.time, "monotonic", lambda: now[0])
+    cache = TTLCache(maxsize=10, ttl=5)
+    cache.set(1, {"id": 1})
+    assert cache.get(1) == {"id": 1}
+    now[0] += 6
+    assert cache.get(1) is None
+    stats = cache.stats()
+    assert stats["expirations"] == 1
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+
+def test_lru_eviction_and_delete():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+    cache.delete("a")
+    assert cache.get("a") is None
+    assert cache.get("c") == 3